@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import DashboardStat
+
+
+@admin.register(DashboardStat)
+class DashboardStatAdmin(admin.ModelAdmin):
+    list_display = ('owner', 'metric', 'value', 'count', 'updated_at')
+    list_filter = ('metric',)
+    readonly_fields = ('owner', 'metric', 'value', 'count', 'updated_at')
@@ -0,0 +1,28 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.stats import rebuild
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard counters from the patient and mapping tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', action='append', dest='emails', help='Only this user (repeatable)')
+
+    def handle(self, *args, **options):
+        owner_ids = None
+        if options['emails']:
+            owner_ids = list(User.objects.filter(email__in=options['emails']).values_list('id', flat=True))
+            if len(owner_ids) != len(set(options['emails'])):
+                raise CommandError('Unknown user email')
+
+        started = time.perf_counter()
+        count = rebuild(owner_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {count} dashboard counters in {time.perf_counter() - started:.1f}s'
+        ))
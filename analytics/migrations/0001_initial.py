@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+# model, owner field, total metric, {metric: field}
+COUNTED = [
+    ('patients', 'Patient', 'created_by_id', 'patients', {'blood_group': 'blood_group'}),
+    ('mappings', 'PatientDoctorMapping', 'assigned_by_id', 'mappings', {
+        'status': 'status', 'priority': 'priority', 'specialization': 'doctor_specialization',
+    }),
+]
+
+
+def populate_dashboard_stats(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    DashboardStat = apps.get_model('analytics', 'DashboardStat')
+    stats = []
+    for app_label, model_name, owner_field, total, dimensions in COUNTED:
+        rows = apps.get_model(app_label, model_name).objects.using(alias)
+        for metric, field in dimensions.items():
+            for row in rows.values(owner_field, field).annotate(rows=Count('id')).order_by():
+                stats.append(DashboardStat(
+                    owner_id=row[owner_field], metric=metric, value=row[field] or '', count=row['rows'],
+                ))
+        for row in rows.values(owner_field).annotate(rows=Count('id')).order_by():
+            stats.append(DashboardStat(owner_id=row[owner_field], metric=total, value='', count=row['rows']))
+    DashboardStat.objects.using(alias).bulk_create(stats, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('patients', '0002_owner_created_index'),
+        ('mappings', '0004_mapping_display_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(help_text='e.g., patients, blood_group, status', max_length=30)),
+                ('value', models.CharField(blank=True, max_length=200)),
+                ('count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('owner', 'metric', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_dashboard_stats, migrations.RunPython.noop),
+    ]
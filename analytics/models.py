@@ -0,0 +1,22 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class DashboardStat(models.Model):
+    """
+    One running count of a user's patients or mappings, e.g. mappings with status ACTIVE
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='dashboard_stats', db_index=False)
+    metric = models.CharField(max_length=30, help_text="e.g., patients, blood_group, status")
+    value = models.CharField(max_length=200, blank=True)
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Also serves the dashboard read: owner = X
+        unique_together = ['owner', 'metric', 'value']
+
+    def __str__(self):
+        return f"{self.owner_id} {self.metric}={self.value}: {self.count}"
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+from . import stats
+
+
+@receiver(pre_save, sender=Patient)
+@receiver(pre_save, sender=PatientDoctorMapping)
+def remember_counted_values(sender, instance, using, update_fields=None, **kwargs):
+    stats.snapshot(instance, using, update_fields)
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_save, sender=PatientDoctorMapping)
+def count_saved(sender, instance, created, using, **kwargs):
+    before = instance.__dict__.pop(stats.SNAPSHOT_ATTR, None)
+    if created:
+        stats.record_created([instance])
+    elif before is not None:
+        stats.record_changed(instance, before, using)
+
+
+@receiver(post_delete, sender=Patient)
+@receiver(post_delete, sender=PatientDoctorMapping)
+def count_deleted(sender, instance, using, **kwargs):
+    stats.record_deleted(instance, using)
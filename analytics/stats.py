@@ -0,0 +1,235 @@
+import weakref
+from collections import Counter
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+from sharding.shards import across_shards
+from .models import DashboardStat
+
+# metric: model field, per owner. The totals use the metric name with an empty value
+PATIENT_DIMENSIONS = {'blood_group': 'blood_group'}
+MAPPING_DIMENSIONS = {
+    'status': 'status',
+    'priority': 'priority',
+    'specialization': 'doctor_specialization',
+}
+PATIENTS_TOTAL = 'patients'
+MAPPINGS_TOTAL = 'mappings'
+
+# What each tracked model counts under, and which field owns the row
+TRACKED = {
+    Patient: ('created_by_id', PATIENTS_TOTAL, PATIENT_DIMENSIONS),
+    PatientDoctorMapping: ('assigned_by_id', MAPPINGS_TOTAL, MAPPING_DIMENSIONS),
+}
+
+SNAPSHOT_ATTR = '_dashboard_snapshot'
+
+# connection: (savepoint ids, summed deltas, on_commit callback) of its open transaction
+_pending = weakref.WeakKeyDictionary()
+
+
+def keys_for(model, values):
+    """
+    Return the (owner, metric, value) counters a row with ``values`` belongs to
+    """
+    owner_field, total, dimensions = TRACKED[model]
+    owner_id = values[owner_field]
+    keys = [(owner_id, total, '')]
+    keys.extend((owner_id, metric, values[field] or '') for metric, field in dimensions.items())
+    return keys
+
+
+def tracked_fields(model):
+    owner_field, _, dimensions = TRACKED[model]
+    return [owner_field, *dimensions.values()]
+
+
+def snapshot(instance, using, update_fields=None):
+    """
+    Remember the counted values stored for ``instance`` before a save overwrites them
+
+    Costs one query, and only for saves of existing rows that write a
+    counted field. Anything else stores None.
+    """
+    model = type(instance)
+    fields = tracked_fields(model)
+    values = None
+    if not instance._state.adding and instance.pk is not None:
+        written = fields if update_fields is None else {model._meta.get_field(name).attname for name in update_fields}
+        if set(fields) & set(written):
+            values = model._base_manager.using(using).filter(pk=instance.pk).values(*fields).first()
+    instance.__dict__[SNAPSHOT_ATTR] = values
+
+
+def current(instance):
+    return {field: getattr(instance, field) for field in tracked_fields(type(instance))}
+
+
+def apply_deltas(deltas):
+    """
+    Add each {(owner, metric, value): n} delta to its counter
+    """
+    for (owner_id, metric, value), amount in deltas.items():
+        if not amount:
+            continue
+        counters = DashboardStat.objects.filter(owner_id=owner_id, metric=metric, value=value)
+        if counters.update(count=F('count') + amount) or amount < 0:
+            # Nothing to take away from a counter that does not exist, e.g.
+            # while the owner and their counters are being deleted
+            continue
+        try:
+            with transaction.atomic():
+                DashboardStat.objects.create(owner_id=owner_id, metric=metric, value=value, count=amount)
+        except IntegrityError:
+            # Created concurrently since the update above
+            counters.update(count=F('count') + amount)
+
+
+def _flush(connection, deltas):
+    if _pending.get(connection, (None, None))[1] is deltas:
+        del _pending[connection]
+    apply_deltas(deltas)
+
+
+def apply_on_commit(deltas, using):
+    """
+    Apply ``deltas`` once the transaction writing the counted rows on ``using`` commits
+
+    The counters live on default while the rows may live on a shard, so
+    they follow the shard's transaction: a rollback drops them with the
+    rows. Deltas of one transaction, e.g. every row of a cascade delete,
+    are summed and applied together.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        apply_deltas(deltas)
+        return
+    savepoints = tuple(connection.savepoint_ids)
+    pending = _pending.get(connection)
+    # A rolled back transaction or savepoint drops its callback, and with
+    # it the deltas summed so far, so a new sum is started
+    if pending is None or pending[0] != savepoints or not any(
+        hook[1] is pending[2] for hook in connection.run_on_commit
+    ):
+        totals = Counter()
+        callback = partial(_flush, connection, totals)
+        pending = _pending[connection] = (savepoints, totals, callback)
+        transaction.on_commit(callback, using=using)
+    pending[1].update(deltas)
+
+
+def record_created(instances):
+    deltas = Counter()
+    for instance in instances:
+        deltas.update(keys_for(type(instance), current(instance)))
+    apply_on_commit(deltas, instances[0]._state.db)
+
+
+def record_deleted(instance, using):
+    deltas = Counter()
+    deltas.subtract(keys_for(type(instance), current(instance)))
+    apply_on_commit(deltas, using)
+
+
+def record_changed(instance, before, using):
+    deltas = Counter(keys_for(type(instance), current(instance)))
+    deltas.subtract(keys_for(type(instance), before))
+    apply_on_commit(deltas, using)
+
+
+def record_renamed(model, metric, queryset, new_value):
+    """
+    Move the rows of ``queryset`` to ``new_value`` before a bulk ``update()``
+
+    ``update()`` sends no signals, so callers renaming a counted column
+    in bulk report it here first.
+    """
+    owner_field, _, dimensions = TRACKED[model]
+    field = dimensions[metric]
+    deltas = Counter()
+    for row in queryset.values(owner_field, field).annotate(rows=Count('id')).order_by():
+        deltas[(row[owner_field], metric, row[field] or '')] -= row['rows']
+        deltas[(row[owner_field], metric, new_value or '')] += row['rows']
+    apply_on_commit(deltas, queryset.db)
+
+
+def _empty_dashboard():
+    return {
+        'patients': {'total': 0, 'by_blood_group': {}},
+        'mappings': {'total': 0, 'by_status': {}, 'by_priority': {}, 'by_specialization': {}},
+    }
+
+
+def _place(dashboard, metric, value, count):
+    if metric == PATIENTS_TOTAL:
+        dashboard['patients']['total'] = count
+    elif metric == MAPPINGS_TOTAL:
+        dashboard['mappings']['total'] = count
+    elif metric in PATIENT_DIMENSIONS:
+        dashboard['patients'][f'by_{metric}'][value] = count
+    elif metric in MAPPING_DIMENSIONS:
+        dashboard['mappings'][f'by_{metric}'][value] = count
+
+
+def materialized_dashboard(owner_id):
+    """
+    Read the dashboard from the maintained counters in one query
+    """
+    dashboard = _empty_dashboard()
+    rows = DashboardStat.objects.filter(owner_id=owner_id, count__gt=0).values_list('metric', 'value', 'count')
+    for metric, value, count in rows:
+        _place(dashboard, metric, value, count)
+    return dashboard
+
+
+def _grouped(owner_ids=None):
+    """
+    Yield (owner, metric, value, count) straight from GROUP BY queries
+
+    Each shard holding rows of ``owner_ids`` (default every shard) is queried.
+    """
+    counts = Counter()
+    for model, (owner_field, total, dimensions) in TRACKED.items():
+        rows = model.objects.all()
+        if owner_ids is not None:
+            rows = rows.filter(**{f'{owner_field}__in': owner_ids})
+        for shard_rows in across_shards(rows, owner_ids):
+            for position, (metric, field) in enumerate(dimensions.items()):
+                for row in shard_rows.values(owner_field, field).annotate(rows=Count('id')).order_by():
+                    if position == 0:
+                        # Every row has exactly one value per dimension
+                        counts[(row[owner_field], total, '')] += row['rows']
+                    counts[(row[owner_field], metric, row[field] or '')] += row['rows']
+    for (owner_id, metric, value), count in counts.items():
+        yield owner_id, metric, value, count
+
+
+def live_dashboard(owner_id):
+    """
+    Compute the dashboard with GROUP BY queries over the owner's rows
+    """
+    dashboard = _empty_dashboard()
+    for _, metric, value, count in _grouped([owner_id]):
+        _place(dashboard, metric, value, count)
+    return dashboard
+
+
+def rebuild(owner_ids=None, batch_size=5000):
+    """
+    Replace the counters of ``owner_ids`` (default everyone) with fresh GROUP BY results
+    """
+    stats = [
+        DashboardStat(owner_id=owner_id, metric=metric, value=value, count=count)
+        for owner_id, metric, value, count in _grouped(owner_ids)
+    ]
+    with transaction.atomic():
+        existing = DashboardStat.objects.all()
+        if owner_ids is not None:
+            existing = existing.filter(owner_id__in=owner_ids)
+        existing.delete()
+        DashboardStat.objects.bulk_create(stats, batch_size=batch_size)
+    return len(stats)
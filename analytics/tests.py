@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from healthcare_project.testing import create_doctor, create_patient, create_user
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+from patients.tests import patient_row
+from . import stats
+from .models import DashboardStat
+from .stats import live_dashboard, materialized_dashboard
+
+
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.doctor = create_doctor(self.user)
+
+    def counted(self):
+        return materialized_dashboard(self.user.pk)
+
+    def assign(self, patient, doctor=None, **fields):
+        return PatientDoctorMapping.objects.create(
+            patient=patient, doctor=doctor or self.doctor, assigned_by=self.user, **fields,
+        )
+
+    def test_create_counts_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = create_patient(self.user, blood_group='A+')
+            self.assign(patient, priority='HIGH')
+            self.assertEqual(self.counted()['patients']['total'], 0)
+
+        dashboard = self.counted()
+        self.assertEqual(dashboard['patients'], {'total': 1, 'by_blood_group': {'A+': 1}})
+        self.assertEqual(dashboard['mappings'], {
+            'total': 1, 'by_status': {'ACTIVE': 1}, 'by_priority': {'HIGH': 1},
+            'by_specialization': {'Cardiology': 1},
+        })
+
+    def test_rolled_back_rows_are_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    create_patient(self.user)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            create_patient(self.user)
+        self.assertEqual(self.counted()['patients']['total'], 1)
+
+    def test_update_moves_the_counted_value(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = create_patient(self.user, blood_group='A+')
+        patient = Patient.objects.get(pk=patient.pk)
+        # Reads take no snapshot
+        self.assertNotIn(stats.SNAPSHOT_ATTR, patient.__dict__)
+
+        patient.blood_group = 'B+'
+        with self.captureOnCommitCallbacks(execute=True):
+            patient.save()
+        self.assertEqual(self.counted()['patients']['by_blood_group'], {'B+': 1})
+
+    def test_saves_of_uncounted_fields_cost_no_snapshot(self):
+        patient = create_patient(self.user)
+        patient.first_name = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            patient.save(update_fields=['first_name'])
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('SELECT')])
+
+    def test_cascade_delete_updates_each_counter_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = create_patient(self.user)
+            for priority in ('LOW', 'LOW', 'HIGH'):
+                self.assign(patient, create_doctor(self.user), priority=priority, status='COMPLETED')
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                patient.delete()
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "analytics_dashboardstat"')]
+        # patients, blood_group, then mappings, status, two priorities, specialization
+        self.assertEqual(len(updates), 7)
+        self.assertEqual(self.counted(), live_dashboard(self.user.pk))
+        self.assertEqual(self.counted()['mappings']['total'], 0)
+
+    def test_bulk_import_is_counted(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        rows = [patient_row(f'bulk{n}@example.com') for n in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/patients/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.counted()['patients'], {'total': 3, 'by_blood_group': {'O+': 3}})
+
+    def test_rebuild_repairs_drift(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_patient(self.user)
+            self.assign(create_patient(self.user))
+        Patient.objects.filter(created_by=self.user).update(blood_group='AB-')
+        DashboardStat.objects.filter(metric='mappings').update(count=5)
+        self.assertNotEqual(self.counted(), live_dashboard(self.user.pk))
+
+        call_command('rebuild_dashboard_stats', '--email', self.user.email, stdout=StringIO())
+        self.assertEqual(self.counted(), live_dashboard(self.user.pk))
+        self.assertEqual(self.counted()['patients']['by_blood_group'], {'AB-': 2})
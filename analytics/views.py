@@ -0,0 +1,28 @@
+from rest_framework import status, permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from .stats import live_dashboard, materialized_dashboard
+
+DASHBOARD_SOURCES = {
+    'materialized': materialized_dashboard,
+    'live': live_dashboard,
+}
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def dashboard(request):
+    """
+    GET: Patient and mapping counts for the authenticated user
+    (?source=live recomputes them with GROUP BY queries)
+    """
+    source = request.query_params.get('source', 'materialized')
+    if source not in DASHBOARD_SOURCES:
+        return Response({
+            'source': [f"Unknown source, use one of: {', '.join(DASHBOARD_SOURCES)}."]
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'source': source,
+        **DASHBOARD_SOURCES[source](request.user.id)
+    }, status=status.HTTP_200_OK)
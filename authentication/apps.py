@@ -3,4 +3,14 @@ from django.apps import AppConfig
 
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'authentication'
\ No newline at end of file
+    name = 'authentication'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from healthcare_project.metrics import register_collector
+        from .throttling import get_stats
+
+        register_collector(
+            'auth_throttle_requests_total', 'counter', 'Authentication requests checked by each throttle, by result.',
+            lambda: {(('scope', scope), ('result', result)): count for (scope, result), count in get_stats().items()},
+        )
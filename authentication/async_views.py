@@ -0,0 +1,16 @@
+from asgiref.sync import sync_to_async
+from healthcare_project.async_api import api_response, async_read_view
+from . import views
+from .serializers import UserProfileSerializer
+from .tokens import get_full_user
+
+
+@async_read_view(views.profile)
+async def profile(request):
+    """
+    Get current user profile without blocking the event loop
+    """
+    user = await sync_to_async(get_full_user)(request.user)
+    return api_response({
+        'user': UserProfileSerializer(user).data
+    })
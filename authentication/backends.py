@@ -0,0 +1,142 @@
+import hashlib
+import hmac
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.backends import ModelBackend
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+UserModel = get_user_model()
+
+_executor = None
+_admission = None
+_executor_lock = threading.Lock()
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins in progress, please retry shortly.'
+    default_code = 'password_hashing_busy'
+
+
+def _get_pool():
+    global _executor, _admission
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = settings.PASSWORD_HASH_WORKERS
+                # Running plus queued checks; anything beyond waits for a slot
+                _admission = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE_SIZE)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor, _admission
+
+
+def run_password_hasher(func, *args):
+    """
+    Run a password hashing call, on the bounded pool when one is configured
+
+    hashlib releases the GIL while hashing, so a pool of
+    PASSWORD_HASH_WORKERS threads caps how many CPU-bound verifications run
+    at once. Callers that cannot get a slot within
+    PASSWORD_HASH_QUEUE_TIMEOUT seconds get a 503 instead of tying up the
+    worker indefinitely.
+    """
+    if not settings.PASSWORD_HASH_WORKERS:
+        return func(*args)
+
+    executor, admission = _get_pool()
+    if not admission.acquire(timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT):
+        raise PasswordHashingBusy()
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        admission.release()
+
+
+def check_password(user, password):
+    """
+    Check ``password`` against ``user``'s stored hash, upgrading an outdated hash
+
+    Only the pure hashing calls run on the hashing pool. The upgrade is
+    saved on the calling thread, so pool threads never open a database
+    connection (or take a slot of the connection pool) of their own.
+    """
+    encoded = user.password
+    if not run_password_hasher(hashers.check_password, password, encoded):
+        return False
+    # As AbstractBaseUser.check_password's setter does, after a verified login
+    preferred = hashers.get_hasher('default')
+    hasher = hashers.identify_hasher(encoded)
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(encoded):
+        user.password = run_password_hasher(hashers.make_password, password)
+        user._password = None
+        user.save(update_fields=['password'])
+    return True
+
+
+def coalesce(key, func):
+    """
+    Run ``func()`` once for concurrent callers passing the same ``key``
+
+    The first caller runs it; callers arriving while it is in flight wait
+    for and share its result, or its exception. Nothing is kept once the
+    call returns.
+    """
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        result = func()
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]
+
+
+def credentials_key(username, password):
+    # Keyed digest, so no plaintext password is held as a dict key
+    return hmac.new(settings.SECRET_KEY.encode(), f'{username}\0{password}'.encode(), hashlib.sha256).hexdigest()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that verifies passwords through run_password_hasher
+
+    Looks the user up once by USERNAME_FIELD (email) and then checks the
+    password, so a login costs one query plus one hash. Concurrent attempts
+    with identical credentials, such as client retry storms, share one
+    lookup and one hash.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        return coalesce(credentials_key(username, password), lambda: self._authenticate(username, password))
+
+    def _authenticate(self, username, password):
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway to keep unknown and known emails equally slow (#20760)
+            run_password_hasher(hashers.make_password, password)
+        else:
+            if check_password(user, password) and self.user_can_authenticate(user):
+                return user
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from rest_framework.settings import api_settings
+
+PER_PROCESS_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches, deploy=True)
+def check_throttle_cache(app_configs, **kwargs):
+    """
+    Warn when the sign-in throttles count in a cache private to each worker process
+    """
+    rates = [scope for scope, rate in api_settings.DEFAULT_THROTTLE_RATES.items() if rate]
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if not rates or backend not in PER_PROCESS_CACHES:
+        return []
+    return [Warning(
+        f'Throttle scopes ({", ".join(sorted(rates))}) count requests in {backend}, which each worker '
+        f'process keeps to itself, so N workers allow N times the configured rates.',
+        hint='Set REDIS_URL to share the throttle counters between workers.',
+        id='authentication.W001',
+    )]
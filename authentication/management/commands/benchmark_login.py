@@ -0,0 +1,110 @@
+import json
+import os
+import statistics
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+from authentication.throttling import throttling_disabled
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput under the configured PASSWORD_HASHERS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Total logins to perform')
+        parser.add_argument('--threads', type=int, default=os.cpu_count() or 1, help='Concurrent clients')
+        parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+        parser.add_argument(
+            '--throttle', action='store_true', help='Keep the login rate limits (by default they are lifted)',
+        )
+
+    def handle(self, *args, **options):
+        password = uuid.uuid4().hex
+        email = f'login-benchmark-{uuid.uuid4().hex[:12]}@example.com'
+        user = User.objects.create_user(
+            username=email.split('@')[0], email=email, password=password,
+            first_name='Login', last_name='Benchmark'
+        )
+        try:
+            hash_ms = self.time_hash(user, password)
+            # Every benchmark login comes from one address and one email
+            with nullcontext() if options['throttle'] else throttling_disabled():
+                latencies, failures, elapsed = self.run_logins(
+                    email, password, options['logins'], options['threads'],
+                )
+        finally:
+            user.delete()
+
+        cores = min(options['threads'], os.cpu_count() or 1)
+        hasher = get_hasher()
+        result = {
+            'hasher': hasher.algorithm,
+            'iterations': getattr(hasher, 'iterations', None),
+            'hash_workers': settings.PASSWORD_HASH_WORKERS,
+            'threads': options['threads'],
+            'logins': len(latencies),
+            'failures': failures,
+            'single_hash_ms': round(hash_ms, 2),
+            'logins_per_sec': round(len(latencies) / elapsed, 2),
+            'logins_per_sec_per_core': round(len(latencies) / elapsed / cores, 2),
+            'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+            'p99_ms': round(self.percentile(latencies, 99), 2) if latencies else None,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            for key, value in result.items():
+                self.stdout.write(f'{key:<24} {value}')
+
+    def time_hash(self, user, password):
+        start = time.perf_counter()
+        user.check_password(password)
+        return (time.perf_counter() - start) * 1000
+
+    def run_logins(self, email, password, total, threads):
+        latencies = []
+        failures = []
+        lock = threading.Lock()
+        per_thread = [total // threads + (1 if i < total % threads else 0) for i in range(threads)]
+        body = json.dumps({'email': email, 'password': password})
+
+        def worker(count):
+            client = Client()
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    response = client.post('/api/auth/login/', body, content_type='application/json')
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        if response.status_code == 200:
+                            latencies.append(elapsed)
+                        else:
+                            failures.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(count,)) for count in per_thread if count]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return latencies, len(failures), time.perf_counter() - start
+
+    @staticmethod
+    def percentile(values, pct):
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
@@ -2,6 +2,10 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from healthcare_project.metrics import TimedSerializerMixin
+from .tokens import get_cached_user
 
 User = get_user_model()
 
@@ -53,24 +57,21 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if email and password:
-            try:
-                user = User.objects.get(email=email)
-                # Use email for authentication since that's our USERNAME_FIELD
-                user = authenticate(request=self.context.get('request'), username=email, password=password)
-                if not user:
-                    raise serializers.ValidationError('Invalid credentials.')
-                if not user.is_active:
-                    raise serializers.ValidationError('User account is disabled.')
-                attrs['user'] = user
-            except User.DoesNotExist:
+            # Use email for authentication since that's our USERNAME_FIELD.
+            # The backend looks the user up itself, so no separate query here.
+            user = authenticate(request=self.context.get('request'), username=email, password=password)
+            if not user:
                 raise serializers.ValidationError('Invalid credentials.')
+            if not user.is_active:
+                raise serializers.ValidationError('User account is disabled.')
+            attrs['user'] = user
         else:
             raise serializers.ValidationError('Must include email and password.')
 
         return attrs
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for user profile information
     """
@@ -79,4 +80,15 @@ class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'full_name', 'date_joined')
-        read_only_fields = ('id', 'username', 'date_joined')
\ No newline at end of file
+        read_only_fields = ('id', 'username', 'date_joined')
+
+
+class ActiveUserTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that refuses tokens of deleted or deactivated users
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        get_cached_user(refresh[jwt_settings.USER_ID_CLAIM])
+        return super().validate(attrs)
@@ -0,0 +1,167 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import authenticate, hashers
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+
+from healthcare_project.testing import assert_num_queries, create_user
+from .backends import coalesce
+from .checks import check_throttle_cache
+from .tokens import UserClaimsRefreshToken, get_full_user
+
+
+@override_settings(PASSWORD_HASH_WORKERS=2)
+class PooledModelBackendTests(TestCase):
+    def test_outdated_hash_is_upgraded_on_the_request_thread(self):
+        user = create_user()
+        user.password = hashers.make_password('Sesame!2345', hasher='pbkdf2_sha1')
+        user.save(update_fields=['password'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(authenticate(username=user.email, password='Sesame!2345'), user)
+
+        self.assertTrue(any(query['sql'].startswith('UPDATE') for query in queries.captured_queries))
+        user.refresh_from_db()
+        self.assertEqual(hashers.identify_hasher(user.password).algorithm, hashers.get_hasher().algorithm)
+        self.assertTrue(user.check_password('Sesame!2345'))
+
+    def test_wrong_password_leaves_the_hash_alone(self):
+        user = create_user()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(authenticate(username=user.email, password='wrong'))
+        self.assertEqual(len(queries), 1)
+        self.assertIsNone(authenticate(username='nobody@example.com', password='wrong'))
+
+
+class ThrottleCacheCheckTests(SimpleTestCase):
+    def test_warns_about_per_process_counters(self):
+        messages = check_throttle_cache(None)
+        self.assertEqual([message.id for message in messages], ['authentication.W001'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}})
+    def test_shared_cache_is_fine(self):
+        self.assertEqual(check_throttle_cache(None), [])
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates},
+    })
+
+
+class SignInThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, email, **extra):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': 'wrong'}, format='json', **extra)
+
+    @throttle_rates(login_ip='3/minute', login_email=None)
+    def test_client_address_is_limited(self):
+        for _ in range(3):
+            self.assertEqual(self.login('a@example.com').status_code, 400)
+        # Rejected before any query or password hashing
+        with assert_num_queries(0):
+            response = self.login('b@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.login('c@example.com', REMOTE_ADDR='10.0.0.2').status_code, 400)
+
+    @throttle_rates(login_ip=None, login_email='2/minute')
+    def test_email_is_limited_across_addresses(self):
+        for address in ('10.0.0.1', '10.0.0.2'):
+            self.assertEqual(self.login('a@example.com', REMOTE_ADDR=address).status_code, 400)
+        self.assertEqual(self.login(' A@Example.com', REMOTE_ADDR='10.0.0.3').status_code, 429)
+        self.assertEqual(self.login('b@example.com', REMOTE_ADDR='10.0.0.3').status_code, 400)
+
+    @throttle_rates(login_ip=None, login_email=None)
+    def test_empty_rates_lift_the_limits(self):
+        for _ in range(5):
+            self.assertEqual(self.login('a@example.com').status_code, 400)
+
+
+class CoalesceTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_call(self):
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'checked'
+
+        leader = threading.Thread(target=lambda: results.append(coalesce('key', slow)))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        followers = [threading.Thread(target=lambda: results.append(coalesce('key', slow))) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        # Let the followers reach the in-flight call before it returns
+        time.sleep(0.2)
+        release.set()
+        for thread in (leader, *followers):
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['checked'] * 4)
+        # Nothing is kept once the call returns
+        self.assertEqual(coalesce('key', lambda: 'again'), 'again')
+
+
+class AuthenticationModeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.refresh = UserClaimsRefreshToken.for_user(self.user)
+        self.request = APIRequestFactory().get(
+            '/api/auth/profile/', HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}',
+        )
+
+    def deactivate(self):
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+
+    def test_database_mode_rejects_a_deactivated_user_at_once(self):
+        self.assertEqual(JWTAuthentication().authenticate(self.request)[0], self.user)
+        self.deactivate()
+        with self.assertRaises(AuthenticationFailed) as raised:
+            JWTAuthentication().authenticate(self.request)
+        self.assertEqual(raised.exception.detail['detail'], 'User is inactive')
+
+    def test_stateless_mode_keeps_the_token_but_not_the_full_user(self):
+        token_user = JWTStatelessUserAuthentication().authenticate(self.request)[0]
+        self.assertEqual(get_full_user(token_user), self.user)
+        self.deactivate()
+
+        # The claims are trusted until the access token expires...
+        token_user = JWTStatelessUserAuthentication().authenticate(self.request)[0]
+        self.assertEqual(token_user.id, self.user.pk)
+        # ...but the cached row was dropped on save, so the lookup refuses it
+        with self.assertRaises(AuthenticationFailed) as raised:
+            get_full_user(token_user)
+        self.assertEqual(raised.exception.get_codes(), 'user_inactive')
+
+    def test_stateless_mode_refuses_a_deleted_full_user(self):
+        token_user = JWTStatelessUserAuthentication().authenticate(self.request)[0]
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed) as raised:
+            get_full_user(token_user)
+        self.assertEqual(raised.exception.get_codes(), 'user_not_found')
+
+    def test_refresh_is_refused_once_deactivated(self):
+        client = APIClient()
+        response = client.post('/api/auth/token/refresh/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.deactivate()
+        response = client.post('/api/auth/token/refresh/', {'refresh': response.json()['refresh']}, format='json')
+        self.assertEqual(response.status_code, 401)
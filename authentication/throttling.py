@@ -0,0 +1,161 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+KEY = 'throttle:{scope}:{ident}:{window}'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(scope, allowed):
+    with _stats_lock:
+        _stats[(scope, 'allowed' if allowed else 'throttled')] += 1
+
+
+def get_stats():
+    """
+    Return this process's {(scope, 'allowed' | 'throttled'): requests} counters
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def parse_rate(rate):
+    """
+    Turn '<requests>/<second|minute|hour|day>' into (requests, seconds), or (None, None)
+    """
+    if not rate:
+        return None, None
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Sliding-window counter throttle backed by the Django cache
+
+    Requests are counted per fixed window with an atomic ``incr``, and the
+    previous window's count is weighted by how much of it still overlaps
+    the sliding window. That keeps two small cache entries per client
+    instead of a timestamp log, and a burst at a window boundary cannot
+    double the allowed rate. Rejected requests count too, so a client that
+    keeps hammering stays throttled.
+
+    Subclasses set ``scope``, looked up in ``DEFAULT_THROTTLE_RATES``, and
+    may override ``get_ident`` (the client address by default), returning
+    None to skip the request. Throttles run before the view body, so a
+    rejected request never reaches the database or the password hasher.
+    """
+    scope = None
+
+    def __init__(self):
+        # Read on every request so override_settings() applies
+        self.num_requests, self.duration = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(self.scope))
+
+    def allow_request(self, request, view):
+        if self.num_requests is None:
+            return True
+        ident = self.get_ident(request)
+        if ident is None:
+            return True
+
+        now = time.time()
+        window, offset = divmod(now, self.duration)
+        window = int(window)
+        digest = hashlib.md5(ident.encode()).hexdigest()
+        current_key = KEY.format(scope=self.scope, ident=digest, window=window)
+        previous_key = KEY.format(scope=self.scope, ident=digest, window=window - 1)
+
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # The previous window must outlive this one to be weighted
+            if cache.add(current_key, 1, self.duration * 2):
+                current = 1
+            else:
+                current = cache.incr(current_key)
+        previous = cache.get(previous_key, 0)
+
+        self.current, self.previous, self.offset = current, previous, offset
+        allowed = previous * (1 - offset / self.duration) + current <= self.num_requests
+        _record(self.scope, allowed)
+        return allowed
+
+    def wait(self):
+        """
+        Seconds until one more request would fit, assuming no other traffic
+        """
+        limit, duration = self.num_requests, self.duration
+        if self.current + 1 <= limit:
+            # Wait for enough of the previous window to slide out
+            if not self.previous:
+                return 0
+            return max(0.0, duration * (1 - (limit - self.current - 1) / self.previous) - self.offset)
+        # Wait for this window to become the previous one and slide out
+        return duration - self.offset + duration * max(0.0, 1 - (limit - 1) / self.current)
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """
+    Limit by client address (``REMOTE_ADDR``, or ``X-Forwarded-For`` behind ``NUM_PROXIES``)
+    """
+
+
+class EmailRateThrottle(SlidingWindowThrottle):
+    """
+    Limit by the email submitted in the request body, across all client addresses
+    """
+
+    def get_ident(self, request):
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return email.strip().lower()
+
+
+class LoginIPThrottle(IPRateThrottle):
+    scope = 'login_ip'
+
+
+class LoginEmailThrottle(EmailRateThrottle):
+    scope = 'login_email'
+
+
+class RegisterIPThrottle(IPRateThrottle):
+    scope = 'register_ip'
+
+
+class RegisterEmailThrottle(EmailRateThrottle):
+    scope = 'register_email'
+
+
+class TokenRefreshIPThrottle(IPRateThrottle):
+    scope = 'token_refresh_ip'
+
+
+SCOPES = [
+    throttle.scope for throttle in (
+        LoginIPThrottle, LoginEmailThrottle, RegisterIPThrottle, RegisterEmailThrottle, TokenRefreshIPThrottle,
+    )
+]
+
+
+def throttling_disabled():
+    """
+    Settings override lifting the authentication limits, for benchmarks
+    """
+    from django.test.utils import override_settings
+
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {scope: None for scope in SCOPES},
+    })
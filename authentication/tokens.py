@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+# Copied into every token so handlers can use them without loading the user
+USER_CLAIMS = ('username', 'email', 'first_name', 'last_name')
+
+FULL_USER_CACHE_KEY = 'auth:user:{pk}'
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user's identity claims
+
+    Access tokens derived from it, and refresh tokens rotated from it,
+    keep the same claims.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from token claims without a database lookup
+
+    ``id``, ``username``, ``email``, ``first_name`` and ``last_name`` come
+    from the token. Code that needs the real row uses ``full_user``, which
+    is cached for ``AUTH_USER_CACHE_TIMEOUT`` seconds.
+    """
+
+    @property
+    def full_name(self):
+        return f"{self.first_name or ''} {self.last_name or ''}".strip()
+
+    @property
+    def full_user(self):
+        # TokenUser.__getattr__ answers every missing attribute from the
+        # token, so the memoized row is looked up in __dict__ directly
+        if '_full_user' not in self.__dict__:
+            self.__dict__['_full_user'] = get_cached_user(self.id)
+        return self.__dict__['_full_user']
+
+
+def get_cached_user(pk):
+    """
+    Return the active User row ``pk``, cached for AUTH_USER_CACHE_TIMEOUT
+
+    Raises AuthenticationFailed, as JWTAuthentication does, for users that
+    were deleted or deactivated since their token was issued.
+    """
+    key = FULL_USER_CACHE_KEY.format(pk=pk)
+    user = cache.get(key)
+    if user is None:
+        try:
+            user = User.objects.get(pk=pk)
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    if not user.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    return user
+
+
+def invalidate_cached_user(pk):
+    cache.delete(FULL_USER_CACHE_KEY.format(pk=pk))
+
+
+def get_full_user(user):
+    """
+    Return the User row for ``request.user`` under either authentication mode
+    """
+    if isinstance(user, ClaimsUser):
+        return user.full_user
+    return user
@@ -1,10 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
-from . import views
+from . import async_views, views
+
+# Under ASGI the read endpoints are served by native coroutine views
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
 
 urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.login, name='login'),
-    path('profile/', views.profile, name='profile'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('profile/', read_views.profile, name='profile'),
+    path('token/refresh/', views.TokenRefreshView.as_view(), name='token_refresh'),
 ]
\ No newline at end of file
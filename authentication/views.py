@@ -1,14 +1,21 @@
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt import views as jwt_views
 from django.contrib.auth import get_user_model
-from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer
+from .serializers import (
+    ActiveUserTokenRefreshSerializer, UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
+)
+from .throttling import (
+    LoginEmailThrottle, LoginIPThrottle, RegisterEmailThrottle, RegisterIPThrottle, TokenRefreshIPThrottle,
+)
+from .tokens import UserClaimsRefreshToken, get_full_user
 
 User = get_user_model()
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([RegisterIPThrottle, RegisterEmailThrottle])
 def register(request):
     """
     Register a new user
@@ -19,7 +26,7 @@ def register(request):
         user = serializer.save()
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = UserClaimsRefreshToken.for_user(user)
         access_token = refresh.access_token
         
         return Response({
@@ -45,6 +52,7 @@ def register(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([LoginIPThrottle, LoginEmailThrottle])
 def login(request):
     """
     Login user and return JWT tokens
@@ -55,7 +63,7 @@ def login(request):
         user = serializer.validated_data['user']
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = UserClaimsRefreshToken.for_user(user)
         access_token = refresh.access_token
         
         return Response({
@@ -79,13 +87,21 @@ def login(request):
     }, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TokenRefreshView(jwt_views.TokenRefreshView):
+    """
+    Exchange a refresh token for a new access token, limited per client address
+    """
+    serializer_class = ActiveUserTokenRefreshSerializer
+    throttle_classes = [TokenRefreshIPThrottle]
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def profile(request):
     """
     Get current user profile
     """
-    serializer = UserProfileSerializer(request.user)
+    serializer = UserProfileSerializer(get_full_user(request.user))
     return Response({
         'user': serializer.data
     }, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,331 @@
+import http.client
+import json
+import re
+import time
+import uuid
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from authentication.throttling import throttling_disabled
+from benchmarks.stats import latency_summary
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+
+from .generate_dataset import user_email
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+# Admin pages are not part of the API
+EXCLUDED_NAMESPACES = {'admin'}
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Scenario:
+    """
+    One request shape against one named URL
+
+    ``kwargs``, ``query`` and ``body`` may be callables taking
+    (state, iteration) so each request can target different rows.
+    ``record`` receives (state, response JSON) after a successful write.
+    """
+
+    def __init__(self, name, url_name, method='GET', kwargs=None, query='', body=None,
+                 record=None, writes=False, max_iterations=None):
+        self.name = name
+        self.url_name = url_name
+        self.method = method
+        self.kwargs = kwargs
+        self.query = query
+        self.body = body
+        self.record = record
+        self.writes = writes
+        self.max_iterations = max_iterations
+
+    def request(self, state, iteration):
+        kwargs = self.kwargs(state, iteration) if callable(self.kwargs) else self.kwargs
+        query = self.query(state, iteration) if callable(self.query) else self.query
+        body = self.body(state, iteration) if callable(self.body) else self.body
+        return reverse(self.url_name, kwargs=kwargs) + query, body
+
+
+def _rotate(key):
+    return lambda state, i: state[key][i % len(state[key])]
+
+
+def _patient_row(state, i):
+    return {
+        'first_name': 'Bench', 'last_name': f'Patient{i}', 'email': f"bench-{state['run']}-{i}@example.test",
+        'phone_number': '+911234567890', 'date_of_birth': '1990-01-01', 'gender': 'O', 'blood_group': 'O+',
+        'address_line_1': '1 Bench Street', 'city': 'Pune', 'state': 'Maharashtra', 'postal_code': '411001',
+        'emergency_contact_name': 'Bench Contact', 'emergency_contact_phone': '+911234567891',
+    }
+
+
+def _doctor_row(state, i):
+    return {
+        'first_name': 'Bench', 'last_name': f'Doctor{i}', 'email': f"bench-doctor-{state['run']}-{i}@example.test",
+        'phone_number': '+911234567890', 'gender': 'O', 'license_number': f"BENCH-{state['run']}-{i}",
+        'specialization': 'Cardiology', 'qualification': 'MD', 'years_of_experience': 5,
+        'hospital_name': 'Bench Hospital', 'hospital_address': '1 Bench Street', 'consultation_fee': '500.00',
+        'available_days': 'Mon-Fri', 'available_hours': '9:00 AM - 5:00 PM', 'languages_spoken': 'English',
+    }
+
+
+def _bulk(row, size):
+    return lambda state, i: [row(state, f'{i}-{n}') for n in range(size)]
+
+
+def _pair(patients_key, doctor_offset):
+    def body(state, i):
+        return {'patient': state[patients_key][i], 'doctor': state['doctor_ids'][doctor_offset]}
+    return body
+
+
+def _bulk_pairs(patients_key, size):
+    def body(state, i):
+        patients = state[patients_key][i * size:(i + 1) * size]
+        if not patients:
+            raise IndexError(i)
+        return [{'patient': patient, 'doctor': state['doctor_ids'][0]} for patient in patients]
+    return body
+
+
+def _remember(key, extract):
+    def record(state, data):
+        state[key].extend(extract(data))
+    return record
+
+
+BULK_SIZE = 10
+
+SCENARIOS = [
+    Scenario('login', 'login', 'POST', body=lambda s, i: {'email': s['email'], 'password': s['password']},
+             max_iterations=20),
+    Scenario('register', 'register', 'POST', writes=True, max_iterations=20, body=lambda s, i: {
+        'username': f"bench-{s['run']}-{i}", 'email': f"bench-user-{s['run']}-{i}@example.test",
+        'first_name': 'Bench', 'last_name': 'User', 'password': s['password'], 'password_confirm': s['password'],
+    }),
+    Scenario('token refresh', 'token_refresh', 'POST', body=lambda s, i: {'refresh': s['refresh']},
+             record=lambda s, data: s.update(refresh=data.get('refresh', s['refresh']))),
+    Scenario('profile', 'profile'),
+    Scenario('patient list', 'patient-list-create'),
+    Scenario('patient detail', 'patient-detail', kwargs=lambda s, i: {'pk': _rotate('patient_ids')(s, i)}),
+    Scenario('patient export', 'patient-export'),
+    Scenario('patient create', 'patient-list-create', 'POST', body=_patient_row, writes=True,
+             record=_remember('new_patient_ids', lambda data: [data['patient']['id']])),
+    Scenario('patient bulk create', 'patient-bulk-create', 'POST', body=_bulk(_patient_row, BULK_SIZE), writes=True,
+             record=_remember('new_bulk_patient_ids', lambda data: data['created'])),
+    Scenario('doctor list', 'doctor-list-create'),
+    Scenario('doctor search', 'doctor-list-create', query='?search=cardio'),
+    # 2024-05-06 is a Monday; walk through the week and the working day
+    Scenario('doctor availability', 'doctor-list-create',
+             query=lambda s, i: f'?available_at=2024-05-{6 + i % 7:02d}T{8 + i % 12:02d}:30&specialization=cardio'),
+    Scenario('doctor detail', 'doctor-detail', kwargs=lambda s, i: {'pk': _rotate('doctor_ids')(s, i)}),
+    Scenario('doctor cache stats', 'doctor-cache-stats'),
+    Scenario('doctor create', 'doctor-list-create', 'POST', body=_doctor_row, writes=True),
+    Scenario('doctor bulk create', 'doctor-bulk-create', 'POST', body=_bulk(_doctor_row, BULK_SIZE), writes=True),
+    Scenario('mapping list', 'mapping-list-create'),
+    Scenario('mapping list by status', 'mapping-list-create', query='?status=active'),
+    Scenario('mapping detail', 'mapping-detail', kwargs=lambda s, i: {'pk': _rotate('mapping_ids')(s, i)}),
+    Scenario('patient doctors', 'patient-doctors', kwargs=lambda s, i: {'patient_id': _rotate('patient_ids')(s, i)}),
+    Scenario('doctor patients', 'doctor-patients', kwargs=lambda s, i: {'doctor_id': _rotate('doctor_ids')(s, i)}),
+    Scenario('doctor free gaps', 'doctor-free-gaps', kwargs=lambda s, i: {'doctor_id': _rotate('doctor_ids')(s, i)}),
+    Scenario('mapping export', 'mapping-export'),
+    Scenario('mapping create', 'mapping-list-create', 'POST', body=_pair('new_patient_ids', 0), writes=True),
+    Scenario('mapping bulk create', 'mapping-bulk-create', 'POST',
+             body=_bulk_pairs('new_bulk_patient_ids', BULK_SIZE), writes=True),
+    Scenario('dashboard', 'dashboard'),
+    Scenario('dashboard live', 'dashboard', query='?source=live'),
+    Scenario('db health', 'db-health'),
+    Scenario('metrics', 'metrics'),
+]
+
+
+def url_names(patterns=None, namespace=None):
+    """
+    Yield the name of every URL pattern reachable from the root URLconf
+    """
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in EXCLUDED_NAMESPACES:
+                continue
+            yield from url_names(pattern.url_patterns, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+class ClientTransport:
+    """
+    Sends requests through the Django test client, in this process
+    """
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method, path, body, token):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        if body is None:
+            response = self.client.generic(method, path, **headers)
+        else:
+            response = self.client.generic(method, path, json.dumps(body), 'application/json', **headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, response.get('Server-Timing', ''), content
+
+
+class HTTPTransport:
+    """
+    Sends requests to a running server over one keep-alive connection
+    """
+    def __init__(self, base_url):
+        url = urlsplit(base_url)
+        if url.scheme != 'http':
+            raise CommandError('Only plain http:// servers are supported')
+        self.connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+
+    def request(self, method, path, body, token):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        self.connection.request(method, path, payload, headers)
+        response = self.connection.getresponse()
+        return response.status, response.getheader('Server-Timing', ''), response.read()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API URL and report throughput, p50/p99 latency and query counts as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server (default: in-process test client)')
+        parser.add_argument('--email', help='Benchmark user (default: first user of generate_dataset --seed 1)')
+        parser.add_argument('--password', default='benchmark-pass')
+        parser.add_argument('--iterations', type=int, default=100, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per scenario')
+        parser.add_argument('--read-only', action='store_true', help='Skip scenarios that create rows')
+        parser.add_argument('--only', action='append', help='Run only the named scenario (repeatable)')
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        email = options['email'] or user_email('s1', 0)
+        in_process = not options['url']
+        transport = ClientTransport() if in_process else HTTPTransport(options['url'])
+
+        scenarios = [s for s in SCENARIOS if not (options['read_only'] and s.writes)]
+        if options['only']:
+            scenarios = [s for s in scenarios if s.name in options['only']]
+        uncovered = sorted(set(url_names()) - {s.url_name for s in SCENARIOS})
+        for name in uncovered:
+            self.stderr.write(f'No benchmark scenario for URL {name!r}')
+
+        results = []
+        # Every request comes from one address and one user; start a server
+        # under test with the THROTTLE_* settings empty
+        limits = throttling_disabled() if in_process else nullcontext()
+        try:
+            # In-process writes are rolled back so runs stay comparable
+            with transaction.atomic() if in_process else nullcontext(), limits:
+                state = self.login(transport, email, options['password'])
+                for scenario in scenarios:
+                    results.append(self.run_scenario(
+                        transport, scenario, state, options['iterations'], options['warmup'],
+                    ))
+                if in_process:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        report = {
+            'transport': 'test-client' if in_process else options['url'],
+            'iterations': options['iterations'],
+            'dataset': {
+                'patients': Patient.objects.count(),
+                'doctors': Doctor.objects.count(),
+                'mappings': PatientDoctorMapping.objects.count(),
+            },
+            'uncovered_urls': uncovered,
+            'scenarios': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+    def login(self, transport, email, password):
+        status, _, content = transport.request('POST', reverse('login'), {'email': email, 'password': password}, None)
+        if status != 200:
+            raise CommandError(f'Could not log in as {email} ({status}); run generate_dataset first')
+        tokens = json.loads(content)['tokens']
+        state = {
+            'email': email,
+            'password': password,
+            'access': tokens['access'],
+            'refresh': tokens['refresh'],
+            'run': uuid.uuid4().hex[:8],
+            'new_patient_ids': [],
+            'new_bulk_patient_ids': [],
+        }
+
+        # Rows owned by the benchmark user for the detail endpoints
+        for key, path, results_key in [
+            ('patient_ids', reverse('patient-list-create'), 'patients'),
+            ('doctor_ids', reverse('doctor-list-create'), 'doctors'),
+            ('mapping_ids', reverse('mapping-list-create'), 'mappings'),
+        ]:
+            status, _, content = transport.request('GET', f'{path}?page_size=100', None, state['access'])
+            state[key] = [row['id'] for row in json.loads(content)[results_key]] if status == 200 else []
+            if not state[key]:
+                raise CommandError(f'{email} has no {results_key}; run generate_dataset first')
+        return state
+
+    def run_scenario(self, transport, scenario, state, iterations, warmup):
+        if scenario.max_iterations is not None:
+            iterations = min(iterations, scenario.max_iterations)
+            warmup = min(warmup, 1)
+
+        latencies = []
+        queries = []
+        statuses = {}
+        elapsed = 0.0
+        for iteration in range(warmup + iterations):
+            try:
+                path, body = scenario.request(state, iteration)
+            except IndexError:
+                # A write scenario ran out of rows created by an earlier one
+                break
+            start = time.perf_counter()
+            status, server_timing, content = transport.request(scenario.method, path, body, state['access'])
+            duration = time.perf_counter() - start
+
+            if scenario.record is not None and status < 300:
+                scenario.record(state, json.loads(content))
+            if iteration < warmup:
+                continue
+            elapsed += duration
+            latencies.append(duration * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            match = SERVER_TIMING_QUERIES.search(server_timing)
+            if match:
+                queries.append(int(match.group(1)))
+
+        result = {
+            'name': scenario.name,
+            'method': scenario.method,
+            'url_name': scenario.url_name,
+            'statuses': statuses,
+            'errors': sum(count for status, count in statuses.items() if status >= 400),
+            'queries_p50': sorted(queries)[len(queries) // 2] if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+        result.update(latency_summary(latencies, elapsed))
+        return result
+
@@ -0,0 +1,88 @@
+import copy
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import ConnectionHandler
+
+from healthcare_project.db.pool import get_pool
+
+MODES = ('direct', 'persistent', 'pooled')
+
+
+class Command(BaseCommand):
+    help = 'Compare requests/sec for direct, persistent and pooled PostgreSQL connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Simulated requests per mode')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--mode', action='append', dest='modes', choices=MODES)
+
+    def handle(self, *args, **options):
+        base = settings.DATABASES['default']
+        if 'postgresql' not in base['ENGINE']:
+            raise CommandError('This benchmark needs the PostgreSQL backend')
+
+        results = []
+        for mode in options['modes'] or MODES:
+            results.append(self.run_mode(mode, base, options['requests'], options['threads']))
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def settings_for(self, mode, base, threads):
+        database = copy.deepcopy(base)
+        database.update({'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False})
+        database.pop('POOL', None)
+        if mode == 'persistent':
+            database.update({'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True})
+        elif mode == 'pooled':
+            database.update({
+                'ENGINE': 'healthcare_project.db.pooled_postgresql',
+                'POOL': dict(base.get('POOL', {}), size=max(1, threads)),
+            })
+        return database
+
+    def run_mode(self, mode, base, total, threads):
+        """
+        Replay the request_started / request_finished connection cycle
+        """
+        alias = f'benchmark_{mode}'
+        handler = ConnectionHandler({alias: self.settings_for(mode, base, threads)})
+        per_thread = [total // threads + (1 if i < total % threads else 0) for i in range(threads)]
+        errors = []
+
+        def worker(count):
+            connection = handler[alias]
+            try:
+                for _ in range(count):
+                    connection.close_if_unusable_or_obsolete()
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                    connection.close_if_unusable_or_obsolete()
+            except Exception as exc:
+                errors.append(repr(exc))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(count,)) for count in per_thread if count]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        result = {
+            'mode': mode,
+            'threads': threads,
+            'requests': total,
+            'errors': errors[:5],
+            'requests_per_sec': round(total / elapsed, 2),
+        }
+        if mode == 'pooled':
+            pool = get_pool(alias, {})
+            result['pool'] = pool.stats()
+            pool.close_all()
+        return result
@@ -0,0 +1,187 @@
+import datetime
+import json
+import re
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from analytics.models import DashboardStat
+from authentication.tokens import UserClaimsRefreshToken
+from doctors.models import Doctor, DoctorAvailability
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+
+User = get_user_model()
+
+APP_TABLES = {
+    Patient._meta.db_table,
+    Doctor._meta.db_table,
+    DoctorAvailability._meta.db_table,
+    PatientDoctorMapping._meta.db_table,
+    User._meta.db_table,
+    DashboardStat._meta.db_table,
+}
+
+# (label, url, follow the `next` cursor, PostgreSQL only)
+# Substring filters only have an index (pg_trgm) on PostgreSQL
+ENDPOINTS = [
+    ('profile', '/api/auth/profile/', False, False),
+    ('patient list', '/api/patients/?page_size=1', True, False),
+    ('patient detail', '/api/patients/{patient}/', False, False),
+    ('patient export', '/api/patients/export/', False, False),
+    ('doctor list', '/api/doctors/?page_size=1', True, False),
+    ('doctor specialization', '/api/doctors/?specialization=cardio', False, True),
+    ('doctor search', '/api/doctors/?search=cardio', False, True),
+    ('doctor availability', '/api/doctors/?available_at=2024-05-06T10:30&page_size=1', True, False),
+    ('doctor detail', '/api/doctors/{doctor}/', False, False),
+    ('mapping list', '/api/mappings/?page_size=1', True, False),
+    ('mapping list by status', '/api/mappings/?status=active&page_size=1', True, False),
+    ('mapping detail', '/api/mappings/{mapping}/', False, False),
+    ('patient doctors', '/api/mappings/patient/{patient}/', False, False),
+    ('doctor patients', '/api/mappings/doctor/{doctor}/', False, False),
+    ('doctor free gaps', '/api/mappings/doctor/{doctor}/free-gaps/?date=2024-05-06', False, False),
+    ('mapping export', '/api/mappings/export/', False, False),
+    ('dashboard', '/api/analytics/dashboard/', False, False),
+    ('dashboard live', '/api/analytics/dashboard/?source=live', False, False),
+]
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every query issued by the API read endpoints and fail on full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the plans as JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError('Query plans can be checked on PostgreSQL or SQLite')
+
+        results = []
+        # Fixture rows live in a transaction that is always rolled back, and
+        # the dummy cache makes every request reach the database
+        with override_settings(
+            ALLOWED_HOSTS=['*'],
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+        ):
+            try:
+                with transaction.atomic():
+                    if connection.vendor == 'postgresql':
+                        # Tiny fixture tables are cheapest to scan; with seq
+                        # scans priced out a Seq Scan means no usable index
+                        with connection.cursor() as cursor:
+                            cursor.execute('SET LOCAL enable_seqscan = off')
+                    client, ids = self.create_fixtures()
+                    for label, url, follow_next, postgresql_only in ENDPOINTS:
+                        if postgresql_only and connection.vendor != 'postgresql':
+                            continue
+                        results.extend(self.check_endpoint(client, label, url.format(**ids), follow_next))
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        failures = [result for result in results if result['full_scans']]
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for result in results:
+                style = self.style.ERROR if result['full_scans'] else self.style.SUCCESS
+                scans = ', '.join(result['full_scans']) or 'index only'
+                self.stdout.write(style(f"{result['endpoint']}: {scans}"))
+                if result['full_scans']:
+                    self.stdout.write(f"  {result['sql']}")
+
+        if failures:
+            raise CommandError(f'{len(failures)} queries scan a whole table')
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} queries checked, all served by indexes'))
+
+    def create_fixtures(self):
+        user = User.objects.create_user(
+            username='query-plan-check', email='query-plan-check@example.com', password=None,
+        )
+        patients = [
+            Patient.objects.create(
+                first_name=f'Plan{i}', last_name='Check', email=f'plan-check-{i}@example.com',
+                phone_number='+911234567890', date_of_birth=datetime.date(1990, 1, 1),
+                gender='O', blood_group='O+', address_line_1='-', city='-', state='-',
+                postal_code='-', emergency_contact_name='-', emergency_contact_phone='+911234567890',
+                created_by=user,
+            )
+            for i in range(2)
+        ]
+        doctors = [
+            Doctor.objects.create(
+                first_name=f'Plan{i}', last_name='Check', email=f'plan-check-doctor-{i}@example.com',
+                phone_number='+911234567890', gender='O', license_number=f'PLAN-CHECK-{i}',
+                specialization='Cardiology', qualification='-', years_of_experience=1,
+                hospital_name='-', hospital_address='-', consultation_fee=Decimal('1.00'),
+                available_days='Mon-Fri', available_hours='9:00 AM - 5:00 PM',
+                languages_spoken='English', created_by=user,
+            )
+            for i in range(2)
+        ]
+        mappings = [
+            PatientDoctorMapping.objects.create(patient=patient, doctor=doctor, assigned_by=user)
+            for patient in patients for doctor in doctors
+        ]
+
+        token = UserClaimsRefreshToken.for_user(user).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client, {'patient': patients[0].pk, 'doctor': doctors[0].pk, 'mapping': mappings[0].pk}
+
+    def check_endpoint(self, client, label, url, follow_next):
+        urls = [(label, url)]
+        results = []
+        while urls:
+            endpoint, url = urls.pop()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            if response.status_code != 200:
+                raise CommandError(f'{endpoint}: GET {url} returned {response.status_code}')
+            if follow_next and not response.streaming and response.json().get('next'):
+                urls.append((f'{label} (next page)', response.json()['next']))
+                follow_next = False
+
+            for query in queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                results.append({'endpoint': endpoint, 'sql': sql, 'full_scans': self.full_scans(sql)})
+        return results
+
+    def full_scans(self, sql):
+        """
+        Return the application tables the plan for ``sql`` reads in full
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return sorted(set(self._pg_seq_scans(plan[0]['Plan'])))
+
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            tables = []
+            for row in cursor.fetchall():
+                match = SQLITE_FULL_SCAN.match(row[-1])
+                if match and match.group(1) in APP_TABLES:
+                    tables.append(match.group(1))
+            return sorted(set(tables))
+
+    def _pg_seq_scans(self, node):
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in APP_TABLES:
+            yield node['Relation Name']
+        for child in node.get('Plans', ()):
+            yield from self._pg_seq_scans(child)
@@ -0,0 +1,258 @@
+import datetime
+import random
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.stats import rebuild as rebuild_dashboard_stats
+from doctors.cache import invalidate_lists
+from doctors.models import Doctor, DoctorAvailability
+from mappings.models import PatientDoctorMapping
+from mappings.schedule import appointment_end
+from patients.models import Patient
+from sharding.replication import replicate
+from sharding.shards import assign_new_owners, shard_for_owner
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Nikhil', 'Priya', 'Rahul',
+    'Riya', 'Rohan', 'Saanvi', 'Sameer', 'Sneha', 'Tanvi', 'Varun', 'Vikram', 'Yash', 'Zara',
+]
+LAST_NAMES = [
+    'Agarwal', 'Bose', 'Chopra', 'Das', 'Gupta', 'Iyer', 'Joshi', 'Kapoor', 'Khan', 'Mehta',
+    'Menon', 'Nair', 'Patel', 'Rao', 'Reddy', 'Sharma', 'Singh', 'Verma',
+]
+CITIES = [
+    ('Mumbai', 'Maharashtra'), ('Pune', 'Maharashtra'), ('Delhi', 'Delhi'), ('Bengaluru', 'Karnataka'),
+    ('Chennai', 'Tamil Nadu'), ('Hyderabad', 'Telangana'), ('Kolkata', 'West Bengal'), ('Jaipur', 'Rajasthan'),
+]
+SPECIALIZATIONS = [
+    'Cardiology', 'Dermatology', 'Endocrinology', 'Gastroenterology', 'General Medicine', 'Neurology',
+    'Oncology', 'Orthopedics', 'Pediatrics', 'Psychiatry', 'Pulmonology', 'Radiology',
+]
+HOSPITALS = ['Apollo Hospital', 'City Care Clinic', 'Fortis Hospital', 'Lifeline Medical Centre', 'Sunrise Hospital']
+LANGUAGES = ['English', 'Hindi', 'Marathi', 'Tamil', 'Telugu', 'Bengali', 'Kannada']
+AVAILABILITY = [
+    ('Mon-Fri', '9:00 AM - 5:00 PM'), ('Mon-Sat', '10:00 AM - 6:00 PM'),
+    ('Weekdays', '8:00 AM - 2:00 PM'), ('Tue, Thu, Sat', '4:00 PM - 9:00 PM'),
+    ('Mon, Wed, Fri', '9:00 AM - 1:00 PM, 5:00 PM - 8:00 PM'), ('Fri-Sun', '8:00 PM - 2:00 AM'),
+    ('Daily', '24 hours'),
+]
+BLOOD_GROUPS = [value for value, _ in Patient.BLOOD_GROUP_CHOICES]
+GENDERS = ['M', 'F', 'O']
+# Mostly active assignments, as in a live practice
+STATUSES = ['ACTIVE'] * 7 + ['COMPLETED'] * 2 + ['INACTIVE']
+PRIORITIES = ['LOW', 'MEDIUM', 'MEDIUM', 'HIGH', 'URGENT']
+APPOINTMENT_MINUTES = 30
+
+EMAIL_DOMAIN = 'example.test'
+
+
+def user_email(tag, number):
+    return f'bench-{tag}-{number}@{EMAIL_DOMAIN}'
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic dataset of users, patients, doctors and mappings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=1000)
+        parser.add_argument('--doctors', type=int, help='Default: one per 20 patients, at least 10')
+        parser.add_argument('--users', type=int, help='Default: one per 1000 patients, at least 1')
+        parser.add_argument('--mappings-per-patient', type=float, default=2.0, help='Average doctors per patient')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--tag', help='Marks the generated emails and licences (default s<seed>)')
+        parser.add_argument('--password', default='benchmark-pass', help='Password of every generated user')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true', help='Delete a previous dataset with the same tag first')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.tag = options['tag'] or f"s{options['seed']}"
+        self.batch_size = options['batch_size']
+        patients = options['patients']
+        doctors = options['doctors'] if options['doctors'] is not None else max(10, patients // 20)
+        users = options['users'] if options['users'] is not None else max(1, patients // 1000)
+        if min(patients, doctors, users) < 1:
+            raise CommandError('--patients, --doctors and --users must be positive')
+
+        existing = User.objects.filter(email__startswith=f'bench-{self.tag}-', email__endswith=f'@{EMAIL_DOMAIN}')
+        if existing.exists():
+            if not options['flush']:
+                raise CommandError(f'A dataset tagged {self.tag!r} exists; pass --flush or another --seed/--tag')
+            # Patients, doctors and mappings cascade from their users
+            existing.delete()
+
+        started = time.perf_counter()
+        usernames = self.create_users(users, options['password'])
+        doctor_names = self.create_doctors(doctors, list(usernames))
+        mapping_count = self.create_patients_and_mappings(
+            patients, usernames, doctor_names, options['mappings_per_patient'],
+        )
+        invalidate_lists()
+        # bulk_create bypasses the dashboard counters' signals
+        rebuild_dashboard_stats(list(usernames))
+
+        elapsed = time.perf_counter() - started
+        total = users + doctors + patients + mapping_count
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {users} users, {doctors} doctors, {patients} patients and {mapping_count} mappings '
+            f'({total} rows) in {elapsed:.1f}s'
+        ))
+        self.stdout.write(f"Log in as {user_email(self.tag, 0)} / {options['password']}")
+
+    def progress(self, label, done, total):
+        self.stdout.write(f'  {label}: {done}/{total}')
+
+    def create_users(self, count, password):
+        # Hash once; every synthetic user shares the password
+        password_hash = make_password(password)
+        usernames = {}
+        for start in range(0, count, self.batch_size):
+            users = [
+                User(
+                    username=f'bench-{self.tag}-{number}',
+                    email=user_email(self.tag, number),
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    password=password_hash,
+                )
+                for number in range(start, min(count, start + self.batch_size))
+            ]
+            with transaction.atomic():
+                users = User.objects.bulk_create(users)
+                usernames.update((user.pk, user.username) for user in users)
+            # bulk_create sends no post_save, which normally spreads users over the shards
+            replicate(User, users)
+            assign_new_owners([user.pk for user in users])
+        self.progress('users', len(usernames), count)
+        return usernames
+
+    def create_doctors(self, count, user_ids):
+        """
+        Return {doctor id: (full name, specialization)} for the mappings
+        """
+        names = {}
+        for start in range(0, count, self.batch_size):
+            doctors = [self.build_doctor(number, user_ids) for number in range(start, min(count, start + self.batch_size))]
+            with transaction.atomic():
+                doctors = Doctor.objects.bulk_create(doctors)
+                # bulk_create sends no post_save, which normally parses the slots
+                DoctorAvailability.sync(doctors, replace=False, batch_size=self.batch_size)
+                replicate(Doctor, doctors)
+                names.update((doctor.pk, (doctor.full_name, doctor.specialization)) for doctor in doctors)
+            self.progress('doctors', len(names), count)
+        return names
+
+    def build_doctor(self, number, user_ids):
+        rng = self.rng
+        days, hours = rng.choice(AVAILABILITY)
+        doctor = Doctor(
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            email=f'doctor-{self.tag}-{number}@{EMAIL_DOMAIN}',
+            phone_number=f'+9{rng.randrange(10 ** 9, 10 ** 10)}',
+            gender=rng.choice(GENDERS),
+            license_number=f'BENCH-{self.tag}-{number}',
+            specialization=rng.choice(SPECIALIZATIONS),
+            qualification='MBBS, MD',
+            years_of_experience=rng.randrange(1, 40),
+            hospital_name=rng.choice(HOSPITALS),
+            hospital_address=f'{rng.randrange(1, 500)} Hospital Road, {rng.choice(CITIES)[0]}',
+            consultation_fee=Decimal(rng.randrange(300, 3000, 50)),
+            available_days=days,
+            available_hours=hours,
+            languages_spoken=', '.join(rng.sample(LANGUAGES, rng.randrange(1, 4))),
+            is_active=rng.random() < 0.95,
+            created_by_id=rng.choice(user_ids),
+        )
+        # bulk_create skips save(), which normally builds the search document
+        doctor.search_document = doctor.build_search_document()
+        return doctor
+
+    def build_patient(self, number, user_id):
+        rng = self.rng
+        city, state = rng.choice(CITIES)
+        return Patient(
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            email=f'patient-{self.tag}-{number}@{EMAIL_DOMAIN}',
+            phone_number=f'+9{rng.randrange(10 ** 9, 10 ** 10)}',
+            date_of_birth=datetime.date(1940, 1, 1) + datetime.timedelta(days=rng.randrange(80 * 365)),
+            gender=rng.choice(GENDERS),
+            blood_group=rng.choice(BLOOD_GROUPS),
+            address_line_1=f'{rng.randrange(1, 999)} {rng.choice(LAST_NAMES)} Nagar',
+            city=city,
+            state=state,
+            postal_code=str(rng.randrange(100000, 999999)),
+            emergency_contact_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            emergency_contact_phone=f'+9{rng.randrange(10 ** 9, 10 ** 10)}',
+            created_by_id=user_id,
+        )
+
+    def create_patients_and_mappings(self, count, usernames, doctor_names, per_patient):
+        """
+        Insert patients chunk by chunk, each chunk with its mappings, so
+        memory stays flat at any scale
+        """
+        rng = self.rng
+        user_ids = list(usernames)
+        doctor_ids = list(doctor_names)
+        whole, fraction = int(per_patient), per_patient - int(per_patient)
+        now = timezone.now()
+        # Each doctor's ACTIVE appointments sit on their own ascending
+        # half-hour slots, so none overlap
+        next_slot = {}
+        mapping_count = 0
+        for start in range(0, count, self.batch_size):
+            numbers = range(start, min(count, start + self.batch_size))
+            patients = [self.build_patient(number, user_ids[number % len(user_ids)]) for number in numbers]
+            # Mappings are drawn in patient order, whatever the shard layout
+            by_shard = defaultdict(list)
+            for patient in patients:
+                mappings = []
+                wanted = min(len(doctor_ids), whole + (rng.random() < fraction))
+                for doctor_id in rng.sample(doctor_ids, wanted):
+                    status = rng.choice(STATUSES)
+                    doctor_name, specialization = doctor_names[doctor_id]
+                    next_appointment = None
+                    if status == 'ACTIVE' and rng.random() < 0.6:
+                        slot = next_slot.get(doctor_id, rng.randrange(1, 48))
+                        next_slot[doctor_id] = slot + rng.randrange(1, 4)
+                        next_appointment = now + datetime.timedelta(minutes=APPOINTMENT_MINUTES * slot)
+                    mappings.append(PatientDoctorMapping(
+                        doctor_id=doctor_id,
+                        assigned_by_id=patient.created_by_id,
+                        patient_name=patient.full_name,
+                        doctor_name=doctor_name,
+                        doctor_specialization=specialization,
+                        assigned_by_username=usernames[patient.created_by_id],
+                        status=status,
+                        priority=rng.choice(PRIORITIES),
+                        next_appointment=next_appointment,
+                        appointment_duration=APPOINTMENT_MINUTES,
+                        appointment_end=appointment_end(next_appointment, APPOINTMENT_MINUTES),
+                    ))
+                by_shard[shard_for_owner(patient.created_by_id)].append((patient, mappings))
+
+            mappings = []
+            for alias, rows in by_shard.items():
+                with transaction.atomic(using=alias):
+                    Patient.objects.using(alias).bulk_create([patient for patient, _ in rows])
+                    shard_mappings = []
+                    for patient, patient_mappings in rows:
+                        for mapping in patient_mappings:
+                            mapping.patient_id = patient.pk
+                        shard_mappings.extend(patient_mappings)
+                    PatientDoctorMapping.objects.using(alias).bulk_create(shard_mappings, batch_size=self.batch_size)
+                mappings.extend(shard_mappings)
+            mapping_count += len(mappings)
+            self.progress('patients', numbers.stop, count)
+        return mapping_count
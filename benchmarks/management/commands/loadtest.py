@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.stats import latency_summary
+
+DEFAULT_PATHS = ['/api/doctors/', '/api/auth/profile/']
+
+
+class HTTPConnection:
+    """
+    Minimal keep-alive HTTP/1.1 client on asyncio streams
+    """
+    def __init__(self, host, port, token):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.reader = self.writer = None
+
+    async def request(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write((
+            f'GET {path} HTTP/1.1\r\n'
+            f'Host: {self.host}:{self.port}\r\n'
+            f'Authorization: Bearer {self.token}\r\n'
+            'Connection: keep-alive\r\n\r\n'
+        ).encode('latin-1'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed by server')
+        status = int(status_line.split()[1])
+        length, keep_alive = None, True
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection' and value.lower() == 'close':
+                keep_alive = False
+
+        if length is None:
+            await self.reader.read()
+            keep_alive = False
+        else:
+            await self.reader.readexactly(length)
+        if not keep_alive:
+            await self.close()
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+class Command(BaseCommand):
+    help = 'Drive read endpoints of a running server with many concurrent keep-alive connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server')
+        parser.add_argument('--token', required=True, help='JWT access token')
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+        parser.add_argument('--think-ms', type=float, default=0.0, help='Client pause between requests')
+        parser.add_argument('--path', action='append', dest='paths', help=f'Path to request (default {DEFAULT_PATHS})')
+        parser.add_argument('--label', default='', help='Label stored in the JSON result, e.g. wsgi or asgi')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only plain http:// servers are supported')
+        result = asyncio.run(self.run(
+            url.hostname, url.port or 80, options['token'], options['paths'] or DEFAULT_PATHS,
+            options['connections'], options['duration'], options['think_ms'] / 1000,
+        ))
+        result['label'] = options['label']
+        self.stdout.write(json.dumps(result, indent=2))
+
+    async def run(self, host, port, token, paths, connections, duration, think):
+        latencies = []
+        statuses = {}
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def client(number):
+            nonlocal errors
+            connection = HTTPConnection(host, port, token)
+            request_number = number
+            try:
+                while time.perf_counter() < deadline:
+                    path = paths[request_number % len(paths)]
+                    request_number += 1
+                    start = time.perf_counter()
+                    try:
+                        status = await connection.request(path)
+                    except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                        errors += 1
+                        await connection.close()
+                        continue
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    statuses[status] = statuses.get(status, 0) + 1
+                    if think:
+                        await asyncio.sleep(think)
+            finally:
+                await connection.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(number) for number in range(connections)))
+        elapsed = time.perf_counter() - started
+
+        result = {
+            'connections': connections,
+            'paths': paths,
+            'errors': errors,
+            'statuses': statuses,
+        }
+        result.update(latency_summary(latencies, elapsed))
+        return result
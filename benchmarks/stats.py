@@ -0,0 +1,24 @@
+import statistics
+
+
+def percentile(ordered, pct):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 2)
+
+
+def latency_summary(latencies, elapsed):
+    """
+    Return throughput and mean/p50/p99 latency for millisecond samples
+    """
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(statistics.fmean(ordered), 2) if ordered else None,
+        'p50_ms': percentile(ordered, 50),
+        'p99_ms': percentile(ordered, 99),
+    }
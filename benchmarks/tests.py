@@ -0,0 +1,115 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from analytics.stats import live_dashboard, materialized_dashboard
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+from .management.commands.benchmark_api import SCENARIOS
+from .management.commands.check_query_plans import Command as CheckQueryPlans
+from .management.commands.generate_dataset import user_email
+from .stats import latency_summary, percentile
+
+User = get_user_model()
+
+
+class CheckQueryPlansTests(TestCase):
+    def test_every_read_endpoint_is_served_by_indexes(self):
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertRegex(out.getvalue(), r'[1-9][0-9]+ queries checked, all served by indexes')
+
+    def test_full_scans_are_reported(self):
+        command = CheckQueryPlans()
+        self.assertEqual(command.full_scans('SELECT * FROM "patients_patient"'), ['patients_patient'])
+        self.assertEqual(command.full_scans('SELECT * FROM "patients_patient" WHERE "id" = 1'), [])
+        # Tables outside the app, such as sessions, are not checked
+        self.assertEqual(command.full_scans('SELECT * FROM "django_session"'), [])
+
+
+class GenerateDatasetTests(TestCase):
+    def generate(self, *args):
+        call_command('generate_dataset', '--patients', '40', '--doctors', '10', '--users', '2', *args, stdout=StringIO())
+
+    def dataset(self):
+        return (
+            list(Patient.objects.order_by('email').values_list('email', 'first_name', 'blood_group', 'city')),
+            list(Doctor.objects.order_by('email').values_list('email', 'last_name', 'specialization')),
+            sorted(PatientDoctorMapping.objects.values_list('patient__email', 'doctor__email', 'status', 'priority')),
+        )
+
+    def test_counts_and_dashboards(self):
+        self.generate('--mappings-per-patient', '2')
+        self.assertEqual(User.objects.filter(email__startswith='bench-s1-').count(), 2)
+        self.assertEqual(Doctor.objects.count(), 10)
+        self.assertEqual(Patient.objects.count(), 40)
+        self.assertEqual(PatientDoctorMapping.objects.count(), 80)
+        # bulk_create skips the signals, so the counters are rebuilt afterwards
+        for user in User.objects.all():
+            self.assertEqual(materialized_dashboard(user.pk), live_dashboard(user.pk))
+
+    def test_same_seed_generates_the_same_rows(self):
+        self.generate('--seed', '3')
+        first = self.dataset()
+        self.generate('--seed', '3', '--flush')
+        self.assertEqual(self.dataset(), first)
+
+    def test_existing_dataset_needs_flush(self):
+        self.generate()
+        with self.assertRaisesMessage(CommandError, '--flush'):
+            self.generate()
+
+
+class BenchmarkApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        call_command('generate_dataset', '--patients', '30', '--doctors', '10', stdout=StringIO())
+
+    def benchmark(self, *args):
+        out = StringIO()
+        call_command('benchmark_api', '--iterations', '2', '--warmup', '0', *args, stdout=out, stderr=StringIO())
+        return json.loads(out.getvalue())
+
+    def test_every_url_has_a_scenario(self):
+        report = self.benchmark()
+        self.assertEqual(report['uncovered_urls'], [])
+        self.assertEqual(report['dataset'], {'patients': 30, 'doctors': 10, 'mappings': 60})
+        for scenario in report['scenarios']:
+            self.assertEqual(scenario['errors'], 0, scenario)
+            self.assertGreater(scenario['requests'], 0, scenario['name'])
+            self.assertIsNotNone(scenario['queries_max'], scenario['name'])
+
+    def test_writes_are_rolled_back(self):
+        self.benchmark()
+        self.assertEqual(Patient.objects.count(), 30)
+        self.assertEqual(User.objects.filter(email=user_email('s1', 0)).count(), 1)
+
+    def test_read_only_and_only_select_scenarios(self):
+        names = [scenario['name'] for scenario in self.benchmark('--read-only')['scenarios']]
+        self.assertEqual(names, [scenario.name for scenario in SCENARIOS if not scenario.writes])
+        report = self.benchmark('--only', 'doctor list', '--only', 'metrics')
+        self.assertEqual([scenario['name'] for scenario in report['scenarios']], ['doctor list', 'metrics'])
+
+    def test_missing_dataset_is_reported(self):
+        with self.assertRaisesMessage(CommandError, 'generate_dataset'):
+            call_command('benchmark_api', '--email', 'nobody@example.test', stdout=StringIO())
+
+
+class LatencyStatsTests(SimpleTestCase):
+    def test_percentile_is_nearest_rank(self):
+        ordered = list(range(1, 101))
+        self.assertEqual(percentile(ordered, 50), 51)
+        self.assertEqual(percentile(ordered, 99), 100)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_latency_summary(self):
+        self.assertEqual(latency_summary([30.0, 10.0, 20.0], 0.5), {
+            'requests': 3, 'throughput_rps': 6.0, 'mean_ms': 20.0, 'p50_ms': 20.0, 'p99_ms': 30.0,
+        })
+        self.assertEqual(latency_summary([], 0)['throughput_rps'], None)
@@ -1,5 +1,18 @@
 from django.contrib import admin
-from .models import Doctor
+from .models import Doctor, DoctorAvailability
+
+
+class DoctorAvailabilityInline(admin.TabularInline):
+    """
+    Slots parsed from the availability strings; edit the strings instead
+    """
+    model = DoctorAvailability
+    fields = readonly_fields = ('weekday', 'start_minute', 'end_minute')
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Doctor)
@@ -9,6 +22,7 @@ class DoctorAdmin(admin.ModelAdmin):
     search_fields = ('first_name', 'last_name', 'email', 'license_number', 'specialization', 'hospital_name')
     readonly_fields = ('created_at', 'updated_at')
     list_editable = ('is_active',)
+    inlines = [DoctorAvailabilityInline]
     
     fieldsets = (
         ('Personal Information', {
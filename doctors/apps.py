@@ -3,4 +3,15 @@ from django.apps import AppConfig
 
 class DoctorsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'doctors'
\ No newline at end of file
+    name = 'doctors'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from healthcare_project.metrics import register_collector
+        from .cache import get_stats
+
+        for event in ('hits', 'misses', 'invalidations'):
+            register_collector(
+                f'doctor_cache_{event}_total', 'counter', f'Doctor cache {event}.',
+                lambda event=event: get_stats()[event],
+            )
@@ -0,0 +1,52 @@
+from django.http import Http404
+from healthcare_project.async_api import api_response, async_read_view
+from healthcare_project.conditional import add_validators, alist_state, list_validators, not_modified
+from . import cache as doctor_cache
+from . import views
+from .serializers import DoctorListSerializer
+
+
+@async_read_view(views.doctor_list_create)
+async def doctor_list_create(request):
+    """
+    GET: List all doctors without blocking the event loop
+    POST: Handled by views.doctor_list_create
+    """
+    async def build_state():
+        return await alist_state(views.doctor_list_queryset(request)[0], views.DOCTOR_TIMESTAMPS)
+
+    state = await doctor_cache.aget_list_state(request, build_state)
+    validators = list_validators(request, state)
+    not_modified_response = not_modified(request, validators)
+    if not_modified_response is not None:
+        return not_modified_response
+
+    async def build():
+        doctors, searched = views.doctor_list_queryset(request)
+        paginator = views.list_paginator(searched, state[0])
+        page = await paginator.apaginate_queryset(doctors, request)
+        return await paginator.aget_paginated_data(DoctorListSerializer.list_data(page), 'doctors')
+
+    return add_validators(api_response(await doctor_cache.aget_list_payload(request, build)), validators)
+
+
+@async_read_view(views.doctor_detail)
+async def doctor_detail(request, pk):
+    """
+    GET: Retrieve doctor details without blocking the event loop
+    PUT/DELETE: Handled by views.doctor_detail
+    """
+    async def build():
+        doctor = await views.doctor_detail_queryset().filter(pk=pk).afirst()
+        if doctor is None:
+            raise Http404
+        return views.doctor_detail_entry(doctor)
+
+    entry = await doctor_cache.aget_detail_payload(pk, build)
+    validators = views.doctor_detail_validators(pk, entry)
+    not_modified_response = not_modified(request, validators)
+    if not_modified_response is not None:
+        return not_modified_response
+    return add_validators(api_response({
+        'doctor': entry['doctor']
+    }), validators)
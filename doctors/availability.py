@@ -0,0 +1,178 @@
+import re
+
+MINUTES_PER_DAY = 24 * 60
+
+DAY_NAMES = {
+    'mon': 0, 'monday': 0,
+    'tue': 1, 'tues': 1, 'tuesday': 1,
+    'wed': 2, 'weds': 2, 'wednesday': 2,
+    'thu': 3, 'thur': 3, 'thurs': 3, 'thursday': 3,
+    'fri': 4, 'friday': 4,
+    'sat': 5, 'saturday': 5,
+    'sun': 6, 'sunday': 6,
+}
+DAY_ALIASES = {
+    'weekdays': range(0, 5), 'weekday': range(0, 5), 'working days': range(0, 5),
+    'weekends': range(5, 7), 'weekend': range(5, 7),
+    'daily': range(7), 'everyday': range(7), 'every day': range(7), 'all days': range(7),
+    'all week': range(7), '7 days': range(7),
+}
+ALL_DAY_HOURS = {'24 hours', '24 hrs', '24/7', '24x7', 'all day', 'round the clock'}
+
+TIME = re.compile(r'^(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?$')
+
+
+class AvailabilityParseError(ValueError):
+    pass
+
+
+def _normalize(text):
+    text = text.lower().replace('–', '-').replace('—', '-').replace('.m.', 'm')
+    text = re.sub(r'\s+(?:to|till|until|through)\s+', '-', text)
+    text = re.sub(r'\s*(?:&|\band\b|;|/(?!7))\s*', ',', text)
+    return re.sub(r'\s+', ' ', text).strip(' ,')
+
+
+def _day(name, text):
+    try:
+        return DAY_NAMES[name.strip().rstrip('.')]
+    except KeyError:
+        raise AvailabilityParseError(f'Unknown day {name.strip()!r} in {text!r}')
+
+
+def parse_days(text):
+    """
+    Return the sorted weekdays (Monday is 0) described by ``text``
+
+    Understands day names and abbreviations, wrapping ranges ("Fri-Mon"),
+    lists ("Tue, Thu & Sat") and aliases such as "Weekdays" or "Daily".
+    """
+    days = set()
+    for part in _normalize(text or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if part in DAY_ALIASES:
+            days.update(DAY_ALIASES[part])
+        elif '-' in part:
+            first, _, last = part.partition('-')
+            day, last = _day(first, text), _day(last, text)
+            days.add(day)
+            while day != last:
+                day = (day + 1) % 7
+                days.add(day)
+        else:
+            days.add(_day(part, text))
+    if not days:
+        raise AvailabilityParseError(f'No days in {text!r}')
+    return sorted(days)
+
+
+def _time(value, text):
+    value = value.strip()
+    if value == 'noon':
+        return 12 * 60, 'pm'
+    if value == 'midnight':
+        return 0, 'am'
+    match = TIME.match(value)
+    if not match:
+        raise AvailabilityParseError(f'Unknown time {value!r} in {text!r}')
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if minute > 59 or hour > (12 if meridiem else 24) or (meridiem and hour == 0):
+        raise AvailabilityParseError(f'Invalid time {value!r} in {text!r}')
+    return hour * 60 + minute, meridiem
+
+
+def _apply_meridiem(minutes, meridiem):
+    hours, minute = divmod(minutes, 60)
+    hours %= 12
+    if meridiem == 'pm':
+        hours += 12
+    return hours * 60 + minute
+
+
+def _range(part, text):
+    start_text, separator, end_text = part.partition('-')
+    if not separator:
+        raise AvailabilityParseError(f'Missing "-" between start and end in {text!r}')
+    start, start_meridiem = _time(start_text, text)
+    end, end_meridiem = _time(end_text, text)
+
+    if end_meridiem:
+        end = _apply_meridiem(end, end_meridiem)
+        if start_meridiem:
+            start = _apply_meridiem(start, start_meridiem)
+        else:
+            # "10-11 AM" shares the meridiem, "9 - 5 PM" starts in the morning
+            start = _apply_meridiem(start, end_meridiem)
+            if start >= end and end_meridiem == 'pm':
+                start = _apply_meridiem(start, 'am')
+    elif start_meridiem:
+        start = _apply_meridiem(start, start_meridiem)
+    elif end < start <= 12 * 60:
+        # "9-5" without a meridiem means nine to five, not an overnight shift
+        end += 12 * 60
+
+    end = end % MINUTES_PER_DAY or MINUTES_PER_DAY
+    if start >= MINUTES_PER_DAY or start == end:
+        raise AvailabilityParseError(f'Empty time range {part!r} in {text!r}')
+    return start, end
+
+
+def parse_hours(text):
+    """
+    Return the (start, end) minute ranges described by ``text``
+
+    Accepts 12 and 24 hour clocks, several ranges ("9 AM-1 PM, 4-8 PM") and
+    "24 hours". A range ending before it starts runs past midnight, so
+    ``end`` may be smaller than ``start``; an end of midnight is 1440.
+    """
+    normalized = _normalize(text or '')
+    if normalized in ALL_DAY_HOURS:
+        return [(0, MINUTES_PER_DAY)]
+    ranges = [_range(part, text) for part in normalized.split(',') if part.strip()]
+    if not ranges:
+        raise AvailabilityParseError(f'No hours in {text!r}')
+    return ranges
+
+
+def parse_availability(days, hours):
+    """
+    Return the weekly (weekday, start_minute, end_minute) slots for a doctor
+
+    Ranges past midnight continue on the following day. Overlapping slots
+    of a day are merged.
+    """
+    by_day = {}
+    for day in parse_days(days):
+        for start, end in parse_hours(hours):
+            if start < end:
+                by_day.setdefault(day, []).append((start, end))
+            else:
+                by_day.setdefault(day, []).append((start, MINUTES_PER_DAY))
+                by_day.setdefault((day + 1) % 7, []).append((0, end))
+
+    slots = []
+    for day, ranges in sorted(by_day.items()):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        slots.extend((day, start, end) for start, end in merged)
+    return slots
+
+
+def weekly_position(moment):
+    """
+    Return (weekday, minute of the day) of a datetime
+    """
+    return moment.weekday(), moment.hour * 60 + moment.minute
+
+
+def format_minute(minute):
+    """
+    Render minutes after midnight as HH:MM (1440 is 24:00)
+    """
+    return f'{minute // 60:02d}:{minute % 60:02d}'
@@ -0,0 +1,26 @@
+from healthcare_project.bulk import BulkImporter
+from sharding.replication import replicate
+from . import cache as doctor_cache
+from .models import Doctor, DoctorAvailability
+from .serializers import DoctorSerializer
+
+
+class DoctorBulkImporter(BulkImporter):
+    """
+    Creates doctors with the requesting user as creator
+    """
+    serializer_class = DoctorSerializer
+    unique_together = [('email',), ('license_number',)]
+
+    def build_instance(self, validated_data):
+        validated_data['created_by_id'] = self.request.user.id
+        doctor = super().build_instance(validated_data)
+        # bulk_create skips Doctor.save()
+        doctor.search_document = doctor.build_search_document()
+        return doctor
+
+    def after_create(self, instances):
+        # bulk_create sends no post_save signals
+        DoctorAvailability.sync(instances, replace=False)
+        replicate(Doctor, instances)
+        doctor_cache.invalidate_lists()
@@ -0,0 +1,172 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from healthcare_project.db.replicas import primary_reads
+from healthcare_project.pagination import CreatedAtCursorPagination
+
+LIST_GENERATION_KEY = 'doctors:list:generation'
+LIST_KEY = 'doctors:list:{generation}:{digest}'
+LIST_STATE_KEY = 'doctors:list:{generation}:state:{digest}'
+DETAIL_VERSION_KEY = 'doctors:detail:{pk}:version'
+DETAIL_KEY = 'doctors:detail:{pk}:{version}'
+
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def _record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def get_stats():
+    """
+    Return this process's hit/miss/invalidation counters
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+    return stats
+
+
+# Entries are built from the primary: a lagging replica read right after
+# a doctor write would otherwise be cached for DOCTOR_CACHE_TIMEOUT
+def _read_through(key, build):
+    payload = cache.get(key)
+    if payload is not None:
+        _record('hits')
+        return payload
+    _record('misses')
+    with primary_reads():
+        payload = build()
+    cache.set(key, payload, settings.DOCTOR_CACHE_TIMEOUT)
+    return payload
+
+
+async def _aread_through(key, abuild):
+    payload = await cache.aget(key)
+    if payload is not None:
+        _record('hits')
+        return payload
+    _record('misses')
+    with primary_reads():
+        payload = await abuild()
+    await cache.aset(key, payload, settings.DOCTOR_CACHE_TIMEOUT)
+    return payload
+
+
+# Entries are keyed by a generation read before they are built. A reader
+# that built its payload before a write can only store it under the old
+# generation, which the write's bump already made unreachable.
+def _generation(key):
+    generation = cache.get(key)
+    if generation is None:
+        # A timestamp never collides with a generation evicted earlier
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+async def _ageneration(key):
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, time.time_ns(), None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def _list_generation():
+    return _generation(LIST_GENERATION_KEY)
+
+
+async def _alist_generation():
+    return await _ageneration(LIST_GENERATION_KEY)
+
+
+def _list_key(request, generation):
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return LIST_KEY.format(generation=generation, digest=digest)
+
+
+def _list_state_key(request, generation):
+    # Every page of a listing shares the rows behind it, so the pagination
+    # parameters are left out
+    pagination = (CreatedAtCursorPagination.cursor_query_param, CreatedAtCursorPagination.page_size_query_param)
+    params = sorted((name, values) for name, values in request.query_params.lists() if name not in pagination)
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return LIST_STATE_KEY.format(generation=generation, digest=digest)
+
+
+def get_list_payload(request, build):
+    """
+    Return the cached directory listing for this request's URL
+
+    The key covers the full URL, so every filter, search and cursor
+    combination is cached separately. All list entries share a generation
+    number that is bumped whenever any doctor changes.
+    """
+    return _read_through(_list_key(request, _list_generation()), build)
+
+
+async def aget_list_payload(request, abuild):
+    return await _aread_through(_list_key(request, await _alist_generation()), abuild)
+
+
+def get_list_state(request, build):
+    """
+    Return the cached (count, MAX(updated_at)) behind this request's listing
+    """
+    return _read_through(_list_state_key(request, _list_generation()), build)
+
+
+async def aget_list_state(request, abuild):
+    return await _aread_through(_list_state_key(request, await _alist_generation()), abuild)
+
+
+def _detail_key(pk, version):
+    return DETAIL_KEY.format(pk=pk, version=version)
+
+
+def get_detail_payload(pk, build):
+    """
+    Return the cached detail entry of doctor ``pk``
+
+    Each doctor has its own version number, bumped when the doctor or its
+    creator changes.
+    """
+    return _read_through(_detail_key(pk, _generation(DETAIL_VERSION_KEY.format(pk=pk))), build)
+
+
+async def aget_detail_payload(pk, abuild):
+    version = await _ageneration(DETAIL_VERSION_KEY.format(pk=pk))
+    return await _aread_through(_detail_key(pk, version), abuild)
+
+
+def invalidate_lists():
+    _bump(LIST_GENERATION_KEY)
+    _record('invalidations')
+
+
+def invalidate_details(pks):
+    for pk in pks:
+        _bump(DETAIL_VERSION_KEY.format(pk=pk))
+
+
+def invalidate_doctors(pks):
+    """
+    Drop the detail entries for ``pks`` and every cached listing
+    """
+    invalidate_details(pks)
+    invalidate_lists()
@@ -0,0 +1,98 @@
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from doctors.models import Doctor
+from doctors.search import search_doctors
+
+User = get_user_model()
+
+SPECIALIZATIONS = [
+    'Cardiology', 'Neurology', 'Orthopedics', 'Pediatrics', 'Dermatology',
+    'Oncology', 'Psychiatry', 'Radiology', 'Gastroenterology', 'Endocrinology',
+]
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Kavya', 'Sanjay', 'Nisha']
+LAST_NAMES = ['Sharma', 'Patel', 'Reddy', 'Iyer', 'Gupta', 'Nair', 'Singh', 'Mehta', 'Rao', 'Das']
+HOSPITALS = ['City Care', 'Apollo Clinic', 'Sunrise Hospital', 'Green Valley Medical', 'Lotus Health']
+LANGUAGES = ['English', 'Hindi', 'Tamil', 'Telugu', 'Bengali', 'Marathi']
+
+
+class Command(BaseCommand):
+    help = 'Compare ranked doctor search with the specialization__icontains scan on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Synthetic doctors to insert')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query, the best is reported')
+        parser.add_argument('--query', action='append', dest='queries', help='Search term (repeatable)')
+        parser.add_argument('--keep', action='store_true', help='Keep the synthetic rows instead of rolling back')
+
+    def handle(self, *args, **options):
+        queries = options['queries'] or ['cardio', 'neuro', 'ology', 'patel']
+
+        with transaction.atomic():
+            self.populate(options['rows'], options['batch_size'])
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE doctors_doctor')
+
+            self.stdout.write(f"{'query':<12} {'icontains ms':>14} {'search ms':>12} {'rows':>8}")
+            for query in queries:
+                scan = Doctor.objects.filter(is_active=True, specialization__icontains=query)
+                ranked = search_doctors(Doctor.objects.filter(is_active=True), query)
+                scan_ms, rows = self.time_query(scan, options['repeat'])
+                search_ms, _ = self.time_query(ranked, options['repeat'])
+                self.stdout.write(f'{query:<12} {scan_ms:>14.2f} {search_ms:>12.2f} {rows:>8}')
+
+            if options['verbosity'] > 1:
+                self.stdout.write(ranked.explain())
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def populate(self, rows, batch_size):
+        rng = random.Random(42)
+        owner = User.objects.create_user(
+            username='search-benchmark', email='search-benchmark@example.com',
+            password=None, first_name='Search', last_name='Benchmark'
+        )
+        created = 0
+        while created < rows:
+            batch = []
+            for i in range(created, min(created + batch_size, rows)):
+                doctor = Doctor(
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    email=f'bench-doctor-{i}@example.com',
+                    phone_number='+911234567890',
+                    gender=rng.choice('MFO'),
+                    license_number=f'BENCH-{i}',
+                    specialization=rng.choice(SPECIALIZATIONS),
+                    qualification='MBBS, MD',
+                    years_of_experience=rng.randint(1, 40),
+                    hospital_name=rng.choice(HOSPITALS),
+                    hospital_address='Synthetic address',
+                    consultation_fee=Decimal(rng.randint(200, 2000)),
+                    available_days='Mon-Fri',
+                    available_hours='9:00 AM - 5:00 PM',
+                    languages_spoken=', '.join(rng.sample(LANGUAGES, 2)),
+                    created_by=owner,
+                )
+                doctor.search_document = doctor.build_search_document()
+                batch.append(doctor)
+            Doctor.objects.bulk_create(batch)
+            created += len(batch)
+        self.stdout.write(f'Inserted {created} synthetic doctors')
+
+    def time_query(self, queryset, repeat):
+        best, rows = None, 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = len(queryset.values_list('id', flat=True)[:100])
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, rows
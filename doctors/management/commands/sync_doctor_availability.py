@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from doctors.availability import AvailabilityParseError, parse_availability
+from doctors.cache import invalidate_lists
+from doctors.models import Doctor, DoctorAvailability
+
+
+class Command(BaseCommand):
+    help = 'Rebuild weekly availability slots from available_days / available_hours and report unparseable strings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--report-only', action='store_true', help='Only list the strings that cannot be parsed')
+        parser.add_argument('--strict', action='store_true', help='Exit with an error if any string cannot be parsed')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        doctors = Doctor.objects.only('id', 'available_days', 'available_hours').order_by('id')
+        errors = []
+        synced = 0
+        last_id = 0
+        while True:
+            batch = list(doctors.filter(id__gt=last_id)[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            if options['report_only']:
+                errors.extend(self.check(batch))
+                continue
+            with transaction.atomic():
+                errors.extend(DoctorAvailability.sync(batch, batch_size=options['batch_size']))
+            synced += len(batch)
+
+        for doctor, error in errors:
+            self.stdout.write(self.style.WARNING(f'Doctor {doctor.id}: {error}'))
+        if synced:
+            invalidate_lists()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt the slots of {synced} doctors in {time.perf_counter() - started:.1f}s'
+            ))
+        self.stdout.write(f'{len(errors)} doctors have availability that cannot be parsed')
+        if errors and options['strict']:
+            raise CommandError('Unparseable availability strings found')
+
+    def check(self, doctors):
+        for doctor in doctors:
+            try:
+                parse_availability(doctor.available_days, doctor.available_hours)
+            except AvailabilityParseError as exc:
+                yield doctor, str(exc)
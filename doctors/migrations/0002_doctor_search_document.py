@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+SEARCH_FIELDS = ['specialization', 'first_name', 'last_name', 'hospital_name', 'languages_spoken']
+
+TRIGRAM_INDEXES = [
+    # Serves the `search` parameter: search_document LIKE '%term%'
+    ('doctors_doctor_search_trgm', 'search_document gin_trgm_ops'),
+    # Serves the existing specialization__icontains filter: UPPER(...) LIKE UPPER('%x%')
+    ('doctors_doctor_spec_upper_trgm', 'UPPER(specialization) gin_trgm_ops'),
+]
+
+
+def populate_search_document(apps, schema_editor):
+    Doctor = apps.get_model('doctors', 'Doctor')
+    doctors = Doctor.objects.using(schema_editor.connection.alias).only('id', *SEARCH_FIELDS)
+    batch = []
+    for doctor in doctors.iterator(chunk_size=2000):
+        doctor.search_document = ' '.join(getattr(doctor, field) or '' for field in SEARCH_FIELDS).lower()
+        batch.append(doctor)
+        if len(batch) >= 2000:
+            Doctor.objects.using(schema_editor.connection.alias).bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Doctor.objects.using(schema_editor.connection.alias).bulk_update(batch, ['search_document'])
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm GIN indexes only exist on PostgreSQL; other backends scan
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in TRIGRAM_INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON doctors_doctor USING gin ({expression})')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False, help_text='Lowercased specialization, name, hospital and languages for search'),
+        ),
+        migrations.RunPython(populate_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0002_doctor_search_document'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='doctor',
+            name='doctors_doc_license_3eaac3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='doctor',
+            name='doctors_doc_is_acti_3a5153_idx',
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_at', 'id'], name='doctor_active_created_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from doctors.availability import AvailabilityParseError, parse_availability
+
+
+def populate_availability(apps, schema_editor):
+    # Unparseable strings are left without slots; sync_doctor_availability
+    # lists them
+    alias = schema_editor.connection.alias
+    Doctor = apps.get_model('doctors', 'Doctor')
+    DoctorAvailability = apps.get_model('doctors', 'DoctorAvailability')
+    slots = []
+    for pk, days, hours in Doctor.objects.using(alias).values_list('pk', 'available_days', 'available_hours').iterator():
+        try:
+            parsed = parse_availability(days, hours)
+        except AvailabilityParseError:
+            continue
+        slots.extend(
+            DoctorAvailability(doctor_id=pk, weekday=weekday, start_minute=start, end_minute=end)
+            for weekday, start, end in parsed
+        )
+        if len(slots) >= 5000:
+            DoctorAvailability.objects.using(alias).bulk_create(slots)
+            slots = []
+    DoctorAvailability.objects.using(alias).bulk_create(slots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0003_active_created_partial_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_minute', models.PositiveSmallIntegerField(help_text='Minutes after midnight')),
+                ('end_minute', models.PositiveSmallIntegerField(help_text='Minutes after midnight, exclusive (at most 1440)')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_slots', to='doctors.doctor')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_minute'],
+                'indexes': [models.Index(fields=['weekday', 'start_minute', 'end_minute', 'doctor'], name='doctors_doc_weekday_50650f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='doctoravailability',
+            constraint=models.CheckConstraint(check=models.Q(('end_minute__lte', 1440), ('start_minute__lt', models.F('end_minute'))), name='doctor_availability_valid_range'),
+        ),
+        migrations.RunPython(populate_availability, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Trim
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
+from .availability import MINUTES_PER_DAY, AvailabilityParseError, format_minute, parse_availability
 
 User = get_user_model()
 
@@ -45,6 +48,13 @@ class Doctor(models.Model):
     biography = models.TextField(blank=True)
     languages_spoken = models.CharField(max_length=200, help_text="Comma-separated languages")
 
+    # Search
+    search_document = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Lowercased specialization, name, hospital and languages for search"
+    )
+
     # System fields
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='doctors')
     is_active = models.BooleanField(default=True)
@@ -55,14 +65,113 @@ class Doctor(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['specialization']),
-            models.Index(fields=['license_number']),
-            models.Index(fields=['is_active']),
             models.Index(fields=['created_at']),
+            # Directory pages: is_active ORDER BY created_at, id
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=Q(is_active=True),
+                name='doctor_active_created_idx',
+            ),
         ]
 
+    SEARCH_FIELDS = ['specialization', 'first_name', 'last_name', 'hospital_name', 'languages_spoken']
+
     def __str__(self):
         return f"Dr. {self.first_name} {self.last_name} - {self.specialization}"
 
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.SEARCH_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | {'search_document'}
+        super().save(*args, **kwargs)
+
+    def build_search_document(self):
+        return ' '.join(getattr(self, field) or '' for field in self.SEARCH_FIELDS).lower()
+
     @property
     def full_name(self):
-        return f"Dr. {self.first_name} {self.last_name}".strip()
\ No newline at end of file
+        return f"Dr. {self.first_name} {self.last_name}".strip()
+
+    @staticmethod
+    def full_name_expression():
+        """
+        SQL equivalent of ``full_name``
+        """
+        return Trim(Concat(Value('Dr. '), 'first_name', Value(' '), 'last_name'))
+
+
+
+class DoctorAvailability(models.Model):
+    """
+    One weekly window in which a doctor sees patients
+
+    Parsed from ``Doctor.available_days`` / ``available_hours`` whenever they
+    change, so the directory can be filtered by availability in SQL.
+    """
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='availability_slots')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_minute = models.PositiveSmallIntegerField(help_text="Minutes after midnight")
+    end_minute = models.PositiveSmallIntegerField(help_text="Minutes after midnight, exclusive (at most 1440)")
+
+    class Meta:
+        ordering = ['weekday', 'start_minute']
+        indexes = [
+            # "Who is available at weekday/minute" is answered from this index alone
+            models.Index(fields=['weekday', 'start_minute', 'end_minute', 'doctor']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(start_minute__lt=F('end_minute'), end_minute__lte=MINUTES_PER_DAY),
+                name='doctor_availability_valid_range',
+            ),
+        ]
+
+    @classmethod
+    def doctor_ids_available_at(cls, weekday, minute):
+        """
+        Subquery of the doctors seeing patients at ``minute`` of ``weekday``
+        """
+        return cls.objects.filter(
+            weekday=weekday, start_minute__lte=minute, end_minute__gt=minute,
+        ).values('doctor_id')
+
+    @classmethod
+    def sync(cls, doctors, replace=True, batch_size=5000):
+        """
+        Replace the slots of ``doctors`` with ones parsed from their strings
+
+        Doctors whose strings cannot be parsed are left without slots, so
+        they never match an availability filter. Returns [(doctor, error)]
+        for those. Pass ``replace=False`` for doctors that were just
+        inserted and have no slots yet.
+        """
+        slots = []
+        errors = []
+        for doctor in doctors:
+            try:
+                parsed = parse_availability(doctor.available_days, doctor.available_hours)
+            except AvailabilityParseError as exc:
+                errors.append((doctor, str(exc)))
+                continue
+            slots.extend(
+                cls(doctor_id=doctor.pk, weekday=weekday, start_minute=start, end_minute=end)
+                for weekday, start, end in parsed
+            )
+        if replace:
+            cls.objects.filter(doctor__in=[doctor.pk for doctor in doctors]).delete()
+        cls.objects.bulk_create(slots, batch_size=batch_size)
+        return errors
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {format_minute(self.start_minute)}-{format_minute(self.end_minute)}"
@@ -0,0 +1,35 @@
+from django.db.models import Case, IntegerField, Q, Value, When
+
+
+# Matches in earlier groups rank higher
+SEARCH_WEIGHTS = [
+    (('specialization',), 3),
+    (('first_name', 'last_name'), 2),
+    (('hospital_name', 'languages_spoken'), 1),
+]
+
+MAX_SEARCH_TERMS = 8
+
+
+def search_doctors(queryset, query):
+    """
+    Filter doctors matching every term in ``query`` and order them by rank
+
+    Filtering runs against ``search_document``, which is covered by a
+    pg_trgm GIN index on PostgreSQL. On other backends the same LIKE
+    predicate runs as a scan. Ranking is only computed for matching rows.
+    """
+    terms = query.lower().split()[:MAX_SEARCH_TERMS]
+    if not terms:
+        return queryset
+
+    rank = Value(0)
+    for term in terms:
+        queryset = queryset.filter(search_document__contains=term)
+        for fields, weight in SEARCH_WEIGHTS:
+            matches = Q()
+            for field in fields:
+                matches |= Q(**{f'{field}__icontains': term})
+            rank = rank + Case(When(matches, then=Value(weight)), default=Value(0), output_field=IntegerField())
+
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', '-created_at', '-id')
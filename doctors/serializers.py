@@ -1,13 +1,40 @@
 from rest_framework import serializers
-from .models import Doctor
+from healthcare_project.bulk import BulkSerializerMixin
+from healthcare_project.eager_loading import EagerLoadingMixin
+from healthcare_project.flat import FlatSerializerMixin
+from healthcare_project.metrics import TimedSerializerMixin
+from .availability import format_minute
+from .models import Doctor, DoctorAvailability
 
 
-class DoctorSerializer(serializers.ModelSerializer):
+class DoctorAvailabilitySerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """
+    One weekly slot parsed from available_days / available_hours
+    """
+    day = serializers.CharField(source='get_weekday_display', read_only=True)
+    start = serializers.SerializerMethodField()
+    end = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DoctorAvailability
+        fields = ['weekday', 'day', 'start', 'end']
+
+    def get_start(self, obj):
+        return format_minute(obj.start_minute)
+
+    def get_end(self, obj):
+        return format_minute(obj.end_minute)
+
+
+class DoctorSerializer(BulkSerializerMixin, EagerLoadingMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Doctor model
     """
+    select_related_fields = ('created_by',)
+
     full_name = serializers.ReadOnlyField()
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    weekly_availability = DoctorAvailabilitySerializer(source='availability_slots', many=True, read_only=True)
 
     class Meta:
         model = Doctor
@@ -15,7 +42,7 @@ class DoctorSerializer(serializers.ModelSerializer):
             'id', 'first_name', 'last_name', 'full_name', 'email', 'phone_number', 'gender',
             'license_number', 'specialization', 'qualification', 'years_of_experience',
             'hospital_name', 'hospital_address', 'consultation_fee', 'available_days',
-            'available_hours', 'biography', 'languages_spoken', 'is_active',
+            'available_hours', 'weekly_availability', 'biography', 'languages_spoken', 'is_active',
             'created_by_username', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_by_username', 'created_at', 'updated_at']
@@ -24,6 +51,9 @@ class DoctorSerializer(serializers.ModelSerializer):
         """
         Validate that email is unique for doctors
         """
+        if self.is_bulk:
+            # Checked for the whole batch by DoctorBulkImporter
+            return value
         if self.instance:
             # If updating, exclude current instance from uniqueness check
             if Doctor.objects.filter(email=value).exclude(id=self.instance.id).exists():
@@ -38,6 +68,8 @@ class DoctorSerializer(serializers.ModelSerializer):
         """
         Validate that license number is unique
         """
+        if self.is_bulk:
+            return value
         if self.instance:
             if Doctor.objects.filter(license_number=value).exclude(id=self.instance.id).exists():
                 raise serializers.ValidationError("A doctor with this license number already exists.")
@@ -69,14 +101,22 @@ class DoctorSerializer(serializers.ModelSerializer):
         Create doctor with the authenticated user as creator
         """
         request = self.context.get('request')
-        validated_data['created_by'] = request.user
+        validated_data['created_by_id'] = request.user.id
         return super().create(validated_data)
 
 
-class DoctorListSerializer(serializers.ModelSerializer):
+class DoctorListSerializer(FlatSerializerMixin, EagerLoadingMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Simplified serializer for doctor list views
     """
+    only_fields = (
+        'id', 'first_name', 'last_name', 'email', 'phone_number', 'specialization',
+        'qualification', 'years_of_experience', 'hospital_name', 'consultation_fee',
+        'available_days', 'is_active', 'created_at'
+    )
+
+    flat_expressions = {'full_name': Doctor.full_name_expression()}
+
     full_name = serializers.ReadOnlyField()
 
     class Meta:
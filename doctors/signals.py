@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import Doctor, DoctorAvailability
+
+User = get_user_model()
+
+AVAILABILITY_FIELDS = {'available_days', 'available_hours'}
+
+
+# Connected before the cache invalidation below, so a reader refilling the
+# cache already sees the new slots
+@receiver(post_save, sender=Doctor)
+def sync_availability(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or AVAILABILITY_FIELDS & set(update_fields):
+        DoctorAvailability.sync([instance])
+        # A prefetched copy would render the old slots in the response
+        getattr(instance, '_prefetched_objects_cache', {}).pop('availability_slots', None)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def invalidate_doctor_cache(sender, instance, **kwargs):
+    cache.invalidate_doctors([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def invalidate_creator_doctors(sender, instance, created, update_fields=None, **kwargs):
+    """
+    DoctorSerializer renders created_by.username and every doctor response's
+    validators include the creator's updated_at, so renames reach the cache
+    """
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    pks = list(Doctor.objects.filter(created_by=instance).values_list('id', flat=True))
+    if pks:
+        cache.invalidate_doctors(pks)
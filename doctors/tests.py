@@ -0,0 +1,278 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from healthcare_project.testing import assert_num_queries, create_doctor, create_user
+from . import async_views, cache as doctor_cache
+from .availability import AvailabilityParseError, parse_availability, parse_days, parse_hours
+from .models import DoctorAvailability
+
+
+class DoctorListQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_total_comes_with_the_etag_aggregate(self):
+        for _ in range(3):
+            create_doctor(self.user)
+        # The ETag aggregate (which carries the total), then the page
+        with assert_num_queries(2):
+            self.client.get('/api/doctors/')
+        for _ in range(30):
+            create_doctor(self.user)
+        with assert_num_queries(2) as queries:
+            body = self.client.get('/api/doctors/').json()
+        self.assertEqual((body['count'], len(body['doctors'])), (33, 20))
+        self.assertEqual(sum('COUNT(' in query['sql'] for query in queries.captured_queries), 1)
+
+
+class DoctorCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.doctor = create_doctor(self.user, hospital_name='General')
+
+    def detail(self):
+        return self.client.get(f'/api/doctors/{self.doctor.pk}/')
+
+    def counts(self):
+        stats = doctor_cache.get_stats()
+        return stats['hits'], stats['misses']
+
+    def test_repeated_requests_are_served_from_the_cache(self):
+        hits, misses = self.counts()
+        self.client.get('/api/doctors/')
+        self.detail()
+        with assert_num_queries(0):
+            self.client.get('/api/doctors/')
+            self.detail()
+        # List state, list page and detail miss once, then hit once each
+        self.assertEqual(self.counts(), (hits + 3, misses + 3))
+
+    def test_save_invalidates(self):
+        self.detail()
+        self.doctor.hospital_name = 'St. Mary'
+        self.doctor.save()
+        self.assertEqual(self.detail().json()['doctor']['hospital_name'], 'St. Mary')
+        self.assertEqual(self.client.get('/api/doctors/').json()['doctors'][0]['hospital_name'], 'St. Mary')
+
+    def test_delete_invalidates(self):
+        self.detail()
+        self.client.get('/api/doctors/')
+        self.doctor.delete()
+        self.assertEqual(self.detail().status_code, 404)
+        self.assertEqual(self.client.get('/api/doctors/').json()['count'], 0)
+
+    def test_creator_rename_invalidates(self):
+        self.detail()
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(self.detail().json()['doctor']['created_by_username'], 'renamed')
+
+    def test_payload_built_before_a_save_is_not_served_after_it(self):
+        def build_then_save():
+            stale = {'hospital_name': 'General'}
+            # The save and its invalidation land while this reader is building
+            self.doctor.hospital_name = 'St. Mary'
+            self.doctor.save()
+            return stale
+
+        doctor_cache.get_detail_payload(self.doctor.pk, build_then_save)
+        self.assertEqual(self.detail().json()['doctor']['hospital_name'], 'St. Mary')
+
+
+class DoctorConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.doctor = create_doctor(self.user)
+
+    def test_creator_rename_changes_the_detail_etag(self):
+        url = f'/api/doctors/{self.doctor.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['doctor']['created_by_username'], 'renamed')
+
+    def test_creator_rename_changes_the_async_detail_etag(self):
+        factory = AsyncRequestFactory()
+        token = str(AccessToken.for_user(self.user))
+
+        def get(etag=None):
+            headers = {'Authorization': f'Bearer {token}', **({'If-None-Match': etag} if etag else {})}
+            request = factory.get(f'/api/doctors/{self.doctor.pk}/', headers=headers)
+            return async_to_sync(async_views.doctor_detail)(request, self.doctor.pk)
+
+        etag = get()['ETag']
+        self.assertEqual(get(etag).status_code, 304)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(get(etag).status_code, 200)
+
+    def test_creator_rename_changes_the_list_etag(self):
+        etag = self.client.get('/api/doctors/')['ETag']
+        self.assertEqual(self.client.get('/api/doctors/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/doctors/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AvailabilityParserTests(SimpleTestCase):
+    def test_days(self):
+        self.assertEqual(parse_days('Mon-Fri'), [0, 1, 2, 3, 4])
+        self.assertEqual(parse_days('Fri-Mon'), [0, 4, 5, 6])
+        self.assertEqual(parse_days('Tue, Thu & Sat'), [1, 3, 5])
+        self.assertEqual(parse_days('Weekends'), [5, 6])
+
+    def test_hours(self):
+        self.assertEqual(parse_hours('9:00 AM - 5:00 PM'), [(540, 1020)])
+        self.assertEqual(parse_hours('9-5'), [(540, 1020)])
+        self.assertEqual(parse_hours('9 AM-1 PM, 4-8 PM'), [(540, 780), (960, 1200)])
+        self.assertEqual(parse_hours('10 to 11 am'), [(600, 660)])
+        self.assertEqual(parse_hours('24/7'), [(0, 1440)])
+
+    def test_overnight_range_continues_next_day(self):
+        self.assertEqual(parse_availability('Sun', '10 PM - 2 AM'), [(0, 0, 120), (6, 1320, 1440)])
+
+    def test_overlapping_ranges_are_merged(self):
+        self.assertEqual(parse_availability('Mon', '9-12, 11-14'), [(0, 540, 840)])
+
+    def test_unparseable_values(self):
+        for days, hours in [('Funday', '9-5'), ('Mon', 'whenever'), ('Mon', '25:00-26:00'), ('', '9-5')]:
+            with self.assertRaises(AvailabilityParseError):
+                parse_availability(days, hours)
+
+
+class AvailabilityFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def available(self, moment):
+        return [doctor['id'] for doctor in self.client.get(f'/api/doctors/?available_at={moment}').json()['doctors']]
+
+    def test_available_at_filters_by_weekly_hours(self):
+        weekday = create_doctor(self.user, available_days='Mon-Fri', available_hours='9 AM - 5 PM')
+        weekend = create_doctor(self.user, available_days='Sat, Sun', available_hours='24 hours')
+
+        # 2024-05-06 is a Monday
+        self.assertEqual(self.available('2024-05-06T10:30'), [weekday.pk])
+        self.assertEqual(self.available('2024-05-06T17:00'), [])
+        self.assertEqual(self.available('2024-05-11T10:30'), [weekend.pk])
+
+    def test_slots_follow_edits(self):
+        doctor = create_doctor(self.user, available_days='Mon', available_hours='9-5')
+        doctor.available_days = 'Tue'
+        doctor.save(update_fields=['available_days'])
+        self.assertEqual(list(DoctorAvailability.objects.values_list('weekday', flat=True)), [1])
+        self.assertEqual(self.available('2024-05-07T10:00'), [doctor.pk])
+
+    def test_unparseable_strings_leave_no_slots(self):
+        create_doctor(self.user, available_days='By appointment')
+        self.assertFalse(DoctorAvailability.objects.exists())
+
+    def test_invalid_available_at_is_a_field_error(self):
+        response = self.client.get('/api/doctors/?available_at=garbage')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('available_at', response.json())
+
+
+class DoctorSearchPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        specialists = [create_doctor(self.user, specialization='Cardiology').pk for _ in range(8)]
+        named = [create_doctor(self.user, specialization='Neurology', last_name='Cardiosson').pk for _ in range(4)]
+        hospitals = [create_doctor(self.user, specialization='Oncology', hospital_name='Cardio Care').pk for _ in range(9)]
+        create_doctor(self.user, specialization='Dermatology')
+        # Specialization beats name beats hospital, then newest first
+        self.expected = [*reversed(specialists), *reversed(named), *reversed(hospitals)]
+
+    def walk(self, get, url):
+        ids, count, pages = [], None, 0
+        while url:
+            body = get(url)
+            ids += [doctor['id'] for doctor in body['doctors']]
+            count = body['count']
+            url = body['next']
+            pages += 1
+        return ids, count, pages
+
+    def test_search_pages_through_every_match_by_rank(self):
+        ids, count, pages = self.walk(
+            lambda url: self.client.get(url).json(), '/api/doctors/?search=cardio&page_size=5',
+        )
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(count, len(self.expected))
+        self.assertEqual(pages, 5)
+
+    @override_settings(FLAT_LIST_SERIALIZERS=False)
+    def test_search_pages_with_model_serializers(self):
+        ids, count, _ = self.walk(
+            lambda url: self.client.get(url).json(), '/api/doctors/?search=cardio&page_size=7',
+        )
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(count, len(self.expected))
+
+    def test_search_previous_link_returns_the_page_before(self):
+        first = self.client.get('/api/doctors/?search=cardio&page_size=6').json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual([doctor['id'] for doctor in back['doctors']], self.expected[:6])
+        self.assertIsNone(back['previous'])
+
+    def test_async_search_pages_through_every_match(self):
+        factory = AsyncRequestFactory()
+        token = str(AccessToken.for_user(self.user))
+
+        def get(url):
+            request = factory.get(url, headers={'Authorization': f'Bearer {token}'})
+            return json.loads(async_to_sync(async_views.doctor_list_create)(request).content)
+
+        ids, count, _ = self.walk(get, '/api/doctors/?search=cardio&page_size=8')
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(count, len(self.expected))
+
+
+class AsyncDoctorErrorTests(TestCase):
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.token = str(AccessToken.for_user(create_user()))
+
+    def get(self, view, url, *args, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return async_to_sync(view)(self.factory.get(url, headers=headers), *args)
+
+    def test_validation_errors_keep_their_field(self):
+        response = self.get(async_views.doctor_list_create, '/api/doctors/?available_at=garbage', token=self.token)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(json.loads(response.content)), ['available_at'])
+
+    def test_unauthenticated_request_is_challenged(self):
+        response = self.get(async_views.doctor_list_create, '/api/doctors/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+    def test_missing_doctor_is_not_found(self):
+        response = self.get(async_views.doctor_detail, '/api/doctors/999/', 999, token=self.token)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {'detail': 'Not found.'})
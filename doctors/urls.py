@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the read endpoints are served by native coroutine views
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
 
 urlpatterns = [
-    path('', views.doctor_list_create, name='doctor-list-create'),
-    path('<int:pk>/', views.doctor_detail, name='doctor-detail'),
+    path('', read_views.doctor_list_create, name='doctor-list-create'),
+    path('bulk/', views.doctor_bulk_create, name='doctor-bulk-create'),
+    path('<int:pk>/', read_views.doctor_detail, name='doctor-detail'),
+    path('cache/stats/', views.doctor_cache_stats, name='doctor-cache-stats'),
 ]
\ No newline at end of file
@@ -1,10 +1,26 @@
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from .models import Doctor
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from healthcare_project.bulk import NDJSONParser
+from healthcare_project.conditional import (
+    add_validators, detail_validators, list_state, list_validators, not_modified,
+)
+from healthcare_project.pagination import CreatedAtCursorPagination, RankedCursorPagination
+from .bulk import DoctorBulkImporter
+from . import cache as doctor_cache
+from .availability import weekly_position
+from .models import Doctor, DoctorAvailability
+from .search import search_doctors
 from .serializers import DoctorSerializer, DoctorListSerializer
 
+# Responses embed the creator's username, so a rename changes them too
+DOCTOR_TIMESTAMPS = ('updated_at', 'created_by__updated_at')
+
 
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -14,18 +30,16 @@ def doctor_list_create(request):
     POST: Create a new doctor
     """
     if request.method == 'GET':
-        doctors = Doctor.objects.filter(is_active=True)
-        
-        # Filter by specialization if provided
-        specialization = request.query_params.get('specialization')
-        if specialization:
-            doctors = doctors.filter(specialization__icontains=specialization)
-            
-        serializer = DoctorListSerializer(doctors, many=True)
-        return Response({
-            'count': doctors.count(),
-            'doctors': serializer.data
-        }, status=status.HTTP_200_OK)
+        state = doctor_cache.get_list_state(
+            request, lambda: list_state(doctor_list_queryset(request)[0], DOCTOR_TIMESTAMPS),
+        )
+        validators = list_validators(request, state)
+        not_modified_response = not_modified(request, validators)
+        if not_modified_response is not None:
+            return not_modified_response
+
+        payload = doctor_cache.get_list_payload(request, lambda: _doctor_list_payload(request, state[0]))
+        return add_validators(Response(payload, status=status.HTTP_200_OK), validators)
 
     elif request.method == 'POST':
         serializer = DoctorSerializer(data=request.data, context={'request': request})
@@ -42,6 +56,106 @@ def doctor_list_create(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def doctor_list_queryset(request):
+    """
+    Active doctors matching the request's filters
+
+    Returns (queryset, searched). Searched querysets carry their rank and
+    are paged by it, see ``list_paginator``.
+    """
+    doctors = DoctorListSerializer.setup_list_queryset(Doctor.objects.filter(is_active=True))
+
+    # Filter by specialization if provided
+    specialization = request.query_params.get('specialization')
+    if specialization:
+        doctors = doctors.filter(specialization__icontains=specialization)
+
+    # Weekly slots cover the requested moment
+    available_at = request.query_params.get('available_at')
+    if available_at:
+        weekday, minute = parse_available_at(available_at)
+        doctors = doctors.filter(pk__in=DoctorAvailability.doctor_ids_available_at(weekday, minute))
+
+    # Ranked search returns the best matches first
+    search = request.query_params.get('search', '').strip()
+    if search:
+        return search_doctors(doctors, search), True
+    return doctors, False
+
+
+def parse_available_at(value):
+    """
+    Return (weekday, minute) of an ISO 8601 ``available_at`` value
+
+    Doctors' hours are wall-clock times. A value with an offset is converted
+    to TIME_ZONE first; one without is taken as is.
+    """
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({'available_at': ['Expected a date and time such as 2024-05-06T10:30.']})
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return weekly_position(moment)
+
+
+def list_paginator(searched, count=None):
+    """
+    The paginator for a ``doctor_list_queryset`` result with ``count`` rows, when known
+    """
+    paginator = RankedCursorPagination() if searched else CreatedAtCursorPagination()
+    paginator.known_count = count
+    return paginator
+
+
+def _doctor_list_payload(request, count=None):
+    """
+    Build the directory listing for GET doctor_list_create
+    """
+    doctors, searched = doctor_list_queryset(request)
+    paginator = list_paginator(searched, count)
+    page = paginator.paginate_queryset(doctors, request)
+    return paginator.get_paginated_data(DoctorListSerializer.list_data(page), 'doctors')
+
+
+def doctor_detail_queryset():
+    return DoctorSerializer.setup_eager_loading(Doctor.objects.all())
+
+
+def _get_doctor(pk):
+    return get_object_or_404(doctor_detail_queryset(), pk=pk)
+
+
+def doctor_detail_entry(doctor):
+    """
+    The cached detail entry: the payload and its DOCTOR_TIMESTAMPS state
+    """
+    return {
+        'doctor': DoctorSerializer(doctor).data,
+        'state': (doctor.updated_at, doctor.created_by.updated_at),
+    }
+
+
+def get_doctor_entry(pk):
+    return doctor_cache.get_detail_payload(pk, lambda: doctor_detail_entry(_get_doctor(pk)))
+
+
+def get_doctor_payload(pk):
+    """
+    The doctor's detail payload, from the directory cache when possible
+    """
+    return get_doctor_entry(pk)['doctor']
+
+
+def doctor_detail_validators(pk, entry):
+    """
+    Validators taken from the cached entry's state, without a query
+    """
+    return detail_validators('doctor', pk, entry['state'])
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def doctor_detail(request, pk):
@@ -50,17 +164,21 @@ def doctor_detail(request, pk):
     PUT: Update doctor information (only creator can update)
     DELETE: Delete doctor (only creator can delete)
     """
-    doctor = get_object_or_404(Doctor, pk=pk)
-
     if request.method == 'GET':
-        serializer = DoctorSerializer(doctor)
-        return Response({
-            'doctor': serializer.data
-        }, status=status.HTTP_200_OK)
+        entry = get_doctor_entry(pk)
+        validators = doctor_detail_validators(pk, entry)
+        not_modified_response = not_modified(request, validators)
+        if not_modified_response is not None:
+            return not_modified_response
+        return add_validators(Response({
+            'doctor': entry['doctor']
+        }, status=status.HTTP_200_OK), validators)
+
+    doctor = _get_doctor(pk)
 
-    elif request.method == 'PUT':
+    if request.method == 'PUT':
         # Only creator can update
-        if doctor.created_by != request.user:
+        if doctor.created_by_id != request.user.id:
             return Response({
                 'error': 'You do not have permission to update this doctor'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -80,7 +198,7 @@ def doctor_detail(request, pk):
 
     elif request.method == 'DELETE':
         # Only creator can delete
-        if doctor.created_by != request.user:
+        if doctor.created_by_id != request.user.id:
             return Response({
                 'error': 'You do not have permission to delete this doctor'
             }, status=status.HTTP_403_FORBIDDEN)
@@ -89,4 +207,30 @@ def doctor_detail(request, pk):
         doctor.delete()
         return Response({
             'message': f'Doctor {doctor_name} deleted successfully'
-        }, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        }, status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def doctor_cache_stats(request):
+    """
+    Hit/miss counters of the doctor directory cache in this worker
+    """
+    return Response({
+        'cache': doctor_cache.get_stats()
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes([JSONParser, NDJSONParser])
+def doctor_bulk_create(request):
+    """
+    POST: Create doctors from a JSON array or an NDJSON stream
+    """
+    created, errors = DoctorBulkImporter(request).run(request.data)
+    return Response({
+        'message': f'{len(created)} doctors created',
+        'created': [obj.id for obj in created],
+        'errors': errors
+    }, status=status.HTTP_201_CREATED if created or not errors else status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -0,0 +1,94 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def api_response(data, status_code=status.HTTP_200_OK):
+    """
+    Render ``data`` exactly like the DRF views do
+    """
+    return HttpResponse(
+        api_settings.DEFAULT_RENDERER_CLASSES[0]().render(data),
+        status=status_code,
+        content_type='application/json',
+    )
+
+
+async def authenticate_request(request):
+    """
+    Run the configured DRF authenticators and return the user or None
+
+    Stateless JWT authentication never touches the database, so it runs
+    on the event loop. Other authenticators run in a worker thread.
+    """
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = authenticator_class()
+        if isinstance(authenticator, JWTStatelessUserAuthentication):
+            result = authenticator.authenticate(request)
+        else:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+def handle_exception(exc, request, context):
+    """
+    Turn ``exc`` into a response with the configured EXCEPTION_HANDLER, as APIView does
+    """
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        authenticators = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        auth_header = authenticators[0]().authenticate_header(request) if authenticators else None
+        if auth_header:
+            exc.auth_header = auth_header
+        else:
+            exc.status_code = status.HTTP_403_FORBIDDEN
+    response = api_settings.EXCEPTION_HANDLER(exc, context)
+    if response is None:
+        raise exc
+    rendered = api_response(response.data, response.status_code)
+    for name, value in response.items():
+        if name != 'Content-Type':
+            rendered[name] = value
+    return rendered
+
+
+def async_read_view(sync_view):
+    """
+    Serve GET/HEAD with the decorated coroutine and other methods with ``sync_view``
+
+    The coroutine receives a DRF ``Request`` with an authenticated user so
+    it can share query-building code with the sync view. Writes keep going
+    through the DRF view in a worker thread.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+            drf_request = None
+            try:
+                user = await authenticate_request(request)
+                if user is None:
+                    raise exceptions.NotAuthenticated()
+                drf_request = Request(request, authenticators=())
+                drf_request.user = user
+                return await view(drf_request, *args, **kwargs)
+            except (exceptions.APIException, Http404, PermissionDenied) as exc:
+                context = {'view': None, 'args': args, 'kwargs': kwargs, 'request': drf_request}
+                return handle_exception(exc, request, context)
+
+        # django.views.decorators.csrf.csrf_exempt does not keep coroutine
+        # functions async before Django 5.0; DRF views are exempt as well
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
@@ -0,0 +1,234 @@
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.validators import UniqueValidator
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a list of objects
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        rows = []
+        for number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {number} - {exc}')
+        return rows
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves primary keys from instances fetched once for the whole batch
+    """
+    def __init__(self, instances, **kwargs):
+        self.instances = instances
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            instance = self.instances.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+class BulkSerializerMixin:
+    """
+    ModelSerializer mixin for validating rows of a bulk import
+
+    With ``bulk`` in the context, per-row uniqueness validators are dropped
+    (the importer checks them with one query per batch) and relation fields
+    named in ``preloaded`` resolve against instances loaded up front.
+    Serializers should skip their own existence queries when
+    ``is_bulk`` is true.
+    """
+
+    @property
+    def is_bulk(self):
+        return bool(self.context.get('bulk'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_bulk:
+            return fields
+
+        preloaded = self.context.get('preloaded', {})
+        for name, field in fields.items():
+            field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+            if name in preloaded and isinstance(field, serializers.PrimaryKeyRelatedField):
+                fields[name] = PreloadedPrimaryKeyRelatedField(
+                    instances=preloaded[name],
+                    queryset=field.queryset,
+                    required=field.required,
+                )
+        return fields
+
+    def get_validators(self):
+        if self.is_bulk:
+            return []
+        return super().get_validators()
+
+
+class BulkImporter:
+    """
+    Validates and inserts a batch of rows without any per-row queries
+
+    Subclasses set ``serializer_class`` and ``unique_together`` (tuples of
+    model field names that must be unique), and can override ``preload``,
+    ``build_instance`` and ``after_create``. Valid rows are inserted with
+    ``bulk_create`` in one transaction. Invalid rows are reported by index
+    and skipped. When a concurrent request stores a clashing row between
+    the checks and the insert, the batch is checked again and the
+    remaining rows retried; ``is_conflict`` tells such errors apart.
+    """
+    serializer_class = None
+    unique_together = ()
+    batch_size = 1000
+    conflict_retries = 2
+    conflict_message = 'Conflicts with a row saved at the same time; retry this row.'
+
+    def __init__(self, request):
+        self.request = request
+
+    @property
+    def model(self):
+        return self.serializer_class.Meta.model
+
+    @property
+    def max_rows(self):
+        return getattr(settings, 'BULK_IMPORT_MAX_ROWS', 10000)
+
+    def preload(self, rows):
+        """
+        Return {field name: {pk: instance}} for relation fields in ``rows``
+        """
+        return {}
+
+    def build_instance(self, validated_data):
+        return self.model(**validated_data)
+
+    def after_create(self, instances):
+        pass
+
+    def run(self, rows):
+        """
+        Return (created instances, [{'row': index, 'errors': ...}])
+        """
+        if not isinstance(rows, list):
+            raise ParseError('Expected a JSON array or an NDJSON stream of objects.')
+        if len(rows) > self.max_rows:
+            raise ParseError(f'A batch may contain at most {self.max_rows} rows.')
+
+        context = {'request': self.request, 'bulk': True, 'preloaded': self.preload(rows)}
+        # One serializer validates every row so its fields are built once
+        validator = self.serializer_class(context=context)
+        errors = {}
+        valid = []
+        for index, row in enumerate(rows):
+            try:
+                valid.append((index, validator.run_validation(row)))
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+
+        valid = self.check_unique(valid, errors)
+        instances = self.create(valid, errors)
+        if instances:
+            self.after_create(instances)
+
+        return instances, [{'row': index, 'errors': errors[index]} for index in sorted(errors)]
+
+    def create(self, valid, errors):
+        """
+        Insert the ``valid`` rows, reporting those that lost a race to a concurrent insert
+        """
+        for _ in range(self.conflict_retries + 1):
+            if not valid:
+                return []
+            instances = [self.build_instance(dict(data)) for _, data in valid]
+            try:
+                with transaction.atomic(using=router.db_for_write(self.model)):
+                    return self.model.objects.bulk_create(instances, batch_size=self.batch_size)
+            except IntegrityError as exc:
+                if not self.is_conflict(exc):
+                    raise
+            # The clashing rows are committed by now, so the checks find them
+            remaining = self.check_unique(valid, errors)
+            if len(remaining) == len(valid):
+                break
+            valid = remaining
+        for index, _ in valid:
+            errors[index] = {'non_field_errors': [self.conflict_message]}
+        return []
+
+    def is_conflict(self, exc):
+        """
+        Whether ``exc`` is a unique violation, which ``check_unique`` can explain
+        """
+        # 23505 is PostgreSQL's unique_violation
+        return getattr(exc.__cause__, 'pgcode', None) == '23505' or 'UNIQUE constraint failed' in str(exc)
+
+    def check_unique(self, valid, errors):
+        """
+        Drop rows clashing with stored rows or earlier rows of the batch
+        """
+        for fields in self.unique_together:
+            keys = [self.unique_key(data, fields) for _, data in valid]
+            existing = self.existing_keys(fields, keys)
+            seen = set()
+            remaining = []
+            for (index, data), key in zip(valid, keys):
+                if key in existing:
+                    errors[index] = {'non_field_errors': [self.unique_message(fields, 'already exists')]}
+                elif key in seen:
+                    errors[index] = {'non_field_errors': [self.unique_message(fields, 'is repeated in this batch')]}
+                else:
+                    seen.add(key)
+                    remaining.append((index, data))
+            valid = remaining
+        return valid
+
+    def unique_key(self, data, fields):
+        return tuple(getattr(data[field], 'pk', data[field]) for field in fields)
+
+    def existing_keys(self, fields, keys):
+        """
+        Return the subset of ``keys`` already stored, one query per chunk
+        """
+        attnames = [self.model._meta.get_field(field).attname for field in fields]
+        keys = list(set(keys))
+        existing = set()
+        for start in range(0, len(keys), self.batch_size):
+            chunk = keys[start:start + self.batch_size]
+            lookups = {
+                f'{attname}__in': {key[position] for key in chunk}
+                for position, attname in enumerate(attnames)
+            }
+            for stored in self.stored_rows(self.model.objects.filter(**lookups)):
+                existing.update(stored.values_list(*attnames))
+        return existing & set(keys)
+
+    def stored_rows(self, queryset):
+        """
+        Yield ``queryset`` bound to each database whose rows new ones must not clash with
+        """
+        yield queryset
+
+    def unique_message(self, fields, problem):
+        label = ', '.join(str(self.model._meta.get_field(field).verbose_name) for field in fields)
+        return f'{self.model._meta.verbose_name.capitalize()} with this {label} {problem}.'
@@ -0,0 +1,109 @@
+import hashlib
+from collections import namedtuple
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+# ``check_modified_since`` is off for lists: deleting a row changes the
+# list without moving MAX(updated_at), so only the ETag is trusted there
+Validators = namedtuple('Validators', ('etag', 'last_modified', 'check_modified_since'))
+
+
+def make_validators(key, state, check_modified_since=True):
+    """
+    Build validators from a cache ``key`` and the ``state`` it is served from
+
+    ``state`` holds the timestamps (and, for lists, the row count) the
+    response depends on. The ETag is weak: equal state means an equivalent
+    body, not byte-identical output.
+    """
+    digest = hashlib.md5(repr((key, state)).encode()).hexdigest()
+    timestamps = [value for value in state if hasattr(value, 'timestamp')]
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    return Validators(f'W/"{digest}"', last_modified, check_modified_since)
+
+
+def _detail_query(queryset, fields):
+    return queryset.order_by().values_list(*fields)[:1]
+
+
+def detail_state(queryset, fields=('updated_at',)):
+    """
+    Return the ``fields`` timestamps of the single row in ``queryset``, or None
+
+    ``fields`` lists ``updated_at`` of the row and of every related row the
+    response embeds, e.g. ``patient__updated_at``.
+    """
+    rows = list(_detail_query(queryset, fields))
+    return rows[0] if rows else None
+
+
+async def adetail_state(queryset, fields=('updated_at',)):
+    rows = [row async for row in _detail_query(queryset, fields)]
+    return rows[0] if rows else None
+
+
+def _list_aggregates(fields):
+    aggregates = {f'latest_{index}': Max(field) for index, field in enumerate(fields)}
+    aggregates['rows'] = Count('pk')
+    return aggregates
+
+
+def _list_row(result, fields):
+    return (result['rows'], *(result[f'latest_{index}'] for index in range(len(fields))))
+
+
+def list_state(queryset, fields=('updated_at',)):
+    """
+    Return (count, MAX of each of ``fields``) for ``queryset`` in one aggregate query
+    """
+    return _list_row(queryset.order_by().aggregate(**_list_aggregates(fields)), fields)
+
+
+async def alist_state(queryset, fields=('updated_at',)):
+    return _list_row(await queryset.order_by().aaggregate(**_list_aggregates(fields)), fields)
+
+
+def detail_validators(label, pk, state):
+    if state is None:
+        return None
+    return make_validators((label, pk), state)
+
+
+def list_validators(request, state):
+    """
+    Validators for a list page; the key covers the user and every query parameter
+    """
+    return make_validators((request.user.id, request.get_full_path()), state, check_modified_since=False)
+
+
+def not_modified(request, validators):
+    """
+    Return a 304 response if the client's copy is current, else None
+    """
+    if validators is None or request.method not in SAFE_METHODS:
+        return None
+    response = get_conditional_response(
+        request,
+        etag=validators.etag,
+        last_modified=validators.last_modified if validators.check_modified_since else None,
+    )
+    if response is not None:
+        add_validators(response, validators)
+    return response
+
+
+def add_validators(response, validators):
+    """
+    Send ETag/Last-Modified and make clients revalidate before reusing the body
+    """
+    if validators is None or response.status_code not in (200, 304):
+        return response
+    response['ETag'] = validators.etag
+    if validators.last_modified is not None:
+        response['Last-Modified'] = http_date(validators.last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
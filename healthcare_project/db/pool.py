@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of raw DB-API connections
+
+    Holds up to ``size`` connections and opens up to ``max_overflow`` extra
+    ones under load, which are closed instead of pooled when returned. When
+    both are exhausted, callers wait up to ``timeout`` seconds for a
+    connection. Connections idle longer than ``ping_after`` are checked
+    with ``SELECT 1`` before reuse, and anything older than
+    ``max_lifetime`` is replaced.
+    """
+
+    def __init__(self, size=10, max_overflow=5, timeout=10.0, ping_after=30.0, max_lifetime=1800.0):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.max_lifetime = max_lifetime
+
+        self._idle = deque()
+        self._born = {}
+        self._open = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'checkins': 0,
+            'created': 0,
+            'discarded': 0,
+            'waits': 0,
+            'wait_timeouts': 0,
+            'wait_seconds': 0.0,
+            'overflow_created': 0,
+            'failed_pings': 0,
+        }
+
+    def checkout(self, connect):
+        """
+        Return a healthy connection, calling ``connect()`` to open new ones
+        """
+        deadline = None
+        while True:
+            with self._condition:
+                while not self._idle and self._open >= self.size + self.max_overflow:
+                    if deadline is None:
+                        deadline = time.monotonic() + self.timeout
+                        self._stats['waits'] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['wait_timeouts'] += 1
+                        raise OperationalError(
+                            f'Connection pool exhausted: {self._open} connections in use, '
+                            f'waited {self.timeout} seconds'
+                        )
+                    started = time.monotonic()
+                    self._condition.wait(remaining)
+                    self._stats['wait_seconds'] += time.monotonic() - started
+
+                if not self._idle:
+                    # Reserve a slot for a new connection
+                    if self._open >= self.size:
+                        self._stats['overflow_created'] += 1
+                    self._open += 1
+                    break
+                connection, returned_at = self._idle.pop()
+
+            # The idle connection is ours now, so it is pinged (and maybe
+            # closed) without holding up other threads
+            if self._is_reusable(connection, returned_at):
+                with self._condition:
+                    self._stats['checkouts'] += 1
+                return connection
+            self._discard(connection)
+
+        # Connect outside the lock; the slot is already reserved
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._born[id(connection)] = time.monotonic()
+            self._stats['created'] += 1
+            self._stats['checkouts'] += 1
+        return connection
+
+    def checkin(self, connection):
+        """
+        Return ``connection`` to the pool, or close it if it is unusable
+        """
+        healthy = not connection.closed
+        if healthy:
+            try:
+                if not connection.autocommit:
+                    connection.rollback()
+            except Exception:
+                healthy = False
+
+        with self._condition:
+            self._stats['checkins'] += 1
+            # While overflow connections are open, returned ones are closed
+            pooled = healthy and self._open <= self.size
+            if pooled:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+        if not pooled:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'overflow': max(0, self._open - self.size),
+            })
+        stats['wait_seconds'] = round(stats['wait_seconds'], 6)
+        return stats
+
+    def close_all(self):
+        with self._condition:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def _is_reusable(self, connection, returned_at):
+        # Called without the condition, on a connection no other thread holds
+        if connection.closed:
+            return False
+        now = time.monotonic()
+        with self._condition:
+            born = self._born.get(id(connection), now)
+        if now - born > self.max_lifetime:
+            return False
+        if now - returned_at > self.ping_after:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            except Exception:
+                with self._condition:
+                    self._stats['failed_pings'] += 1
+                return False
+        return True
+
+    def _discard(self, connection):
+        """
+        Free the slot of a connection taken out of the pool, then close it outside the lock
+        """
+        with self._condition:
+            self._open -= 1
+            self._born.pop(id(connection), None)
+            self._stats['discarded'] += 1
+            self._condition.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def get_pool(alias, options):
+    """
+    Return the process-wide pool for a database alias
+    """
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(**options)
+        return _pools[alias]
+
+
+def get_pool_stats():
+    """
+    Return {alias: stats} for every pool opened in this process
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
@@ -0,0 +1,25 @@
+from django.db.backends.postgresql import base
+
+from healthcare_project.db.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend that borrows connections from an in-process pool
+
+    Pool options come from the POOL key of the database settings. Django's
+    per-request close hands the connection back to the pool instead of
+    disconnecting, so CONN_MAX_AGE should stay at 0.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get('POOL', {}))
+
+    def get_new_connection(self, conn_params):
+        return self.pool.checkout(lambda: base.DatabaseWrapper.get_new_connection(self, conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.checkin(self.connection)
@@ -0,0 +1,248 @@
+import hashlib
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import DatabaseError
+
+PIN_COOKIE = 'db_pinned_until'
+PIN_KEY = 'db-pin:{digest}'
+
+# Per request; ``alias`` is set once the request is found replica-eligible
+_request_state = ContextVar('replica_request_state', default=None)
+
+_health = {}
+_health_lock = threading.Lock()
+_routed = Counter()
+_routed_lock = threading.Lock()
+
+
+def get_replicas():
+    """
+    Return {alias: weight} of the configured read replicas
+    """
+    return getattr(settings, 'DATABASE_REPLICAS', {})
+
+
+def _record(alias, reason):
+    with _routed_lock:
+        _routed[(alias, reason)] += 1
+
+
+def get_routing_stats():
+    """
+    Return this process's {(alias, reason): requests} routing counters
+    """
+    with _routed_lock:
+        return dict(_routed)
+
+
+class _Health:
+    __slots__ = ('healthy', 'checked_at', 'probing')
+
+    def __init__(self):
+        self.healthy = True
+        self.checked_at = 0.0
+        self.probing = False
+
+
+def _probe(alias):
+    """
+    Open (or reuse) this thread's connection to ``alias`` and check its replication lag
+    """
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # NULL on a primary or a replica that has not replayed anything yet
+                cursor.execute(
+                    'SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)'
+                )
+                lag = float(cursor.fetchone()[0])
+                return lag <= settings.REPLICA_MAX_LAG_SECONDS
+            cursor.execute('SELECT 1')
+            return True
+    except DatabaseError:
+        connection.close()
+        return False
+
+
+def is_healthy(alias):
+    """
+    Whether ``alias`` passed its last probe, probing again every REPLICA_HEALTH_CHECK_INTERVAL
+
+    One thread probes at a time; the others keep using the last result.
+    """
+    now = time.monotonic()
+    with _health_lock:
+        health = _health.setdefault(alias, _Health())
+        if health.probing or now - health.checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+            return health.healthy
+        health.probing = True
+    healthy = False
+    try:
+        healthy = _probe(alias)
+    finally:
+        with _health_lock:
+            health.healthy = healthy
+            health.checked_at = time.monotonic()
+            health.probing = False
+    return healthy
+
+
+def mark_unhealthy(alias):
+    """
+    Take ``alias`` out of rotation until its next probe
+    """
+    with _health_lock:
+        health = _health.setdefault(alias, _Health())
+        health.healthy = False
+        health.checked_at = time.monotonic()
+
+
+def get_health():
+    with _health_lock:
+        return {alias: health.healthy for alias, health in _health.items()}
+
+
+def choose_replica():
+    """
+    Pick a healthy replica at random, weighted by DATABASE_REPLICAS, or None
+    """
+    replicas = [(alias, weight) for alias, weight in get_replicas().items() if weight > 0 and is_healthy(alias)]
+    if not replicas:
+        return None
+    aliases, weights = zip(*replicas)
+    return random.choices(aliases, weights)[0]
+
+
+def _pin_key(request):
+    credentials = request.META.get('HTTP_AUTHORIZATION')
+    if not credentials:
+        return None
+    return PIN_KEY.format(digest=hashlib.sha256(credentials.encode()).hexdigest())
+
+
+def is_pinned(request):
+    """
+    Whether the client wrote recently and must read from the primary
+
+    Browsers carry the pin in a cookie. API clients that drop cookies are
+    pinned by a cache flag keyed by their Authorization header, shared
+    between workers when the cache is Redis.
+    """
+    try:
+        if float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    key = _pin_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+def pin(request, response):
+    """
+    Send the client's reads to the primary for the next REPLICA_PIN_SECONDS
+    """
+    seconds = settings.REPLICA_PIN_SECONDS
+    response.set_cookie(
+        PIN_COOKIE, f'{time.time() + seconds:.0f}', max_age=seconds, httponly=True, samesite='Lax',
+    )
+    key = _pin_key(request)
+    if key is not None:
+        cache.set(key, 1, seconds)
+
+
+class _RequestState:
+    __slots__ = ('alias',)
+
+    def __init__(self):
+        self.alias = None
+
+
+def start_request():
+    """
+    Open the routing state of a request; pass the token to ``finish_request``
+
+    The state is mutable, so a view middleware running in another thread
+    (sync middleware under ASGI) can still route the request.
+    """
+    return _request_state.set(_RequestState())
+
+
+def finish_request(token):
+    _request_state.reset(token)
+
+
+def route_reads(request):
+    """
+    Send the current request's reads to a healthy replica, or to the primary when pinned
+    """
+    state = _request_state.get()
+    if state is None:
+        return
+    if is_pinned(request):
+        alias, reason = DEFAULT_DB_ALIAS, 'pinned'
+    else:
+        alias = choose_replica()
+        alias, reason = (alias, 'replica') if alias else (DEFAULT_DB_ALIAS, 'no_healthy_replica')
+    _record(alias, reason)
+    state.alias = alias
+
+
+@contextmanager
+def primary_reads():
+    """
+    Send the reads of the block to the primary, even in a replica-eligible request
+    """
+    state = _RequestState()
+    state.alias = DEFAULT_DB_ALIAS
+    token = _request_state.set(state)
+    try:
+        yield
+    finally:
+        _request_state.reset(token)
+
+
+def current_read_alias():
+    """
+    The alias the current request reads from, or None when it was not routed
+    """
+    state = _request_state.get()
+    return state.alias if state is not None else None
+
+
+class ReplicaRouter:
+    """
+    Send reads of replica-eligible requests to a replica, everything else to the primary
+
+    ``ReplicaMiddleware`` marks GET requests to the patient, doctor and
+    mapping views as eligible and picks the replica once per request, so
+    all of a request's reads go to the same database. Writes, migrations
+    and reads outside those requests use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_read_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows
+        aliases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replicas():
+            return False
+        return None
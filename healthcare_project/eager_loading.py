@@ -0,0 +1,64 @@
+from rest_framework.serializers import ListSerializer
+
+
+class EagerLoadingMixin:
+    """
+    Serializer mixin declaring the relations a serializer reads
+
+    Serializers list the relations they traverse in ``select_related_fields``
+    / ``prefetch_related_fields`` and, for read-only list serializers, the
+    columns they render in ``only_fields``. Nested serializers declared on
+    the class contribute their own plan prefixed with their ``source``, so
+    ``setup_eager_loading`` returns a queryset that renders without any
+    per-row queries.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    only_fields = None
+
+    @classmethod
+    def get_eager_loading_plan(cls, prefix=''):
+        """
+        Return (select_related, prefetch_related, only) for this serializer
+        """
+        select_related = [prefix + name for name in cls.select_related_fields]
+        prefetch_related = [prefix + name for name in cls.prefetch_related_fields]
+        only = None
+        if cls.only_fields is not None:
+            # Deferring a relation that is also select_related is an error
+            only = [prefix + name for name in cls.only_fields]
+            only.extend(select_related)
+
+        for name, field in getattr(cls, '_declared_fields', {}).items():
+            many = isinstance(field, ListSerializer)
+            child = field.child if many else field
+            if not isinstance(child, EagerLoadingMixin):
+                continue
+            source = field.source or name
+            if many:
+                # To-many relations are fetched in one extra query each
+                prefetch_related.append(prefix + source)
+                continue
+            nested = type(child).get_eager_loading_plan(prefix=f'{prefix}{source}__')
+            select_related.append(prefix + source)
+            select_related.extend(nested[0])
+            prefetch_related.extend(nested[1])
+            if only is not None:
+                only.append(prefix + source)
+                only.extend(nested[2] or ())
+
+        return select_related, prefetch_related, only
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """
+        Apply the serializer's loading plan to ``queryset``
+        """
+        select_related, prefetch_related, only = cls.get_eager_loading_plan()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if only is not None:
+            queryset = queryset.only(*only)
+        return queryset
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db.models import F
+
+from healthcare_project.metrics import timed_serialization
+
+
+class FlatSerializerMixin:
+    """
+    Read-only list mode building rows straight from ``.values()``
+
+    With ``FLAT_LIST_SERIALIZERS`` on, ``setup_list_queryset`` selects the
+    ``Meta.fields`` columns as dicts and ``list_data`` returns them in field
+    order, skipping model instances and per-field ``to_representation``.
+    Fields that are not plain columns are mapped in ``flat_sources``
+    (output name: ORM lookup) or ``flat_expressions`` (output name: SQL
+    expression). Decimals, dates and datetimes are left to the renderer.
+    """
+    flat_sources = {}
+    flat_expressions = {}
+
+    @classmethod
+    def flat_enabled(cls):
+        return settings.FLAT_LIST_SERIALIZERS
+
+    @classmethod
+    def setup_list_queryset(cls, queryset):
+        """
+        Prepare ``queryset`` for ``list_data`` in the active mode
+        """
+        if not cls.flat_enabled():
+            return cls.setup_eager_loading(queryset)
+
+        columns = []
+        renamed = {}
+        for name in cls.Meta.fields:
+            if name in cls.flat_expressions:
+                continue
+            source = cls.flat_sources.get(name, name)
+            if source == name:
+                columns.append(name)
+            else:
+                renamed[name] = F(source)
+        return queryset.values(*columns, **renamed, **cls.flat_expressions)
+
+    @classmethod
+    def list_data(cls, rows):
+        """
+        Serialize a page from ``setup_list_queryset``
+        """
+        if not cls.flat_enabled():
+            return cls(rows, many=True).data
+        fields = cls.Meta.fields
+        with timed_serialization():
+            return [{name: row[name] for name in fields} for row in rows]
@@ -0,0 +1,235 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from healthcare_project.db import replicas
+from healthcare_project.db.pool import get_pool_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Query count, DB time and serializer time accumulated for one request
+    """
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+def start_request():
+    """
+    Start collecting for the current request and return (collector, reset token)
+    """
+    collector = RequestMetrics()
+    return collector, _current.set(collector)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def _record_query(execute, sql, params, many, context):
+    collector = _current.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.queries += 1
+        collector.db_time += time.perf_counter() - start
+
+
+def _install_query_recorder(sender=None, connection=None, **kwargs):
+    # Stays installed for the connection's lifetime, like
+    # ``connection.execute_wrapper()`` around every request, but also
+    # covers queries run in sync_to_async worker threads
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_recorder():
+    connection_created.connect(_install_query_recorder, dispatch_uid='healthcare_project.metrics')
+    for connection in connections.all(initialized_only=True):
+        _install_query_recorder(connection=connection)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Add the time spent in the block to the request's serializer time
+
+    Nested blocks are not counted twice.
+    """
+    collector = _current.get()
+    if collector is None or collector.serializing:
+        yield
+        return
+    collector.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        collector.serializer_time += time.perf_counter() - start
+        collector.serializing = False
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin adding time spent in ``to_representation`` to the request metrics
+
+    Only the outermost serializer is timed, so nested serializers and the
+    children of a ``many=True`` list are not counted twice.
+    """
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+class Histogram:
+    """
+    Cumulative Prometheus histogram keyed by a tuple of label values
+    """
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # One slot per bucket plus +Inf, then the running sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self):
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, values in sorted(series.items()):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            prefix = label_text + ',' if label_text else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {values[-1]}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_LABELS = ('method', 'route', 'status')
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Time to build the response.', REQUEST_LABELS, LATENCY_BUCKETS,
+)
+request_queries = Histogram(
+    'http_request_db_queries', 'SQL queries run per request.', REQUEST_LABELS, QUERY_COUNT_BUCKETS,
+)
+request_db_duration = Histogram(
+    'http_request_db_duration_seconds', 'Time spent executing SQL per request.', REQUEST_LABELS, LATENCY_BUCKETS,
+)
+request_serializer_duration = Histogram(
+    'http_request_serializer_duration_seconds', 'Time spent in serializers per request.', REQUEST_LABELS,
+    LATENCY_BUCKETS,
+)
+
+HISTOGRAMS = [request_duration, request_queries, request_db_duration, request_serializer_duration]
+
+
+def observe_request(labels, duration, collector):
+    request_duration.observe(labels, duration)
+    request_queries.observe(labels, collector.queries)
+    request_db_duration.observe(labels, collector.db_time)
+    request_serializer_duration.observe(labels, collector.serializer_time)
+
+
+_collectors = []
+
+
+def register_collector(name, kind, documentation, collect):
+    """
+    Export values computed on scrape
+
+    ``collect`` returns a number, or a dict mapping label tuples such as
+    ``(('database', 'default'),)`` to numbers. ``kind`` is a Prometheus
+    type such as ``counter`` or ``gauge``.
+    """
+    _collectors.append((name, kind, documentation, collect))
+
+
+def render():
+    """
+    Return every metric in the Prometheus text exposition format
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.collect())
+    for name, kind, documentation, collect in _collectors:
+        values = collect()
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            if value is None:
+                continue
+            label_text = ','.join(f'{label}="{_escape(label_value)}"' for label, label_value in labels)
+            lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def _pool_stat(key):
+    def collect():
+        return {(('database', alias),): stats[key] for alias, stats in get_pool_stats().items()}
+    return collect
+
+
+register_collector('db_pool_connections_open', 'gauge', 'Connections opened by the pool.', _pool_stat('open'))
+register_collector('db_pool_connections_idle', 'gauge', 'Idle connections in the pool.', _pool_stat('idle'))
+register_collector('db_pool_checkouts_total', 'counter', 'Connections handed out by the pool.', _pool_stat('checkouts'))
+register_collector('db_pool_waits_total', 'counter', 'Checkouts that waited for a connection.', _pool_stat('waits'))
+
+
+def _routing_stats():
+    return {
+        (('database', alias), ('reason', reason)): count
+        for (alias, reason), count in replicas.get_routing_stats().items()
+    }
+
+
+def _replica_health():
+    return {(('database', alias),): int(healthy) for alias, healthy in replicas.get_health().items()}
+
+
+register_collector(
+    'db_read_routing_total', 'counter', 'Replica-eligible requests by the database serving their reads.',
+    _routing_stats,
+)
+register_collector('db_replica_healthy', 'gauge', 'Whether the replica passed its last health probe.', _replica_health)
@@ -0,0 +1,168 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.utils import OperationalError
+
+from healthcare_project import metrics
+from healthcare_project.db import replicas
+from sharding import shards
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class InstrumentationMiddleware:
+    """
+    Record latency, SQL queries, DB time and serializer time per route
+
+    Observations feed the histograms served at ``/metrics``. With
+    ``SERVER_TIMING_HEADER`` on, the same numbers are sent back in a
+    ``Server-Timing`` header. Routes are labelled with their URL pattern,
+    not the concrete path, so label cardinality stays bounded.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = settings.SERVER_TIMING_HEADER
+        metrics.install_query_recorder()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        collector, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.finish(request, response, collector, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        collector, token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        return self.finish(request, response, collector, time.perf_counter() - start)
+
+    def finish(self, request, response, collector, duration):
+        match = request.resolver_match
+        route = '/' + match.route if match is not None else 'unmatched'
+        metrics.observe_request((request.method, route, response.status_code), duration, collector)
+
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'total;dur={duration * 1000:.2f}, '
+                f'db;dur={collector.db_time * 1000:.2f};desc="{collector.queries} queries", '
+                f'serializer;dur={collector.serializer_time * 1000:.2f}'
+            )
+        return response
+
+
+class ShardMiddleware:
+    """
+    Route the patient and mapping queries of a request to its user's shard
+
+    The user is looked up on first use, once authentication has run. Does
+    nothing with a single shard.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = shards.is_sharded()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        # Streamed exports keep reading after this returns and name their shard
+        token = shards.start_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            shards.finish_request(token)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        token = shards.start_request(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            shards.finish_request(token)
+
+
+class ReplicaMiddleware:
+    """
+    Serve GET requests to the patient, doctor and mapping views from a read replica
+
+    Successful writes pin the client to the primary for
+    ``REPLICA_PIN_SECONDS``, so it reads its own changes however far the
+    replicas lag. A replica that fails mid-request is taken out of
+    rotation until its next health probe. Does nothing without
+    ``DATABASE_REPLICAS``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = bool(replicas.get_replicas())
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        # Streamed exports keep reading after this returns, from the primary
+        token = replicas.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.finish_request(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        token = replicas.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            replicas.finish_request(token)
+        return self.finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.enabled or request.method not in SAFE_METHODS:
+            return None
+        if view_func.__module__.split('.')[0] in settings.REPLICA_READ_APPS:
+            replicas.route_reads(request)
+        return None
+
+    def process_exception(self, request, exception):
+        alias = replicas.current_read_alias()
+        if isinstance(exception, OperationalError) and alias not in (None, DEFAULT_DB_ALIAS):
+            replicas.mark_unhealthy(alias)
+        return None
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            replicas.pin(request, response)
+        return response
+
@@ -0,0 +1,265 @@
+import base64
+import binascii
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CreatedAtCursorPagination(BasePagination):
+    """
+    Keyset pagination over (-created_at, -id)
+
+    Every page is fetched with a seek predicate on the created_at index
+    instead of an OFFSET, so deep pages cost the same as the first one.
+    Cursors are opaque, url-safe tokens carrying the boundary row's
+    created_at and id.
+
+    The total count is taken from the page itself when everything fits on
+    the first page, or from ``known_count`` when the view sets it. Otherwise
+    it comes from the cache, the planner's row estimate for large unfiltered
+    PostgreSQL tables, or a COUNT(*) that is then cached for
+    ``count_cache_timeout`` seconds.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    ordering_field = 'created_at'
+    tie_breaker_field = 'id'
+
+    count_cache_timeout = 60
+    estimate_count_threshold = 100000
+
+    # Exact total the view already knows, e.g. from its ETag aggregate
+    known_count = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._finish(list(self._seek(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self._finish([row async for row in self._seek(queryset, request)])
+
+    def _seek(self, queryset, request):
+        """
+        Return the slice of ``queryset`` holding the requested page plus one row
+        """
+        self.request = request
+        self.queryset = queryset
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        fields = self.get_keyset()
+        if cursor is None:
+            reverse, position = False, None
+        else:
+            reverse, position = cursor
+
+        if reverse:
+            queryset = queryset.order_by(*fields)
+        else:
+            queryset = queryset.order_by(*[f'-{field}' for field in fields])
+        if position:
+            queryset = queryset.filter(self.seek_predicate(fields, position, 'gt' if reverse else 'lt'))
+
+        self.reverse = reverse
+        self.position = position
+        # Fetch one extra row to find out whether there is a further page
+        return queryset[:self.page_size + 1]
+
+    def get_keyset(self):
+        """
+        The fields rows are ordered by, all descending on the first page
+        """
+        return (self.ordering_field, self.tie_breaker_field)
+
+    def seek_predicate(self, fields, position, lookup):
+        """
+        Rows whose keyset tuple is past ``position`` in the ``lookup`` direction
+        """
+        predicate = Q()
+        for index, field in enumerate(fields):
+            equal = dict(zip(fields[:index], position[:index]))
+            predicate |= Q(**equal, **{f'{field}__{lookup}': position[index]})
+        return predicate
+
+    def _finish(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        return self.page
+
+    def get_count(self):
+        """
+        Return the total number of rows without re-running the page query
+        """
+        if not self.has_next and not self.has_previous:
+            return len(self.page)
+        if self.known_count is not None:
+            return self.known_count
+
+        queryset = self.queryset
+        if not queryset.query.where:
+            estimate = self.estimate_count(queryset)
+            if estimate is not None and estimate >= self.estimate_count_threshold:
+                return estimate
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = 'list-count:' + hashlib.md5(f'{queryset.db}:{sql}:{params}'.encode()).hexdigest()
+        return cache.get_or_set(key, queryset.count, self.count_cache_timeout)
+
+    async def aget_count(self):
+        if not self.has_next and not self.has_previous:
+            return len(self.page)
+        if self.known_count is not None:
+            return self.known_count
+        return await sync_to_async(self.get_count)()
+
+    def estimate_count(self, queryset):
+        """
+        Return PostgreSQL's reltuples estimate for the queryset's table
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if not row or row[0] < 0:
+            return None
+        return row[0]
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 20
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                requested = int(requested)
+            except ValueError:
+                return page_size
+            if requested > 0:
+                return min(requested, self.max_page_size)
+        return page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(reverse=False, row=self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(reverse=True, row=self.page[0])
+
+    def get_paginated_data(self, data, results_key='results'):
+        return {
+            'count': self.get_count(),
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            results_key: data,
+        }
+
+    async def aget_paginated_data(self, data, results_key='results'):
+        return {
+            'count': await self.aget_count(),
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            results_key: data,
+        }
+
+    def get_paginated_response(self, data, results_key='results'):
+        return Response(self.get_paginated_data(data, results_key))
+
+    def encode_cursor(self, reverse, row):
+        # Rows are model instances or, from flat list serializers, dicts
+        if isinstance(row, dict):
+            values = [row[field] for field in self.get_keyset()]
+        else:
+            values = [getattr(row, field) for field in self.get_keyset()]
+        values = [value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in values]
+        token = '|'.join(['p' if reverse else 'n', *values])
+        encoded = base64.urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """
+        Return (reverse, keyset values) or None when no cursor is given
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        fields = self.get_keyset()
+        try:
+            token = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            direction, *values = token.split('|')
+            if len(values) != len(fields):
+                raise ValueError
+            position = tuple(
+                parse_datetime(value) if field == self.ordering_field else int(value)
+                for field, value in zip(fields, values)
+            )
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if direction not in ('n', 'p') or None in position:
+            raise NotFound(self.invalid_cursor_message)
+
+        return direction == 'p', position
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class RankedCursorPagination(CreatedAtCursorPagination):
+    """
+    Keyset pagination over (-rank, -created_at, -id) for ranked search results
+
+    The rank is an annotation on the queryset, so the seek predicate
+    recomputes it; only rows matching the search are ranked at all.
+    """
+    rank_field = 'search_rank'
+
+    def get_keyset(self):
+        return (self.rank_field, self.ordering_field, self.tie_breaker_field)
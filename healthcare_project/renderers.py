@@ -0,0 +1,62 @@
+import datetime
+from decimal import Decimal
+
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class FastJSONEncoder(encoders.JSONEncoder):
+    """
+    DRF's encoder, rendering raw values the way the serializer fields do
+
+    Flat ``.values()`` rows hand the renderer model values directly, so
+    ``Decimal`` becomes a string (COERCE_DECIMAL_TO_STRING) and datetimes
+    keep their microseconds like DateTimeField output.
+    """
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        if isinstance(obj, datetime.datetime):
+            value = obj.isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return super().default(obj)
+
+
+_fallback_encoder = FastJSONEncoder()
+
+
+def _orjson_default(obj):
+    if isinstance(obj, Promise):
+        return str(obj)
+    return _fallback_encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed
+
+    orjson writes dicts, lists, dates, datetimes and UUIDs natively; other
+    types go through ``FastJSONEncoder``. Indented (browsable) output and
+    installs without orjson use the stdlib path.
+    """
+    encoder_class = FastJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        rendered = orjson.dumps(data, default=_orjson_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        # Like JSONRenderer, keep the output a strict subset of JavaScript
+        if b'\xe2\x80\xa8' in rendered or b'\xe2\x80\xa9' in rendered:
+            rendered = rendered.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return rendered
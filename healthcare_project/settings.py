@@ -29,15 +29,21 @@ INSTALLED_APPS = [
     'patients',
     'doctors',
     'mappings',
+    'analytics',
+    'benchmarks',
+    'sharding',
 ]
 
 MIDDLEWARE = [
+    'healthcare_project.middleware.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'healthcare_project.middleware.ShardMiddleware',
+    'healthcare_project.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,8 +67,18 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'healthcare_project.wsgi.application'
+ASGI_APPLICATION = 'healthcare_project.asgi.application'
+
+# Serve the read-heavy endpoints with async views; asgi.py turns this on
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
 
 # Database
+# DB_CONNECTION_MODE:
+#   direct     - open and close a connection per request
+#   persistent - keep one connection per worker thread for DB_CONN_MAX_AGE seconds
+#   pooled     - borrow connections from a bounded in-process pool
+DB_CONNECTION_MODE = config('DB_CONNECTION_MODE', default='persistent')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -71,9 +87,80 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='password'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
     }
 }
 
+if DB_CONNECTION_MODE == 'persistent':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    })
+elif DB_CONNECTION_MODE == 'pooled':
+    DATABASES['default'].update({
+        'ENGINE': 'healthcare_project.db.pooled_postgresql',
+        'POOL': {
+            'size': config('DB_POOL_SIZE', default=10, cast=int),
+            'max_overflow': config('DB_POOL_MAX_OVERFLOW', default=5, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10.0, cast=float),
+            'ping_after': config('DB_POOL_PING_AFTER', default=30.0, cast=float),
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800.0, cast=float),
+        },
+    })
+
+# Shards: DB_SHARDS="host[:port],..." adds shard_1, shard_2, ... with the
+# default database's name and credentials. Each user's patients and
+# mappings live on one shard (the default database included); users and
+# doctors are copied to all of them. Run sync_shards after adding one
+DATABASE_SHARDS = ['default']
+for _index, _shard in enumerate(filter(None, config('DB_SHARDS', default='').split(',')), start=1):
+    _host, _, _port = _shard.strip().partition(':')
+    DATABASES[f'shard_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+    }
+    DATABASE_SHARDS.append(f'shard_{_index}')
+SHARD_MAP_CACHE_TIMEOUT = config('SHARD_MAP_CACHE_TIMEOUT', default=60, cast=int)
+# Patient and mapping ids of shard N start above N * SHARD_ID_SPAN, so they stay unique across shards
+SHARD_ID_SPAN = 10 ** 12
+
+# Read replicas: DB_REPLICAS="host[:port][*weight],..." adds replica_1,
+# replica_2, ... with the primary's credentials. GET requests to the
+# REPLICA_READ_APPS views read from a healthy replica, except for clients
+# that wrote within REPLICA_PIN_SECONDS
+DATABASE_REPLICAS = {}
+for _index, _replica in enumerate(filter(None, config('DB_REPLICAS', default='').split(',')), start=1):
+    _address, _, _weight = _replica.strip().partition('*')
+    _host, _, _port = _address.partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS[f'replica_{_index}'] = int(_weight or 1)
+
+DATABASE_ROUTERS = [
+    'sharding.shards.ShardRouter',
+    'healthcare_project.db.replicas.ReplicaRouter',
+]
+REPLICA_READ_APPS = ['patients', 'doctors', 'mappings']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=15, cast=int)
+REPLICA_HEALTH_CHECK_INTERVAL = config('REPLICA_HEALTH_CHECK_INTERVAL', default=5.0, cast=float)
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=30.0, cast=float)
+
+# Authentication backends
+AUTHENTICATION_BACKENDS = [
+    'authentication.backends.PooledModelBackend',
+]
+
+# Password hash verification pool; 0 workers verifies inline on the request thread
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=0, cast=int)
+PASSWORD_HASH_QUEUE_SIZE = config('PASSWORD_HASH_QUEUE_SIZE', default=32, cast=int)
+PASSWORD_HASH_QUEUE_TIMEOUT = config('PASSWORD_HASH_QUEUE_TIMEOUT', default=5.0, cast=float)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -102,22 +189,91 @@ STATIC_URL = 'static/'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# Local memory by default; set REDIS_URL to share the cache between workers
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a cached doctor directory payload is kept
+DOCTOR_CACHE_TIMEOUT = config('DOCTOR_CACHE_TIMEOUT', default=300, cast=int)
+
+# Largest batch accepted by the bulk import endpoints
+BULK_IMPORT_MAX_ROWS = config('BULK_IMPORT_MAX_ROWS', default=10000, cast=int)
+
+# Request instrumentation: latency, SQL and serializer timings per route,
+# scraped from /metrics (optionally behind a bearer token)
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+
+# Appointment reminders go out this long before the appointment, through
+# the 'log' or 'file' sink or the dotted path of a sink class
+APPOINTMENT_REMINDER_LEAD_MINUTES = config('APPOINTMENT_REMINDER_LEAD_MINUTES', default=1440, cast=int)
+APPOINTMENT_REMINDER_SINK = config('APPOINTMENT_REMINDER_SINK', default='log')
+APPOINTMENT_REMINDER_FILE = config('APPOINTMENT_REMINDER_FILE', default='appointment_reminders.jsonl')
+
+# List endpoints build rows from .values() instead of model instances
+FLAT_LIST_SERIALIZERS = config('FLAT_LIST_SERIALIZERS', default=True, cast=bool)
+
 # Custom user model
 AUTH_USER_MODEL = 'authentication.User'
 
 # Django REST Framework settings
+# 'database' (default) loads the User row on every request, so deactivated
+# and deleted users are rejected at once. 'stateless' builds request.user
+# from token claims without a query; a user deactivated, deleted or given
+# a new password then stays authenticated until their access token
+# expires (SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'], 60 minutes)
+JWT_AUTH_MODE = config('JWT_AUTH_MODE', default='database')
+
+JWT_AUTHENTICATION_CLASSES = {
+    'stateless': 'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
+    'database': 'rest_framework_simplejwt.authentication.JWTAuthentication',
+}
+
+# Seconds the full user row behind a stateless token user is cached; saves
+# and deletes drop it at once in this process (and everywhere with Redis)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=30, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        JWT_AUTHENTICATION_CLASSES[JWT_AUTH_MODE],
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'healthcare_project.renderers.FastJSONRenderer',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'DEFAULT_PAGINATION_CLASS': 'healthcare_project.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': 20,
+    # Sliding-window limits of the sign-in endpoints, per client address and
+    # per submitted email ('<requests>/<second|minute|hour|day>', empty to lift).
+    # Counted in the default cache: without REDIS_URL each worker process
+    # counts on its own, so N workers allow N times these rates
+    # (check --deploy warns, authentication.W001)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('THROTTLE_LOGIN_IP', default='30/minute') or None,
+        'login_email': config('THROTTLE_LOGIN_EMAIL', default='10/minute') or None,
+        'register_ip': config('THROTTLE_REGISTER_IP', default='20/hour') or None,
+        'register_email': config('THROTTLE_REGISTER_EMAIL', default='5/hour') or None,
+        'token_refresh_ip': config('THROTTLE_TOKEN_REFRESH_IP', default='60/minute') or None,
+    },
+    # Reverse proxies in front of the app; 0 trusts REMOTE_ADDR only, so
+    # clients cannot pick their throttle key with X-Forwarded-For
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # Simple JWT settings
@@ -141,6 +297,7 @@ SIMPLE_JWT = {
     'USER_AUTHENTICATION_RULE': 'rest_framework_simplejwt.authentication.default_user_authentication_rule',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_USER_CLASS': 'authentication.tokens.ClaimsUser',
 }
 
 # CORS settings
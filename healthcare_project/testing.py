@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import date
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+_sequence = count(1)
+
+
+@contextmanager
+def assert_num_queries(num, using='default'):
+    """
+    Assert the block runs exactly ``num`` queries on the ``using`` database
+
+    Unlike ``TestCase.assertNumQueries`` this works from plain pytest
+    functions and benchmark scripts. Running the same block against result
+    sets of different sizes with one ``num`` proves it is free of N+1 queries.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    executed = len(context.captured_queries)
+    if executed != num:
+        queries = '\n'.join(
+            f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, start=1)
+        )
+        raise AssertionError(f'{executed} queries executed, {num} expected\nCaptured queries were:\n{queries}')
+
+
+def create_user(**fields):
+    n = next(_sequence)
+    fields = {
+        'email': f'user{n}@example.com', 'username': f'user{n}',
+        'first_name': 'Test', 'last_name': f'User{n}', **fields,
+    }
+    return get_user_model().objects.create_user(password='Passw0rd!Passw0rd', **fields)
+
+
+def create_patient(created_by, **fields):
+    from patients.models import Patient
+
+    n = next(_sequence)
+    fields = {
+        'first_name': 'Pat', 'last_name': f'Ient{n}', 'email': f'patient{n}@example.com',
+        'phone_number': '+919876543210', 'date_of_birth': date(1990, 1, 1), 'gender': 'F',
+        'blood_group': 'O+', 'address_line_1': '1 Main Road', 'city': 'Pune', 'state': 'MH',
+        'postal_code': '411001', 'emergency_contact_name': 'Kin',
+        'emergency_contact_phone': '+919876543211', **fields,
+    }
+    return Patient.objects.create(created_by=created_by, **fields)
+
+
+def create_doctor(created_by, **fields):
+    from doctors.models import Doctor
+
+    n = next(_sequence)
+    fields = {
+        'first_name': 'Doc', 'last_name': f'Tor{n}', 'email': f'doctor{n}@example.com',
+        'phone_number': '+919876543212', 'gender': 'M', 'license_number': f'LIC{n}',
+        'specialization': 'Cardiology', 'qualification': 'MD', 'years_of_experience': 10,
+        'hospital_name': 'City Hospital', 'hospital_address': '2 Main Road', 'consultation_fee': '500.00',
+        'available_days': 'Mon-Fri', 'available_hours': '9:00 AM - 5:00 PM', 'languages_spoken': 'English',
+        **fields,
+    }
+    return Doctor.objects.create(created_by=created_by, **fields)
+
+
+class ExtraDatabasesTestCase(TransactionTestCase):
+    """
+    TransactionTestCase with ``extra_databases`` added as SQLite files
+
+    The aliases are created and migrated once per class, before any
+    DATABASE_SHARDS or DATABASE_REPLICAS override applies; a replica
+    alias refuses migrations. Enable those overrides per test, in
+    ``setUp``, so the flush after each test still empties every database.
+    """
+    databases = '__all__'
+    extra_databases = ()
+
+    @classmethod
+    def setUpClass(cls):
+        cls._database_dir = tempfile.mkdtemp()
+        for alias in cls.extra_databases:
+            connections.settings[alias] = connections.configure_settings({
+                DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+                alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(cls._database_dir, alias)},
+            })[alias]
+            call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in cls.extra_databases:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        shutil.rmtree(cls._database_dir)
+
+    def override(self, **settings):
+        """
+        Apply ``settings`` until the end of the test, before the databases are flushed
+        """
+        override = override_settings(**settings)
+        override.enable()
+        self.addCleanup(override.disable)
@@ -0,0 +1,327 @@
+import datetime
+import json
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from doctors.models import Doctor
+from patients.models import Patient
+from sharding import shards
+from sharding.models import ShardAssignment
+from . import metrics, renderers
+from .db import replicas
+from .db.pool import ConnectionPool
+from .testing import ExtraDatabasesTestCase, create_doctor, create_patient, create_user
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql):
+        self.connection.pinging.set()
+        self.connection.release.wait(5)
+
+
+class FakeConnection:
+    closed = False
+    autocommit = True
+
+    def __init__(self):
+        self.pinging = threading.Event()
+        self.release = threading.Event()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_ping_does_not_hold_the_pool_lock(self):
+        pool = ConnectionPool(size=2, max_overflow=0, ping_after=0.0)
+        stale = pool.checkout(FakeConnection)
+        pool.checkin(stale)
+        time.sleep(0.01)
+
+        pinger = threading.Thread(target=pool.checkout, args=(FakeConnection,))
+        pinger.start()
+        self.assertTrue(stale.pinging.wait(5))
+        # The first checkout is stuck in its ping; another one opens a connection meanwhile
+        started = time.monotonic()
+        other = pool.checkout(FakeConnection)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(pool.stats()['open'], 2)
+
+        stale.release.set()
+        pinger.join(5)
+        pool.checkin(other)
+        self.assertEqual(pool.stats()['checkouts'], 3)
+
+    def test_failed_connection_frees_its_slot(self):
+        pool = ConnectionPool(size=1, max_overflow=0, timeout=0.1)
+        connection = pool.checkout(FakeConnection)
+        connection.closed = True
+        pool.checkin(connection)
+        self.assertEqual(pool.stats()['open'], 0)
+        self.assertIsNot(pool.checkout(FakeConnection), connection)
+
+
+class HistogramTests(SimpleTestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', ('route',), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(('/a/',), value)
+        lines = histogram.collect()
+        self.assertEqual(lines[2:], [
+            'test_seconds_bucket{route="/a/",le="0.1"} 2',
+            'test_seconds_bucket{route="/a/",le="1.0"} 3',
+            'test_seconds_bucket{route="/a/",le="+Inf"} 4',
+            'test_seconds_sum{route="/a/"} 3.65',
+            'test_seconds_count{route="/a/"} 4',
+        ])
+
+
+class InstrumentationMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def observed(self, route):
+        """
+        How many requests /metrics has seen for GET ``route`` with status 200
+        """
+        prefix = f'http_request_db_queries_count{{method="GET",route="{route}",status="200"}} '
+        for line in self.client.get('/metrics').content.decode().splitlines():
+            if line.startswith(prefix):
+                return int(line[len(prefix):])
+        return 0
+
+    def test_requests_are_labelled_by_their_url_pattern(self):
+        patient = create_patient(self.user)
+        before = self.observed('/api/patients/<int:pk>/')
+        self.client.get(f'/api/patients/{patient.pk}/')
+        self.client.get('/api/patients/0/')
+        self.assertEqual(self.observed('/api/patients/<int:pk>/'), before + 1)
+
+    def test_server_timing_reports_the_queries(self):
+        response = self.client.get('/api/patients/')
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[0-9.]+, db;dur=[0-9.]+;desc="2 queries", serializer;dur=')
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_server_timing_can_be_turned_off(self):
+        self.assertFalse(APIClient().get('/metrics').has_header('Server-Timing'))
+
+    @override_settings(METRICS_AUTH_TOKEN='scrape')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', response.content.decode())
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        'fee': Decimal('500.00'),
+        'at': datetime.datetime(2024, 5, 6, 10, 30, 0, 123456, tzinfo=datetime.timezone.utc),
+        'on': datetime.date(2024, 5, 6),
+        'id': uuid.UUID(int=1),
+        'label': gettext_lazy('Active'),
+        'text': 'line\u2028separator',
+        'rows': [{'n': 1, 'none': None, 'flag': True}],
+    }
+
+    def render(self, renderer):
+        return json.loads(renderer.render(self.data, 'application/json'))
+
+    def test_matches_drf_json_renderer(self):
+        fast = self.render(renderers.FastJSONRenderer())
+        # Raw decimals render like DecimalField output, where DRF's encoder gives a float
+        self.assertEqual(fast.pop('fee'), '500.00')
+        drf = json.loads(JSONRenderer().render(self.data, 'application/json'))
+        del drf['fee']
+        self.assertEqual(fast, drf)
+
+    def test_stdlib_fallback_matches_orjson(self):
+        if renderers.orjson is None:
+            self.skipTest('orjson is not installed')
+        fast = self.render(renderers.FastJSONRenderer())
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(self.render(renderers.FastJSONRenderer()), fast)
+
+    def test_output_stays_valid_javascript(self):
+        rendered = renderers.FastJSONRenderer().render({'text': 'a\u2028b\u2029c'}, 'application/json')
+        self.assertEqual(rendered, b'{"text":"a\\u2028b\\u2029c"}')
+
+    def test_indented_and_empty_output(self):
+        rendered = renderers.FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+        self.assertEqual(renderers.FastJSONRenderer().render(None), b'')
+
+
+class FlatListSerializerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for _ in range(3):
+            create_patient(self.user)
+            create_doctor(self.user, consultation_fee='1234.50')
+
+    def test_flat_lists_match_the_model_serializers(self):
+        for path in ('/api/patients/', '/api/doctors/', '/api/doctors/?search=doc'):
+            flat = self.client.get(path).json()
+            cache.clear()
+            with override_settings(FLAT_LIST_SERIALIZERS=False):
+                self.assertEqual(self.client.get(path).json(), flat, path)
+
+
+class ReplicaRoutingTests(ExtraDatabasesTestCase):
+    extra_databases = ('replica', 'replica_2', 'shard_1')
+
+    def setUp(self):
+        self.override(DATABASE_REPLICAS={'replica': 1})
+        cache.clear()
+        replicas._health.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # The replica lags: it has the user and the patient, but not the rename
+        self.patient = create_patient(self.user, first_name='Primary')
+        self.user.save(using='replica')
+        Patient.objects.using('replica').create(**{
+            field.attname: getattr(self.patient, field.attname) for field in Patient._meta.concrete_fields
+        })
+        Patient.objects.using('replica').filter(pk=self.patient.pk).update(first_name='Replica')
+
+    def first_names(self, client=None):
+        response = (client or self.client).get('/api/patients/')
+        return [patient['first_name'] for patient in response.json()['patients']]
+
+    def create_patient_request(self, client=None):
+        return (client or self.client).post('/api/patients/', {
+            'first_name': 'New', 'last_name': 'Patient', 'email': 'new@example.com', 'phone_number': '+919876543210',
+            'date_of_birth': '1990-01-01', 'gender': 'F', 'blood_group': 'O+', 'address_line_1': '1 Main Road',
+            'city': 'Pune', 'state': 'MH', 'postal_code': '411001', 'emergency_contact_name': 'Kin',
+            'emergency_contact_phone': '+919876543211',
+        }, format='json')
+
+    def test_list_reads_come_from_the_replica(self):
+        with CaptureQueriesContext(connections['default']) as primary:
+            self.assertEqual(self.first_names(), ['Replica'])
+        self.assertEqual(len(primary), 0)
+        # Outside a request reads stay on the primary
+        self.assertEqual(Patient.objects.get(pk=self.patient.pk).first_name, 'Primary')
+
+    def test_weighted_choice(self):
+        self.override(DATABASE_REPLICAS={'replica': 3, 'replica_2': 1, 'shard_1': 0})
+        random.seed(0)
+        picks = [replicas.choose_replica() for _ in range(2000)]
+        self.assertNotIn('shard_1', picks)
+        self.assertAlmostEqual(picks.count('replica') / len(picks), 0.75, delta=0.05)
+
+    def test_unhealthy_replicas_are_skipped_until_probed_again(self):
+        self.override(DATABASE_REPLICAS={'replica': 1, 'replica_2': 1}, REPLICA_HEALTH_CHECK_INTERVAL=3600)
+        replicas.mark_unhealthy('replica')
+        self.assertEqual({replicas.choose_replica() for _ in range(50)}, {'replica_2'})
+        replicas.mark_unhealthy('replica_2')
+        self.assertIsNone(replicas.choose_replica())
+        self.assertEqual(self.first_names(), ['Primary'])
+
+        with self.settings(REPLICA_HEALTH_CHECK_INTERVAL=0):
+            self.assertTrue(replicas.is_healthy('replica'))
+        self.assertEqual(replicas.get_health(), {'replica': True, 'replica_2': False})
+
+    def test_failing_replica_is_taken_out_of_rotation(self):
+        self.override(REPLICA_HEALTH_CHECK_INTERVAL=3600)
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('ALTER TABLE patients_patient RENAME TO patients_patient_gone')
+        self.addCleanup(self.restore_replica_table)
+
+        self.client.raise_request_exception = False
+        self.assertEqual(self.client.get('/api/patients/').status_code, 500)
+        self.assertFalse(replicas.is_healthy('replica'))
+        self.assertEqual(self.first_names(), ['Primary'])
+
+    def restore_replica_table(self):
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('ALTER TABLE patients_patient_gone RENAME TO patients_patient')
+
+    def test_write_pins_the_client_by_cookie(self):
+        self.assertEqual(self.create_patient_request().status_code, 201)
+        self.assertIn(replicas.PIN_COOKIE, self.client.cookies)
+        self.assertEqual(sorted(self.first_names()), ['New', 'Primary'])
+
+        self.client.cookies.clear()
+        self.assertEqual(self.first_names(), ['Replica'])
+
+    def test_write_pins_the_authorization_header(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.assertEqual(self.first_names(client), ['Replica'])
+        self.assertEqual(self.create_patient_request(client).status_code, 201)
+
+        # Clients that drop cookies are pinned by the cache flag
+        client.cookies.clear()
+        self.assertEqual(sorted(self.first_names(client)), ['New', 'Primary'])
+        cache.clear()
+        self.assertEqual(self.first_names(client), ['Replica'])
+
+    def test_primary_reads_override_a_routed_request(self):
+        token = replicas.start_request()
+        self.addCleanup(replicas.finish_request, token)
+        replicas.route_reads(RequestFactory().get('/api/patients/'))
+
+        self.assertEqual(Patient.objects.all().db, 'replica')
+        with replicas.primary_reads():
+            self.assertEqual(Patient.objects.all().db, 'default')
+        self.assertEqual(Patient.objects.all().db, 'replica')
+
+    def test_doctor_cache_is_filled_from_the_primary(self):
+        doctor = create_doctor(self.user)
+        # Not replicated yet, but the cached detail is built from the primary
+        self.assertEqual(self.client.get(f'/api/doctors/{doctor.pk}/').status_code, 200)
+
+    def test_shard_router_runs_before_the_replica_router(self):
+        self.assertEqual(settings.DATABASE_ROUTERS, [
+            'sharding.shards.ShardRouter', 'healthcare_project.db.replicas.ReplicaRouter',
+        ])
+        self.override(DATABASE_SHARDS=['default', 'shard_1'])
+        sharded = create_user()
+        ShardAssignment.objects.update_or_create(owner_id=sharded.pk, defaults={'database': 'shard_1'})
+        token = replicas.start_request()
+        self.addCleanup(replicas.finish_request, token)
+        replicas.route_reads(RequestFactory().get('/api/patients/'))
+
+        with shards.owner(sharded.pk):
+            # Sharded rows go to their shard, reads and writes alike
+            self.assertEqual(Patient.objects.all().db, 'shard_1')
+            self.assertEqual(router.db_for_write(Patient), 'shard_1')
+            # Replicated models fall through to the replicas
+            self.assertEqual(Doctor.objects.all().db, 'replica')
+        with shards.owner(self.user.pk):
+            # Users left on default read from the replicas
+            self.assertEqual(Patient.objects.all().db, 'replica')
+            self.assertEqual(router.db_for_write(Patient), 'default')
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
+from . import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -7,4 +8,7 @@ urlpatterns = [
     path('api/patients/', include('patients.urls')),
     path('api/doctors/', include('doctors.urls')),
     path('api/mappings/', include('mappings.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('api/health/db/', views.db_health, name='db-health'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
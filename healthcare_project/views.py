@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import status, permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from healthcare_project import metrics
+from healthcare_project.db.pool import get_pool_stats
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def db_health(request):
+    """
+    Check the default database connection and report pool metrics
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception:
+        return Response({
+            'status': 'unavailable'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    return Response({
+        'status': 'ok',
+        'vendor': connection.vendor,
+        'pools': get_pool_stats()
+    }, status=status.HTTP_200_OK)
+
+
+def metrics_view(request):
+    """
+    GET: Prometheus metrics for this process
+    """
+    token = settings.METRICS_AUTH_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class MappingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'mappings'
\ No newline at end of file
+    name = 'mappings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,11 @@
+from healthcare_project.async_api import api_response, async_read_view
+from . import views
+
+
+@async_read_view(views.patient_doctors)
+async def patient_doctors(request, patient_id):
+    """
+    Get all doctors assigned to a specific patient without blocking the event loop
+    """
+    mappings = [mapping async for mapping in views.patient_doctors_queryset(request, patient_id)]
+    return api_response(views.patient_doctors_payload(patient_id, mappings))
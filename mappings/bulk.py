@@ -0,0 +1,119 @@
+import bisect
+import datetime
+from collections import defaultdict
+
+from analytics.stats import record_created
+from authentication.tokens import get_full_user
+from doctors.models import Doctor
+from healthcare_project.bulk import BulkImporter
+from patients.models import Patient
+from sharding.shards import across_shards
+from .models import PatientDoctorMapping
+from .schedule import MAX_APPOINTMENT_MINUTES, appointment_end, is_overlap_error
+from .serializers import PatientDoctorMappingSerializer
+
+
+def _collect_ids(rows, field):
+    ids = set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        try:
+            ids.add(int(row.get(field)))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+class PatientDoctorMappingBulkImporter(BulkImporter):
+    """
+    Assigns doctors to the requesting user's patients
+    """
+    serializer_class = PatientDoctorMappingSerializer
+    unique_together = [('patient', 'doctor')]
+
+    def preload(self, rows):
+        return {
+            'patient': Patient.objects.only('id', 'created_by', 'first_name', 'last_name').in_bulk(
+                _collect_ids(rows, 'patient')
+            ),
+            'doctor': Doctor.objects.only('id', 'first_name', 'last_name', 'specialization').in_bulk(
+                _collect_ids(rows, 'doctor')
+            ),
+        }
+
+    def build_instance(self, validated_data):
+        validated_data['assigned_by_id'] = self.request.user.id
+        validated_data['assigned_by_username'] = get_full_user(self.request.user).username
+        instance = super().build_instance(validated_data)
+        # bulk_create skips save(), which normally copies the display names
+        # and sets the appointment end
+        instance.copy_display_names()
+        instance.appointment_end = appointment_end(instance.next_appointment, instance.appointment_duration)
+        return instance
+
+    def check_unique(self, valid, errors):
+        return self.check_schedule(super().check_unique(valid, errors), errors)
+
+    def is_conflict(self, exc):
+        # check_schedule finds the bookings that raced past it
+        return super().is_conflict(exc) or is_overlap_error(exc)
+
+    def check_schedule(self, valid, errors):
+        """
+        Drop ACTIVE appointments overlapping stored ones or earlier rows of the batch
+
+        Stored appointments of the batch's doctors are read in one query per
+        shard, bounded by the batch's earliest and latest appointment.
+        """
+        default_duration = PatientDoctorMapping._meta.get_field('appointment_duration').default
+        window = datetime.timedelta(minutes=MAX_APPOINTMENT_MINUTES)
+        booked = {}
+        for index, data in valid:
+            if data.get('next_appointment') and data.get('status', 'ACTIVE') == 'ACTIVE':
+                start = data['next_appointment']
+                booked[index] = (start, appointment_end(start, data.get('appointment_duration', default_duration)))
+        if not booked:
+            return valid
+
+        doctors = {index: data['doctor'].pk for index, data in valid if index in booked}
+        stored = PatientDoctorMapping.objects.filter(
+            doctor_id__in=set(doctors.values()),
+            status='ACTIVE',
+            next_appointment__gt=min(start for start, _ in booked.values()) - window,
+            next_appointment__lt=max(end for _, end in booked.values()),
+        ).values_list('doctor_id', 'next_appointment', 'appointment_end')
+        schedule = defaultdict(list)
+        for mappings in across_shards(stored):
+            for doctor_id, start, end in mappings:
+                schedule[doctor_id].append((start, end))
+        for bookings in schedule.values():
+            bookings.sort()
+        rows = defaultdict(list)
+        for index, (start, end) in booked.items():
+            rows[doctors[index]].append((start, end, index))
+
+        clashes = set()
+        for doctor_id, doctor_rows in rows.items():
+            stored_starts = [start for start, _ in schedule[doctor_id]]
+            latest = None
+            for start, end, index in sorted(doctor_rows):
+                # Only stored appointments starting within the longest
+                # duration before this one can overlap it
+                candidates = schedule[doctor_id][
+                    bisect.bisect_right(stored_starts, start - window):bisect.bisect_left(stored_starts, end)
+                ]
+                if any(other_end > start for _, other_end in candidates):
+                    problem = 'an appointment already booked for this doctor'
+                elif latest is not None and start < latest[0]:
+                    problem = f'row {latest[1]} of this batch, for the same doctor'
+                else:
+                    latest = (end, index)
+                    continue
+                clashes.add(index)
+                errors[index] = {'next_appointment': [f'Overlaps {problem}.']}
+        return [(index, data) for index, data in valid if index not in clashes]
+
+    def after_create(self, instances):
+        # bulk_create sends no post_save, so count the batch here
+        record_created(instances)
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Subquery
+
+from doctors.models import Doctor
+from patients.models import Patient
+
+User = get_user_model()
+
+
+def display_name_sources():
+    """
+    Return {column: expression} reading each display name from its source row
+
+    The expressions match ``Patient.full_name``, ``Doctor.full_name`` and
+    friends, so one UPDATE refreshes every denormalized column.
+    """
+    patients = Patient.objects.filter(pk=OuterRef('patient_id'))
+    doctors = Doctor.objects.filter(pk=OuterRef('doctor_id'))
+    users = User.objects.filter(pk=OuterRef('assigned_by_id'))
+    return {
+        'patient_name': Subquery(patients.values(name=Patient.full_name_expression())),
+        'doctor_name': Subquery(doctors.values(name=Doctor.full_name_expression())),
+        'doctor_specialization': Subquery(doctors.values('specialization')),
+        'assigned_by_username': Subquery(users.values('username')),
+    }
+
+
+def backfill_display_names(queryset, batch_size=5000):
+    """
+    Recompute the display names of ``queryset`` in id windows of ``batch_size``
+
+    Each window is one set-based UPDATE, so rows never round-trip through
+    Python. Returns the number of rows updated.
+    """
+    sources = display_name_sources()
+    queryset = queryset.order_by('id')
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return updated
+        # Rows of the window outside ``queryset`` get the same, correct values
+        updated += queryset.model.objects.using(queryset.db).filter(id__gte=ids[0], id__lte=ids[-1]).update(**sources)
+        last_id = ids[-1]
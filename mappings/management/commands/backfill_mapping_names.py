@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mappings.display_names import backfill_display_names
+from mappings.models import PatientDoctorMapping
+from sharding.shards import across_shards
+
+
+class Command(BaseCommand):
+    help = 'Copy patient, doctor and assigner display names onto existing mappings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--missing-only', action='store_true', help='Only rows without a patient name')
+
+    def handle(self, *args, **options):
+        mappings = PatientDoctorMapping.objects.all()
+        if options['missing_only']:
+            mappings = mappings.filter(patient_name='')
+
+        started = time.perf_counter()
+        updated = sum(backfill_display_names(shard, options['batch_size']) for shard in across_shards(mappings))
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed display names on {updated} mappings in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,65 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from mappings.models import ReminderCheckpoint
+from mappings.reminders import ReminderScheduler, get_sink
+
+
+class Command(BaseCommand):
+    help = 'Send appointment reminders ahead of ACTIVE appointments, once or as a long-running worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send the reminders due now and exit')
+        parser.add_argument('--sink', default=settings.APPOINTMENT_REMINDER_SINK,
+                            help="'log', 'file' or the dotted path of a sink class")
+        parser.add_argument('--output', help='File written by the file sink')
+        parser.add_argument('--lead-minutes', type=int, default=settings.APPOINTMENT_REMINDER_LEAD_MINUTES)
+        parser.add_argument('--lookahead-minutes', type=int, default=60,
+                            help='Also queue appointments due this much later')
+        parser.add_argument('--heap-size', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--poll-interval', type=float, default=60.0, help='Longest sleep between checks, in seconds')
+        parser.add_argument('--database', help='Shard whose appointments are reminded, one worker per shard')
+        parser.add_argument('--name', help='Checkpoint name, one per independent worker (default: the database)')
+        parser.add_argument('--reset', action='store_true', help="Zero the checkpoint's counters")
+
+    def handle(self, *args, **options):
+        database = options['database']
+        if database is not None and database not in settings.DATABASE_SHARDS:
+            raise CommandError(f"Unknown shard {database!r}, expected one of {', '.join(settings.DATABASE_SHARDS)}")
+        name = options['name'] or database or 'default'
+        if options['reset']:
+            ReminderCheckpoint.objects.filter(name=name).delete()
+
+        sink_options = {'path': options['output']} if options['output'] else {}
+        sink = get_sink(options['sink'], **sink_options)
+        scheduler = ReminderScheduler(
+            sink,
+            name=name,
+            lead=timedelta(minutes=options['lead_minutes']),
+            heap_size=options['heap_size'],
+            batch_size=options['batch_size'],
+            using=database,
+        )
+        lookahead = timedelta(minutes=options['lookahead_minutes'])
+
+        try:
+            while True:
+                close_old_connections()
+                sent = scheduler.run_pending(lookahead=lookahead)
+                if sent or options['once']:
+                    self.stdout.write(self.style.SUCCESS(f'Sent {sent} reminders'))
+                if options['once']:
+                    return
+                wait = scheduler.seconds_until_due()
+                if wait is None or wait > options['poll_interval']:
+                    wait = options['poll_interval']
+                time.sleep(max(1.0, wait))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.close()
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mappings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patientdoctormapping',
+            index=models.Index(fields=['patient', 'status'], name='mappings_pa_patient_63ff35_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patientdoctormapping',
+            index=models.Index(fields=['doctor', 'status'], name='mappings_pa_doctor__0258f1_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('patients', '0002_owner_created_index'),
+        ('doctors', '0003_active_created_partial_index'),
+        ('mappings', '0002_patient_doctor_status_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='patientdoctormapping',
+            name='mappings_pa_patient_6d30ab_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='patientdoctormapping',
+            name='mappings_pa_doctor__322934_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='patientdoctormapping',
+            name='mappings_pa_status_ae02c3_idx',
+        ),
+        migrations.AlterField(
+            model_name='patientdoctormapping',
+            name='assigned_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='assignments_made', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='patientdoctormapping',
+            name='doctor',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='patient_assignments', to='doctors.doctor'),
+        ),
+        migrations.AlterField(
+            model_name='patientdoctormapping',
+            name='patient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='doctor_assignments', to='patients.patient'),
+        ),
+        migrations.AddIndex(
+            model_name='patientdoctormapping',
+            index=models.Index(fields=['assigned_by', 'created_at', 'id'], name='mappings_pa_assigne_97ec06_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patientdoctormapping',
+            index=models.Index(fields=['assigned_by', 'status', 'created_at', 'id'], name='mappings_pa_assigne_1063e0_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:57
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Trim
+
+
+def populate_display_names(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Mapping = apps.get_model('mappings', 'PatientDoctorMapping')
+    Patient = apps.get_model('patients', 'Patient')
+    Doctor = apps.get_model('doctors', 'Doctor')
+    User = apps.get_model('authentication', 'User')
+    patients = Patient.objects.using(alias).filter(pk=OuterRef('patient_id'))
+    doctors = Doctor.objects.using(alias).filter(pk=OuterRef('doctor_id'))
+    users = User.objects.using(alias).filter(pk=OuterRef('assigned_by_id'))
+    Mapping.objects.using(alias).update(
+        patient_name=Subquery(patients.values(name=Trim(Concat('first_name', Value(' '), 'last_name')))),
+        doctor_name=Subquery(doctors.values(name=Trim(Concat(Value('Dr. '), 'first_name', Value(' '), 'last_name')))),
+        doctor_specialization=Subquery(doctors.values('specialization')),
+        assigned_by_username=Subquery(users.values('username')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('doctors', '0003_active_created_partial_index'),
+        ('patients', '0002_owner_created_index'),
+        ('mappings', '0003_query_shape_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientdoctormapping',
+            name='assigned_by_username',
+            field=models.CharField(blank=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='patientdoctormapping',
+            name='doctor_name',
+            field=models.CharField(blank=True, editable=False, max_length=205),
+        ),
+        migrations.AddField(
+            model_name='patientdoctormapping',
+            name='doctor_specialization',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='patientdoctormapping',
+            name='patient_name',
+            field=models.CharField(blank=True, editable=False, max_length=201),
+        ),
+        migrations.RunPython(populate_display_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mappings', '0004_mapping_display_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_appointment', models.DateTimeField(blank=True, null=True)),
+                ('last_mapping_id', models.BigIntegerField(blank=True, null=True)),
+                ('reminders_sent', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='patientdoctormapping',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['next_appointment', 'id'], name='mapping_active_next_appt_idx'),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:20
+
+import datetime
+import itertools
+
+import django.core.validators
+from django.db import migrations, models
+
+from mappings.schedule import MAX_APPOINTMENT_MINUTES, OVERLAP_CONSTRAINT, find_overlaps
+
+TABLE = 'mappings_patientdoctormapping'
+
+# ACTIVE appointments of one doctor may not overlap. PostgreSQL enforces it
+# with an exclusion constraint over tstzrange(next_appointment,
+# appointment_end); btree_gist lets the GiST index compare doctor_id too
+POSTGRESQL_CONSTRAINT = f"""
+ALTER TABLE {TABLE} ADD CONSTRAINT {OVERLAP_CONSTRAINT}
+EXCLUDE USING gist (doctor_id WITH =, tstzrange(next_appointment, appointment_end, '[)') WITH &&)
+WHERE (status = 'ACTIVE' AND next_appointment IS NOT NULL)
+"""
+
+# SQLite has no exclusion constraints; triggers run the same check through
+# mapping_doctor_schedule_idx. Durations are capped, so only appointments
+# starting up to MAX_APPOINTMENT_MINUTES earlier can overlap. Django rebuilds
+# SQLite tables for most schema changes, which drops the triggers, so a
+# later migration altering this table has to create them again
+SQLITE_TRIGGER = f"""
+CREATE TRIGGER {OVERLAP_CONSTRAINT}_{{event}} BEFORE {{event_sql}} ON {TABLE}
+WHEN NEW.status = 'ACTIVE' AND NEW.next_appointment IS NOT NULL
+BEGIN
+    SELECT RAISE(ABORT, '{OVERLAP_CONSTRAINT}: the doctor already has an appointment at this time')
+    WHERE EXISTS (
+        SELECT 1 FROM {TABLE} AS other
+        WHERE other.doctor_id = NEW.doctor_id
+          AND other.status = 'ACTIVE'
+          AND other.next_appointment > datetime(NEW.next_appointment, '-{MAX_APPOINTMENT_MINUTES} minutes')
+          AND other.next_appointment < NEW.appointment_end
+          AND other.appointment_end > NEW.next_appointment
+          AND other.id != NEW.id
+    );
+END
+"""
+SQLITE_EVENTS = {
+    'insert': 'INSERT',
+    'update': 'UPDATE OF doctor_id, status, next_appointment, appointment_end',
+}
+
+
+def populate_appointment_end(apps, schema_editor):
+    Mapping = apps.get_model('mappings', 'PatientDoctorMapping')
+    Mapping.objects.using(schema_editor.connection.alias).filter(next_appointment__isnull=False).update(
+        appointment_end=models.F('next_appointment') + datetime.timedelta(minutes=30),
+    )
+
+
+def check_existing_overlaps(apps, schema_editor):
+    Mapping = apps.get_model('mappings', 'PatientDoctorMapping')
+    rows = Mapping.objects.using(schema_editor.connection.alias).filter(
+        status='ACTIVE', next_appointment__isnull=False,
+    ).order_by('doctor_id', 'next_appointment', 'id').values_list('doctor_id', 'next_appointment', 'appointment_end', 'id')
+    clashes = []
+    for _, schedule in itertools.groupby(rows.iterator(chunk_size=5000), key=lambda row: row[0]):
+        intervals = ((start, end, pk) for _, start, end, pk in schedule)
+        clashes.extend((earlier[2], later[2]) for earlier, later in find_overlaps(intervals))
+    if clashes:
+        pairs = ', '.join(f'{a}/{b}' for a, b in clashes[:20])
+        raise RuntimeError(
+            f'Found {len(clashes)} overlapping pair(s) of ACTIVE appointments with the same doctor '
+            f'(mapping ids {pairs}). Reschedule or deactivate them, then migrate again.'
+        )
+
+
+def create_overlap_constraint(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        schema_editor.execute(POSTGRESQL_CONSTRAINT)
+    elif vendor == 'sqlite':
+        for event, event_sql in SQLITE_EVENTS.items():
+            schema_editor.execute(SQLITE_TRIGGER.format(event=event, event_sql=event_sql))
+
+
+def drop_overlap_constraint(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'ALTER TABLE {TABLE} DROP CONSTRAINT IF EXISTS {OVERLAP_CONSTRAINT}')
+    elif vendor == 'sqlite':
+        for event in SQLITE_EVENTS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {OVERLAP_CONSTRAINT}_{event}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mappings', '0005_appointment_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientdoctormapping',
+            name='appointment_duration',
+            field=models.PositiveSmallIntegerField(default=30, help_text='Minutes', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(480)]),
+        ),
+        migrations.AddField(
+            model_name='patientdoctormapping',
+            name='appointment_end',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='patientdoctormapping',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['doctor', 'next_appointment', 'appointment_end'], name='mapping_doctor_schedule_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='patientdoctormapping',
+            constraint=models.CheckConstraint(check=models.Q(('appointment_duration__gte', 1), ('appointment_duration__lte', 480)), name='mapping_appointment_duration_range'),
+        ),
+        migrations.RunPython(populate_appointment_end, migrations.RunPython.noop),
+        migrations.RunPython(check_existing_overlaps, migrations.RunPython.noop),
+        migrations.RunPython(create_overlap_constraint, drop_overlap_constraint),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mappings', '0006_appointment_overlaps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientdoctormapping',
+            name='reminded_for',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,7 +1,10 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from patients.models import Patient
 from doctors.models import Doctor
+from .schedule import MAX_APPOINTMENT_MINUTES, appointment_end
 
 User = get_user_model()
 
@@ -15,9 +18,10 @@ class PatientDoctorMapping(models.Model):
         ('COMPLETED', 'Completed'),
     ]
 
-    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='doctor_assignments')
-    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='patient_assignments')
-    assigned_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assignments_made')
+    # Each foreign key leads a composite index below or the unique (patient, doctor) pair
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='doctor_assignments', db_index=False)
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='patient_assignments', db_index=False)
+    assigned_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assignments_made', db_index=False)
     
     # Assignment details
     assignment_date = models.DateTimeField(auto_now_add=True)
@@ -26,6 +30,17 @@ class PatientDoctorMapping(models.Model):
     
     # Follow-up information
     next_appointment = models.DateTimeField(null=True, blank=True)
+    appointment_duration = models.PositiveSmallIntegerField(
+        default=30,
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_APPOINTMENT_MINUTES)],
+        help_text="Minutes",
+    )
+    # next_appointment + appointment_duration, set on save; ACTIVE rows of a
+    # doctor may not overlap (see migration 0006)
+    appointment_end = models.DateTimeField(null=True, blank=True, editable=False)
+    # The next_appointment the last reminder went out for; a moved
+    # appointment no longer matches and is reminded again
+    reminded_for = models.DateTimeField(null=True, blank=True, editable=False)
     priority = models.CharField(
         max_length=20,
         choices=[
@@ -37,22 +52,87 @@ class PatientDoctorMapping(models.Model):
         default='MEDIUM'
     )
     
+    # Display names copied from the related rows so list pages need no
+    # joins; mappings.signals keeps them in sync when the source is renamed
+    patient_name = models.CharField(max_length=201, blank=True, editable=False)
+    doctor_name = models.CharField(max_length=205, blank=True, editable=False)
+    doctor_specialization = models.CharField(max_length=200, blank=True, editable=False)
+    assigned_by_username = models.CharField(max_length=150, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    DISPLAY_NAME_FIELDS = ['patient_name', 'doctor_name', 'doctor_specialization', 'assigned_by_username']
+
     class Meta:
         unique_together = ['patient', 'doctor']
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['patient']),
-            models.Index(fields=['doctor']),
-            models.Index(fields=['status']),
             models.Index(fields=['assignment_date']),
+            models.Index(fields=['patient', 'status']),
+            models.Index(fields=['doctor', 'status']),
+            # Assigner's list, keyset pages and exports, with and without ?status=
+            models.Index(fields=['assigned_by', 'created_at', 'id']),
+            models.Index(fields=['assigned_by', 'status', 'created_at', 'id']),
+            # Reminder scheduler: ACTIVE next_appointment range ORDER BY next_appointment, id
+            models.Index(
+                fields=['next_appointment', 'id'],
+                condition=Q(status='ACTIVE'),
+                name='mapping_active_next_appt_idx',
+            ),
+            # Double-booking checks and a doctor's day: doctor = X AND next_appointment range
+            models.Index(
+                fields=['doctor', 'next_appointment', 'appointment_end'],
+                condition=Q(status='ACTIVE'),
+                name='mapping_doctor_schedule_idx',
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(appointment_duration__gte=1, appointment_duration__lte=MAX_APPOINTMENT_MINUTES),
+                name='mapping_appointment_duration_range',
+            ),
         ]
 
+    def save(self, *args, **kwargs):
+        self.copy_display_names()
+        self.appointment_end = appointment_end(self.next_appointment, self.appointment_duration)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & {'patient', 'doctor', 'assigned_by'}:
+            kwargs['update_fields'] = set(update_fields) | set(self.DISPLAY_NAME_FIELDS)
+        if update_fields is not None and set(update_fields) & {'next_appointment', 'appointment_duration'}:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'appointment_end'}
+        super().save(*args, **kwargs)
+
+    def copy_display_names(self):
+        """
+        Copy display names from the related patient, doctor and assigner
+        """
+        self.patient_name = self.patient.full_name
+        self.doctor_name = self.doctor.full_name
+        self.doctor_specialization = self.doctor.specialization
+        # Callers that already hold the user row (possibly cached) set the
+        # username up front so saving does not load the user
+        if not self.assigned_by_username or PatientDoctorMapping.assigned_by.is_cached(self):
+            self.assigned_by_username = self.assigned_by.username
+
     def __str__(self):
         return f"{self.patient.full_name} -> {self.doctor.full_name}"
 
     @property
     def assignment_info(self):
-        return f"Patient: {self.patient.full_name} | Doctor: {self.doctor.full_name} | Status: {self.status}"
\ No newline at end of file
+        return f"Patient: {self.patient.full_name} | Doctor: {self.doctor.full_name} | Status: {self.status}"
+
+
+class ReminderCheckpoint(models.Model):
+    """
+    Progress of one reminder worker: the last appointment it dispatched and how many reminders it sent
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_appointment = models.DateTimeField(null=True, blank=True)
+    last_mapping_id = models.BigIntegerField(null=True, blank=True)
+    reminders_sent = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_appointment} #{self.last_mapping_id}"
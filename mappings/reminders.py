@@ -0,0 +1,212 @@
+import heapq
+import json
+import logging
+import os
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import PatientDoctorMapping, ReminderCheckpoint
+
+logger = logging.getLogger(__name__)
+
+REMINDER_FIELDS = (
+    'id', 'next_appointment', 'priority', 'patient_id', 'patient_name',
+    'doctor_id', 'doctor_name', 'doctor_specialization', 'assigned_by_id',
+)
+Reminder = namedtuple('Reminder', REMINDER_FIELDS)
+
+
+def reminder_payload(reminder):
+    payload = reminder._asdict()
+    del payload['id']
+    payload['next_appointment'] = reminder.next_appointment.isoformat()
+    return {'mapping_id': reminder.id, **payload}
+
+
+class LogSink:
+    """
+    Write each reminder to the ``mappings.reminders`` logger
+    """
+
+    def send(self, reminders):
+        for reminder in reminders:
+            logger.info(
+                'Reminder: %s sees %s at %s (mapping %s)',
+                reminder.patient_name, reminder.doctor_name,
+                reminder.next_appointment.isoformat(), reminder.id,
+            )
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """
+    Append reminders to a JSON lines file, synced to disk after every batch
+    """
+
+    def __init__(self, path=None):
+        self.file = open(path or settings.APPOINTMENT_REMINDER_FILE, 'a', encoding='utf-8')
+
+    def send(self, reminders):
+        self.file.writelines(json.dumps(reminder_payload(reminder)) + '\n' for reminder in reminders)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+SINKS = {'log': LogSink, 'file': FileSink}
+
+
+def get_sink(name=None, **options):
+    """
+    Instantiate the sink called ``name`` ('log', 'file' or a dotted class path)
+
+    A sink has ``send(reminders)``, called with each batch, and ``close()``.
+    """
+    name = name or settings.APPOINTMENT_REMINDER_SINK
+    sink_class = SINKS.get(name) or import_string(name)
+    return sink_class(**options)
+
+
+class ReminderScheduler:
+    """
+    Send a reminder ``lead`` before every ACTIVE appointment
+
+    Appointments due within ``lead`` are read in (next_appointment, id)
+    order from the partial index on ACTIVE mappings. Each mapping records
+    the appointment it was last reminded for (``reminded_for``), so the
+    scan skips appointments already reminded but still finds ones booked
+    or moved into the window at any time, including before appointments
+    already reminded. Only the keys of the next ``heap_size`` appointments
+    are held, in a min-heap; a batch that comes due is re-read by primary
+    key, so appointments cancelled or moved since they were queued are
+    dropped (and picked up again at their new time). Rows are marked after
+    the sink accepts a batch, so delivery is at least once: a crash between
+    the two repeats that batch. With several shards, run one scheduler per
+    shard, naming it with ``using``.
+    """
+
+    def __init__(self, sink, name='default', lead=None, heap_size=1000, batch_size=100, using=None):
+        if lead is None:
+            lead = timedelta(minutes=settings.APPOINTMENT_REMINDER_LEAD_MINUTES)
+        self.sink = sink
+        self.name = name
+        self.lead = lead
+        self.heap_size = heap_size
+        self.batch_size = batch_size
+        self.using = using
+        self.heap = []
+        # Mapping id -> the appointment it is queued for; heap entries that
+        # disagree are stale and skipped when popped
+        self.queued = {}
+        ReminderCheckpoint.objects.get_or_create(name=name)
+
+    def pending(self):
+        """
+        ACTIVE mappings whose current appointment has not been reminded
+        """
+        return PatientDoctorMapping.objects.db_manager(self.using).filter(status='ACTIVE').exclude(
+            reminded_for=F('next_appointment'),
+        )
+
+    def upcoming(self, now, until):
+        """
+        Keys of appointments not yet reminded from ``now`` up to ``until``
+        """
+        return self.pending().filter(
+            next_appointment__gte=now, next_appointment__lte=until,
+        ).order_by('next_appointment', 'id').values_list('next_appointment', 'id')
+
+    def refill(self, now, until, force=False):
+        """
+        Queue the next ``heap_size`` keys once the heap is half empty (or when forced)
+        """
+        if not force and len(self.queued) >= self.heap_size // 2:
+            return
+        for appointment, pk in self.upcoming(now, until)[:self.heap_size]:
+            if self.queued.get(pk) == appointment:
+                continue
+            self.queued[pk] = appointment
+            heapq.heappush(self.heap, (appointment, pk))
+        if len(self.heap) > 2 * self.heap_size:
+            self.heap = [(appointment, pk) for pk, appointment in self.queued.items()]
+            heapq.heapify(self.heap)
+
+    def pop_due(self, until):
+        """
+        Pop up to ``batch_size`` keys of appointments no later than ``until``
+        """
+        batch = []
+        while self.heap and self.heap[0][0] <= until and len(batch) < self.batch_size:
+            appointment, pk = heapq.heappop(self.heap)
+            if self.queued.get(pk) != appointment:
+                continue
+            del self.queued[pk]
+            batch.append((appointment, pk))
+        return batch
+
+    def dispatch(self, batch, now):
+        """
+        Send the reminders in ``batch`` still booked as queued and mark them reminded
+        """
+        rows = self.pending().filter(pk__in=[pk for _, pk in batch]).values_list(*REMINDER_FIELDS)
+        current = {row[0]: Reminder(*row) for row in rows}
+        reminders = [
+            current[pk] for appointment, pk in batch
+            if pk in current and current[pk].next_appointment == appointment and appointment >= now
+        ]
+        if not reminders:
+            return 0
+        self.sink.send(reminders)
+
+        # Only rows still booked for the appointment just reminded
+        sent = Q()
+        for reminder in reminders:
+            sent |= Q(pk=reminder.id, next_appointment=reminder.next_appointment)
+        PatientDoctorMapping.objects.db_manager(self.using).filter(sent).update(reminded_for=F('next_appointment'))
+        last = max(reminders, key=lambda reminder: (reminder.next_appointment, reminder.id))
+        ReminderCheckpoint.objects.filter(name=self.name).update(
+            last_appointment=last.next_appointment,
+            last_mapping_id=last.id,
+            reminders_sent=F('reminders_sent') + len(reminders),
+            updated_at=timezone.now(),
+        )
+        return len(reminders)
+
+    def run_pending(self, now=None, lookahead=timedelta(hours=1)):
+        """
+        Send every reminder due by ``now``; return how many were sent
+
+        Keys of appointments due within ``lookahead`` after that are
+        queued as well. The index is read once per call, and again only
+        when the heap runs half empty.
+        """
+        now = now or timezone.now()
+        due = now + self.lead
+        sent = 0
+        # Always look once, for appointments booked or moved since the last call
+        force = True
+        while True:
+            self.refill(now, due + lookahead, force)
+            force = False
+            batch = self.pop_due(due)
+            if not batch:
+                return sent
+            sent += self.dispatch(batch, now)
+
+    def seconds_until_due(self, now=None):
+        """
+        Seconds until the earliest queued reminder is due, or None with nothing queued
+        """
+        if not self.queued:
+            return None
+        now = now or timezone.now()
+        return max(0.0, (min(self.queued.values()) - self.lead - now).total_seconds())
@@ -0,0 +1,98 @@
+import datetime
+
+from django.db import IntegrityError
+from django.utils import timezone
+
+# Longest appointment; bounds how far back an overlap lookup has to seek
+MAX_APPOINTMENT_MINUTES = 8 * 60
+
+# Name of the PostgreSQL exclusion constraint and of the SQLite trigger error
+OVERLAP_CONSTRAINT = 'mapping_doctor_no_overlap'
+
+
+def appointment_end(start, minutes):
+    if start is None:
+        return None
+    return start + datetime.timedelta(minutes=minutes)
+
+
+def overlapping(queryset, doctor_id, start, end):
+    """
+    Filter ``queryset`` to the doctor's ACTIVE appointments overlapping [start, end)
+
+    Appointments starting at most MAX_APPOINTMENT_MINUTES before ``start``
+    are the only candidates, so the lookup is one bounded range scan of the
+    (doctor, next_appointment, appointment_end) index.
+    """
+    return queryset.filter(
+        doctor_id=doctor_id,
+        status='ACTIVE',
+        next_appointment__gt=start - datetime.timedelta(minutes=MAX_APPOINTMENT_MINUTES),
+        next_appointment__lt=end,
+        appointment_end__gt=start,
+    )
+
+
+def is_overlap_error(exc):
+    return isinstance(exc, IntegrityError) and OVERLAP_CONSTRAINT in str(exc)
+
+
+def find_overlaps(intervals):
+    """
+    Yield (earlier, later) pairs of overlapping (start, end, key) ``intervals`` sorted by start
+    """
+    latest = None
+    for interval in intervals:
+        if latest is not None and interval[0] < latest[1]:
+            yield latest, interval
+        if latest is None or interval[1] > latest[1]:
+            latest = interval
+
+
+def day_bounds(date):
+    """
+    Aware datetimes of midnight starting and ending ``date`` in TIME_ZONE
+    """
+    start = timezone.make_aware(datetime.datetime.combine(date, datetime.time()))
+    end = timezone.make_aware(datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time()))
+    return start, end
+
+
+def working_windows(date, slots):
+    """
+    Turn the day's weekly availability slots ({'start': 'HH:MM', 'end': 'HH:MM'}) into datetimes
+    """
+    windows = []
+    for slot in slots:
+        (start_hour, start_minute), (end_hour, end_minute) = (
+            map(int, slot['start'].split(':')), map(int, slot['end'].split(':'))
+        )
+        midnight = datetime.datetime.combine(date, datetime.time())
+        windows.append((
+            timezone.make_aware(midnight + datetime.timedelta(hours=start_hour, minutes=start_minute)),
+            timezone.make_aware(midnight + datetime.timedelta(hours=end_hour, minutes=end_minute)),
+        ))
+    return windows
+
+
+def free_gaps(windows, bookings):
+    """
+    Subtract sorted (start, end) ``bookings`` from sorted, disjoint ``windows``
+    """
+    gaps = []
+    index = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        # Skip bookings that ended before this window
+        while index < len(bookings) and bookings[index][1] <= cursor:
+            index += 1
+        position = index
+        while position < len(bookings) and bookings[position][0] < window_end:
+            booked_start, booked_end = bookings[position]
+            if booked_start > cursor:
+                gaps.append((cursor, booked_start))
+            cursor = max(cursor, booked_end)
+            position += 1
+        if cursor < window_end:
+            gaps.append((cursor, window_end))
+    return gaps
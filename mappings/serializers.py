@@ -1,16 +1,22 @@
+from django.db import IntegrityError, router, transaction
 from rest_framework import serializers
+from authentication.tokens import get_full_user
+from healthcare_project.bulk import BulkSerializerMixin
+from healthcare_project.eager_loading import EagerLoadingMixin
+from healthcare_project.metrics import TimedSerializerMixin
 from .models import PatientDoctorMapping
+from sharding.shards import across_shards
+from .schedule import appointment_end, is_overlap_error, overlapping
 from patients.serializers import PatientListSerializer
 from doctors.serializers import DoctorListSerializer
 
 
-class PatientDoctorMappingSerializer(serializers.ModelSerializer):
+class PatientDoctorMappingSerializer(BulkSerializerMixin, EagerLoadingMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for PatientDoctorMapping model
     """
     patient_details = PatientListSerializer(source='patient', read_only=True)
     doctor_details = DoctorListSerializer(source='doctor', read_only=True)
-    assigned_by_username = serializers.CharField(source='assigned_by.username', read_only=True)
     assignment_info = serializers.ReadOnlyField()
 
     class Meta:
@@ -18,10 +24,10 @@ class PatientDoctorMappingSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'patient', 'doctor', 'patient_details', 'doctor_details',
             'assigned_by_username', 'assignment_date', 'status', 'notes',
-            'next_appointment', 'priority', 'assignment_info',
+            'next_appointment', 'appointment_duration', 'appointment_end', 'priority', 'assignment_info',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'assigned_by_username', 'assignment_date', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'assigned_by_username', 'assignment_date', 'appointment_end', 'created_at', 'updated_at']
 
     def validate(self, attrs):
         """
@@ -32,32 +38,82 @@ class PatientDoctorMappingSerializer(serializers.ModelSerializer):
         
         # Check if patient belongs to the current user
         request = self.context.get('request')
-        if patient and patient.created_by != request.user:
+        if patient and patient.created_by_id != request.user.id:
             raise serializers.ValidationError("You can only assign your own patients to doctors.")
             
-        # Check if mapping already exists (for create only)
-        if not self.instance and PatientDoctorMapping.objects.filter(patient=patient, doctor=doctor).exists():
+        # Check if mapping already exists (for create only, bulk imports check the whole batch)
+        if not self.instance and not self.is_bulk and PatientDoctorMapping.objects.filter(patient=patient, doctor=doctor).exists():
             raise serializers.ValidationError("This patient is already assigned to this doctor.")
-            
+
+        # Bulk imports check the whole batch's schedule at once
+        if not self.is_bulk:
+            self.validate_schedule(attrs)
+
         return attrs
 
+    def _effective(self, attrs, field, default=None):
+        if field in attrs:
+            return attrs[field]
+        return getattr(self.instance, field) if self.instance else default
+
+    def validate_schedule(self, attrs):
+        """
+        Reject an ACTIVE appointment overlapping another one of the same doctor
+        """
+        start = self._effective(attrs, 'next_appointment')
+        status = self._effective(attrs, 'status', 'ACTIVE')
+        if start is None or status != 'ACTIVE':
+            return
+        doctor = self._effective(attrs, 'doctor')
+        duration = self._effective(
+            attrs, 'appointment_duration', PatientDoctorMapping._meta.get_field('appointment_duration').default
+        )
+        end = appointment_end(start, duration)
+        # Other users' bookings of the doctor may live on other shards
+        clashes = []
+        for mappings in across_shards(PatientDoctorMapping.objects.all()):
+            mappings = overlapping(mappings, doctor.pk, start, end)
+            if self.instance:
+                mappings = mappings.exclude(pk=self.instance.pk)
+            clashes.extend(mappings.order_by('next_appointment').values_list('next_appointment', 'appointment_end')[:1])
+        if clashes:
+            clash = min(clashes)
+            start, end = (serializers.DateTimeField().to_representation(value) for value in clash)
+            raise serializers.ValidationError({'next_appointment': [
+                f"The doctor already has an appointment from {start} to {end}."
+            ]})
+
+    def save(self, **kwargs):
+        # The database constraint catches bookings racing past validate()
+        try:
+            with transaction.atomic(using=router.db_for_write(PatientDoctorMapping, instance=self.instance)):
+                return super().save(**kwargs)
+        except IntegrityError as exc:
+            if not is_overlap_error(exc):
+                raise
+            raise serializers.ValidationError({'next_appointment': [
+                "The doctor already has an appointment at this time."
+            ]})
+
     def create(self, validated_data):
         """
         Create mapping with the authenticated user as assigner
         """
         request = self.context.get('request')
-        validated_data['assigned_by'] = request.user
+        validated_data['assigned_by_id'] = request.user.id
+        validated_data['assigned_by_username'] = get_full_user(request.user).username
         return super().create(validated_data)
 
 
-class PatientDoctorMappingListSerializer(serializers.ModelSerializer):
+class PatientDoctorMappingListSerializer(EagerLoadingMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Simplified serializer for mapping list views
     """
-    patient_name = serializers.CharField(source='patient.full_name', read_only=True)
-    doctor_name = serializers.CharField(source='doctor.full_name', read_only=True)
-    doctor_specialization = serializers.CharField(source='doctor.specialization', read_only=True)
-    assigned_by_username = serializers.CharField(source='assigned_by.username', read_only=True)
+    # Display names are denormalized onto the mapping, so no joins
+    only_fields = (
+        'id', 'status', 'priority', 'assignment_date', 'next_appointment', 'created_at',
+        'patient_name', 'doctor_name', 'doctor_specialization', 'assigned_by_username'
+    )
 
     class Meta:
         model = PatientDoctorMapping
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from analytics.stats import record_renamed
+from doctors.models import Doctor
+from patients.models import Patient
+from sharding.shards import get_shards, shard_for_owner
+from .models import PatientDoctorMapping
+
+User = get_user_model()
+
+
+def _renamed(created, update_fields, fields):
+    return not created and (update_fields is None or bool(set(update_fields) & set(fields)))
+
+
+@receiver(post_save, sender=Patient)
+def sync_patient_name(sender, instance, created, using, update_fields=None, **kwargs):
+    if _renamed(created, update_fields, ('first_name', 'last_name')):
+        # Rows already showing the name are left alone. Touching updated_at
+        # changes the ETags of the mapping lists showing the old name
+        PatientDoctorMapping.objects.using(using).filter(patient=instance).exclude(
+            patient_name=instance.full_name
+        ).update(patient_name=instance.full_name, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Doctor)
+def sync_doctor_name(sender, instance, created, update_fields=None, **kwargs):
+    if not _renamed(created, update_fields, ('first_name', 'last_name', 'specialization')):
+        return
+    # Any user's mappings may name the doctor, so every shard is updated
+    for alias in get_shards():
+        mappings = PatientDoctorMapping.objects.using(alias).filter(doctor=instance)
+        # The dashboard counts mappings per specialization
+        record_renamed(
+            PatientDoctorMapping, 'specialization',
+            mappings.exclude(doctor_specialization=instance.specialization), instance.specialization,
+        )
+        mappings.exclude(
+            doctor_name=instance.full_name, doctor_specialization=instance.specialization
+        ).update(
+            doctor_name=instance.full_name, doctor_specialization=instance.specialization, updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=User)
+def sync_assigner_username(sender, instance, created, update_fields=None, **kwargs):
+    if _renamed(created, update_fields, ('username',)):
+        PatientDoctorMapping.objects.using(shard_for_owner(instance.pk)).filter(assigned_by=instance).exclude(
+            assigned_by_username=instance.username
+        ).update(assigned_by_username=instance.username, updated_at=timezone.now())
@@ -0,0 +1,354 @@
+import json
+from io import StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from healthcare_project.testing import assert_num_queries, create_doctor, create_patient, create_user
+from .bulk import PatientDoctorMappingBulkImporter
+from .models import PatientDoctorMapping
+from .reminders import ReminderScheduler
+from .schedule import find_overlaps, free_gaps, is_overlap_error
+
+
+class ListSink:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, reminders):
+        self.sent.extend((reminder.id, reminder.next_appointment) for reminder in reminders)
+
+    def close(self):
+        pass
+
+
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now().replace(microsecond=0)
+        self.user = create_user()
+        self.patient = create_patient(self.user)
+        self.doctors = [create_doctor(self.user) for _ in range(3)]
+        self.sink = ListSink()
+        self.scheduler = ReminderScheduler(self.sink, lead=timedelta(hours=24))
+
+    def book(self, doctor, hours, status='ACTIVE'):
+        return PatientDoctorMapping.objects.create(
+            patient=self.patient, doctor=doctor, assigned_by=self.user, status=status,
+            next_appointment=self.now + timedelta(hours=hours),
+        )
+
+    def test_booking_earlier_than_one_already_reminded_is_sent(self):
+        late = self.book(self.doctors[0], 23)
+        self.assertEqual(self.scheduler.run_pending(now=self.now), 1)
+
+        early = self.book(self.doctors[1], 22)
+        self.assertEqual(self.scheduler.run_pending(now=self.now), 1)
+        self.assertEqual([pk for pk, _ in self.sink.sent], [late.pk, early.pk])
+
+    def test_restarted_worker_does_not_resend(self):
+        self.book(self.doctors[0], 2)
+        self.book(self.doctors[1], 5)
+        self.assertEqual(self.scheduler.run_pending(now=self.now), 2)
+
+        restarted = ReminderScheduler(self.sink, lead=timedelta(hours=24))
+        self.assertEqual(restarted.run_pending(now=self.now), 0)
+        self.assertEqual(len(self.sink.sent), 2)
+
+    def test_moved_appointment_is_reminded_again(self):
+        mapping = self.book(self.doctors[0], 10)
+        self.scheduler.run_pending(now=self.now)
+
+        mapping.next_appointment = self.now + timedelta(hours=4)
+        mapping.save()
+        self.assertEqual(self.scheduler.run_pending(now=self.now), 1)
+        self.assertEqual(self.sink.sent[-1], (mapping.pk, mapping.next_appointment))
+
+    def test_inactive_and_distant_appointments_are_skipped(self):
+        self.book(self.doctors[0], 3, status='INACTIVE')
+        self.book(self.doctors[1], 30)
+        self.assertEqual(self.scheduler.run_pending(now=self.now), 0)
+        self.assertEqual(self.scheduler.run_pending(now=self.now + timedelta(hours=7)), 1)
+
+
+class MappingBulkImportTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.doctor = create_doctor(self.user)
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+
+    def test_booking_racing_past_the_schedule_check_is_reported(self):
+        real_check_schedule = PatientDoctorMappingBulkImporter.check_schedule
+        calls = []
+
+        def racing_check_schedule(importer, valid, errors):
+            calls.append(valid)
+            if len(calls) == 1:
+                # Another request books the doctor right after the check
+                PatientDoctorMapping.objects.create(
+                    patient=create_patient(self.user), doctor=self.doctor, assigned_by=self.user,
+                    next_appointment=self.start + timedelta(minutes=10),
+                )
+                return valid
+            return real_check_schedule(importer, valid, errors)
+
+        free = create_patient(self.user)
+        clashing = create_patient(self.user)
+        rows = [
+            {'patient': free.pk, 'doctor': self.doctor.pk, 'next_appointment': (self.start + timedelta(hours=2)).isoformat()},
+            {'patient': clashing.pk, 'doctor': self.doctor.pk, 'next_appointment': self.start.isoformat()},
+        ]
+        with mock.patch.object(PatientDoctorMappingBulkImporter, 'check_schedule', racing_check_schedule):
+            response = self.client.post('/api/mappings/bulk/', rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(len(body['created']), 1)
+        self.assertEqual(body['errors'], [{'row': 1, 'errors': {
+            'next_appointment': ['Overlaps an appointment already booked for this doctor.'],
+        }}])
+        self.assertFalse(PatientDoctorMapping.objects.filter(patient=clashing).exists())
+
+
+class MappingListQueryTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assign(self, count):
+        for _ in range(count):
+            PatientDoctorMapping.objects.create(
+                patient=create_patient(self.user), doctor=create_doctor(self.user), assigned_by=self.user,
+            )
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.assign(3)
+        # The ETag aggregate (which carries the total), then the page
+        with assert_num_queries(2):
+            self.client.get('/api/mappings/')
+        self.assign(30)
+        with assert_num_queries(2):
+            body = self.client.get('/api/mappings/').json()
+        self.assertEqual((body['count'], len(body['mappings'])), (33, 20))
+
+    def test_detail_reads_patient_and_doctor_with_the_mapping(self):
+        self.assign(1)
+        mapping = PatientDoctorMapping.objects.get()
+        # The validators' timestamps, then the mapping joined to its patient and doctor
+        with assert_num_queries(2):
+            body = self.client.get(f'/api/mappings/{mapping.pk}/').json()
+        self.assertEqual(body['mapping']['patient_details']['id'], mapping.patient_id)
+
+
+class MappingDisplayNameTests(TestCase):
+    def setUp(self):
+        self.user = create_user(username='assigner')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = create_patient(self.user, first_name='Asha', last_name='Rao')
+        self.doctor = create_doctor(self.user, first_name='Vikram', last_name='Iyer', specialization='Neurology')
+        self.mapping = PatientDoctorMapping.objects.create(
+            patient=self.patient, doctor=self.doctor, assigned_by=self.user,
+        )
+
+    def listed(self):
+        row = self.client.get('/api/mappings/').json()['mappings'][0]
+        return row['patient_name'], row['doctor_name'], row['doctor_specialization'], row['assigned_by_username']
+
+    def test_names_are_copied_on_create(self):
+        self.assertEqual(self.listed(), ('Asha Rao', 'Dr. Vikram Iyer', 'Neurology', 'assigner'))
+
+    def test_list_reads_no_related_tables(self):
+        with assert_num_queries(2) as queries:
+            self.client.get('/api/mappings/')
+        self.assertFalse([query for query in queries.captured_queries if 'JOIN' in query['sql']])
+
+    def test_renames_are_synced(self):
+        self.patient.last_name = 'Menon'
+        self.patient.save(update_fields=['last_name'])
+        self.doctor.specialization = 'Oncology'
+        self.doctor.save()
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(self.listed(), ('Asha Menon', 'Dr. Vikram Iyer', 'Oncology', 'renamed'))
+
+    def test_saves_of_other_fields_leave_mappings_alone(self):
+        before = PatientDoctorMapping.objects.get().updated_at
+        self.patient.city = 'Delhi'
+        self.patient.save(update_fields=['city'])
+        self.doctor.hospital_name = 'Elsewhere'
+        self.doctor.save(update_fields=['hospital_name'])
+        self.assertEqual(PatientDoctorMapping.objects.get().updated_at, before)
+
+    def test_rename_changes_the_list_etag(self):
+        etag = self.client.get('/api/mappings/')['ETag']
+        self.patient.first_name = 'Asha Devi'
+        self.patient.save()
+        self.assertEqual(self.client.get('/api/mappings/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_backfill_refreshes_stale_names(self):
+        other = PatientDoctorMapping.objects.create(
+            patient=create_patient(self.user, first_name='Kiran', last_name='Das'),
+            doctor=create_doctor(self.user), assigned_by=self.user,
+        )
+        # Rows written before the columns existed, or behind the signals' back
+        PatientDoctorMapping.objects.filter(pk=self.mapping.pk).update(
+            patient_name='', doctor_name='', doctor_specialization='', assigned_by_username='',
+        )
+        PatientDoctorMapping.objects.filter(pk=other.pk).update(patient_name='Stale')
+
+        out = StringIO()
+        call_command('backfill_mapping_names', '--missing-only', '--batch-size', '1', stdout=out)
+        self.assertIn('Refreshed display names on 1 mappings', out.getvalue())
+        self.assertEqual(
+            PatientDoctorMapping.objects.filter(pk=self.mapping.pk).values_list(*PatientDoctorMapping.DISPLAY_NAME_FIELDS).get(),
+            ('Asha Rao', 'Dr. Vikram Iyer', 'Neurology', 'assigner'),
+        )
+        self.assertEqual(PatientDoctorMapping.objects.get(pk=other.pk).patient_name, 'Stale')
+
+        call_command('backfill_mapping_names', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual(PatientDoctorMapping.objects.get(pk=other.pk).patient_name, 'Kiran Das')
+
+
+def at(hour, minute=0):
+    return datetime(2024, 5, 6, hour, minute, tzinfo=dt_timezone.utc)
+
+
+class ScheduleTests(TestCase):
+    def test_free_gaps_subtract_bookings_from_windows(self):
+        windows = [(at(9), at(12)), (at(14), at(17))]
+        bookings = [(at(8), at(9, 30)), (at(10), at(10, 30)), (at(11, 45), at(14, 15))]
+        self.assertEqual(free_gaps(windows, bookings), [
+            (at(9, 30), at(10)), (at(10, 30), at(11, 45)), (at(14, 15), at(17)),
+        ])
+
+    def test_find_overlaps_pairs_clashing_intervals(self):
+        intervals = [(at(9), at(10), 'a'), (at(9, 30), at(9, 45), 'b'), (at(9, 50), at(11), 'c'), (at(11), at(12), 'd')]
+        self.assertEqual(
+            [(earlier[2], later[2]) for earlier, later in find_overlaps(intervals)], [('a', 'b'), ('a', 'c')],
+        )
+
+
+class DoubleBookingTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.doctor = create_doctor(self.user, available_days='Mon-Fri', available_hours='9 AM - 5 PM')
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+
+    def book(self, start, duration=30):
+        return self.client.post('/api/mappings/', {
+            'patient': create_patient(self.user).pk, 'doctor': self.doctor.pk,
+            'next_appointment': start.isoformat(), 'appointment_duration': duration,
+        }, format='json')
+
+    def test_overlapping_booking_is_rejected(self):
+        self.assertEqual(self.book(self.start, duration=60).status_code, 201)
+        response = self.book(self.start + timedelta(minutes=30))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('next_appointment', response.json()['details'])
+        # Back to back is fine
+        self.assertEqual(self.book(self.start + timedelta(minutes=60)).status_code, 201)
+
+    def test_database_rejects_overlaps_saved_directly(self):
+        PatientDoctorMapping.objects.create(
+            patient=create_patient(self.user), doctor=self.doctor, assigned_by=self.user, next_appointment=self.start,
+        )
+        with self.assertRaises(IntegrityError) as raised, transaction.atomic():
+            PatientDoctorMapping.objects.create(
+                patient=create_patient(self.user), doctor=self.doctor, assigned_by=self.user,
+                next_appointment=self.start + timedelta(minutes=10),
+            )
+        self.assertTrue(is_overlap_error(raised.exception))
+
+    def test_free_gaps_of_a_working_day(self):
+        self.book(at(10) + timedelta(days=7), duration=60)
+        response = self.client.get(f'/api/mappings/doctor/{self.doctor.pk}/free-gaps/?date=2024-05-13')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['booked'], 1)
+        self.assertEqual(
+            [(gap['start'], gap['end']) for gap in body['free_gaps']],
+            [('2024-05-13T09:00:00Z', '2024-05-13T10:00:00Z'), ('2024-05-13T11:00:00Z', '2024-05-13T17:00:00Z')],
+        )
+        self.assertEqual(self.client.get(f'/api/mappings/doctor/{self.doctor.pk}/free-gaps/?date=nope').status_code, 400)
+
+
+class MappingExportTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patient = create_patient(self.user)
+        self.mappings = [
+            PatientDoctorMapping.objects.create(
+                patient=patient, doctor=create_doctor(self.user), assigned_by=self.user, status=status,
+            )
+            for status in ('ACTIVE', 'COMPLETED', 'ACTIVE')
+        ]
+
+    def export(self, query=''):
+        with assert_num_queries(1):
+            response = self.client.get(f'/api/mappings/export/{query}')
+            return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_rows_carry_the_patient_and_doctor_columns(self):
+        rows = self.export()
+        self.assertEqual([row['id'] for row in rows], [mapping.pk for mapping in self.mappings])
+        doctor = self.mappings[0].doctor
+        self.assertEqual(
+            (rows[0]['doctor_last_name'], rows[0]['doctor_specialization']), (doctor.last_name, doctor.specialization),
+        )
+
+    def test_status_filter(self):
+        rows = self.export('?status=active')
+        self.assertEqual([row['id'] for row in rows], [self.mappings[0].pk, self.mappings[2].pk])
+
+
+class PatientDoctorLookupTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = create_patient(self.user)
+
+    def assign(self, patient, doctor, status='ACTIVE'):
+        return PatientDoctorMapping.objects.create(
+            patient=patient, doctor=doctor, assigned_by=patient.created_by, status=status,
+        )
+
+    def test_lookup_routes_are_not_shadowed_by_the_detail_route(self):
+        self.assertEqual(resolve('/api/mappings/patient/7/').url_name, 'patient-doctors')
+        self.assertEqual(resolve('/api/mappings/doctor/7/').url_name, 'doctor-patients')
+        self.assertEqual(resolve('/api/mappings/doctor/7/free-gaps/').url_name, 'doctor-free-gaps')
+        self.assertEqual(resolve('/api/mappings/7/').url_name, 'mapping-detail')
+
+    def test_patient_doctors_is_one_query_however_many_doctors(self):
+        for count in (1, 6):
+            while PatientDoctorMapping.objects.filter(patient=self.patient).count() < count:
+                self.assign(self.patient, create_doctor(self.user))
+            with assert_num_queries(1):
+                body = self.client.get(f'/api/mappings/patient/{self.patient.pk}/').json()
+            self.assertEqual(body['count'], count)
+
+    def test_patient_doctors_status_filter(self):
+        active = self.assign(self.patient, create_doctor(self.user))
+        self.assign(self.patient, create_doctor(self.user), status='COMPLETED')
+        body = self.client.get(f'/api/mappings/patient/{self.patient.pk}/?status=active').json()
+        self.assertEqual([doctor['id'] for doctor in body['assigned_doctors']], [active.pk])
+
+    def test_other_users_patients_are_not_listed(self):
+        other = create_patient(create_user())
+        doctor = create_doctor(self.user)
+        self.assign(other, doctor)
+        self.assertEqual(self.client.get(f'/api/mappings/patient/{other.pk}/').json()['doctors'], [])
+        self.assertEqual(self.client.get(f'/api/mappings/doctor/{doctor.pk}/').json()['count'], 0)
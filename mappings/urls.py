@@ -1,8 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the read endpoints are served by native coroutine views
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
 
 urlpatterns = [
     path('', views.mapping_list_create, name='mapping-list-create'),
+    path('bulk/', views.mapping_bulk_create, name='mapping-bulk-create'),
+    path('export/', views.mapping_export, name='mapping-export'),
+    path('patient/<int:patient_id>/', read_views.patient_doctors, name='patient-doctors'),
+    path('doctor/<int:doctor_id>/', views.doctor_patients, name='doctor-patients'),
+    path('doctor/<int:doctor_id>/free-gaps/', views.doctor_free_gaps, name='doctor-free-gaps'),
     path('<int:pk>/', views.mapping_detail, name='mapping-detail'),
-    path('<int:patient_id>/', views.patient_doctors, name='patient-doctors'),
 ]
\ No newline at end of file
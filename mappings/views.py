@@ -1,10 +1,30 @@
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import serializers
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from doctors.views import get_doctor_payload
+from healthcare_project.bulk import NDJSONParser
+from healthcare_project.conditional import (
+    add_validators, detail_state, detail_validators, list_state, list_validators, not_modified,
+)
+from healthcare_project.export import stream_export
+from healthcare_project.pagination import CreatedAtCursorPagination
+from sharding.shards import across_shards, shard_for_owner
+from .bulk import PatientDoctorMappingBulkImporter
 from .models import PatientDoctorMapping
+from .schedule import day_bounds, free_gaps, overlapping, working_windows
 from .serializers import PatientDoctorMappingSerializer, PatientDoctorMappingListSerializer
 
+# List rows carry their own copies of the names, while the detail embeds
+# the patient (with its creator's username) and the doctor
+MAPPING_LIST_TIMESTAMPS = ('updated_at',)
+MAPPING_DETAIL_TIMESTAMPS = ('updated_at', 'patient__updated_at', 'patient__created_by__updated_at', 'doctor__updated_at')
+
 
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -14,18 +34,25 @@ def mapping_list_create(request):
     POST: Create a new patient-doctor mapping
     """
     if request.method == 'GET':
-        mappings = PatientDoctorMapping.objects.filter(assigned_by=request.user)
+        mappings = PatientDoctorMapping.objects.filter(assigned_by_id=request.user.id)
         
         # Filter by status if provided
         status_filter = request.query_params.get('status')
         if status_filter:
             mappings = mappings.filter(status=status_filter.upper())
-            
-        serializer = PatientDoctorMappingListSerializer(mappings, many=True)
-        return Response({
-            'count': mappings.count(),
-            'mappings': serializer.data
-        }, status=status.HTTP_200_OK)
+
+        state = list_state(mappings, MAPPING_LIST_TIMESTAMPS)
+        validators = list_validators(request, state)
+        not_modified_response = not_modified(request, validators)
+        if not_modified_response is not None:
+            return not_modified_response
+
+        paginator = CreatedAtCursorPagination()
+        paginator.known_count = state[0]
+        page = paginator.paginate_queryset(PatientDoctorMappingListSerializer.setup_eager_loading(mappings), request)
+        serializer = PatientDoctorMappingListSerializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data, 'mappings')
+        return add_validators(response, validators)
 
     elif request.method == 'POST':
         serializer = PatientDoctorMappingSerializer(data=request.data, context={'request': request})
@@ -42,28 +69,136 @@ def mapping_list_create(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _filter_status(request, mappings):
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        mappings = mappings.filter(status=status_filter.upper())
+    return mappings
+
+
+def patient_doctors_queryset(request, patient_id):
+    """
+    One joined query served by the (patient, status) index
+    """
+    return _filter_status(request, PatientDoctorMappingListSerializer.setup_eager_loading(
+        PatientDoctorMapping.objects.filter(
+            patient_id=patient_id,
+            patient__created_by_id=request.user.id
+        )
+    ))
+
+
+def doctor_patients_queryset(request, doctor_id):
+    """
+    One joined query served by the (doctor, status) index
+    """
+    return _filter_status(request, PatientDoctorMappingListSerializer.setup_eager_loading(
+        PatientDoctorMapping.objects.filter(
+            doctor_id=doctor_id,
+            patient__created_by_id=request.user.id
+        )
+    ))
+
+
+def patient_doctors_payload(patient_id, mappings):
+    """
+    Response body for patient_doctors from the already evaluated rows
+    """
+    if not mappings:
+        return {
+            'message': 'No doctors found for this patient',
+            'doctors': []
+        }
+
+    serializer = PatientDoctorMappingListSerializer(mappings, many=True)
+    return {
+        'patient_id': patient_id,
+        'count': len(mappings),
+        'assigned_doctors': serializer.data
+    }
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def patient_doctors(request, patient_id):
     """
     Get all doctors assigned to a specific patient
     """
-    mappings = PatientDoctorMapping.objects.filter(
-        patient_id=patient_id,
-        patient__created_by=request.user
-    )
-    
-    if not mappings.exists():
-        return Response({
-            'message': 'No doctors found for this patient',
-            'doctors': []
-        }, status=status.HTTP_200_OK)
-    
+    # Evaluate once; the emptiness check and count come from the same rows
+    mappings = list(patient_doctors_queryset(request, patient_id))
+    return Response(patient_doctors_payload(patient_id, mappings), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def doctor_patients(request, doctor_id):
+    """
+    Get all of the user's patients assigned to a specific doctor
+    """
+    mappings = list(doctor_patients_queryset(request, doctor_id))
     serializer = PatientDoctorMappingListSerializer(mappings, many=True)
     return Response({
-        'patient_id': patient_id,
-        'count': mappings.count(),
-        'assigned_doctors': serializer.data
+        'doctor_id': doctor_id,
+        'count': len(mappings),
+        'assigned_patients': serializer.data
+    }, status=status.HTTP_200_OK)
+
+
+def parse_day(value):
+    """
+    Return the ``date`` query parameter as a date, today when missing
+    """
+    if not value:
+        return timezone.localdate()
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({'date': ['Expected a date such as 2024-05-06.']})
+    return day
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def doctor_free_gaps(request, doctor_id):
+    """
+    Get the free gaps in a doctor's day between ACTIVE appointments
+
+    The working hours come from the doctor's weekly availability (the whole
+    day when it could not be parsed) and the bookings from one query per
+    shard on the doctor's schedule index.
+    """
+    day = parse_day(request.query_params.get('date'))
+    doctor = get_doctor_payload(doctor_id)
+    slots = doctor['weekly_availability']
+    if slots:
+        windows = working_windows(day, [slot for slot in slots if slot['weekday'] == day.weekday()])
+    else:
+        windows = [day_bounds(day)]
+
+    day_start, day_end = day_bounds(day)
+    bookings = []
+    for mappings in across_shards(PatientDoctorMapping.objects.all()):
+        bookings.extend(
+            overlapping(mappings, doctor_id, day_start, day_end)
+            .order_by('next_appointment')
+            .values_list('next_appointment', 'appointment_end')
+        )
+    bookings.sort()
+    datetime_field = serializers.DateTimeField()
+    return Response({
+        'doctor_id': doctor_id,
+        'date': day.isoformat(),
+        'booked': len(bookings),
+        'free_gaps': [
+            {
+                'start': datetime_field.to_representation(start),
+                'end': datetime_field.to_representation(end),
+                'minutes': int((end - start).total_seconds() // 60),
+            }
+            for start, end in free_gaps(windows, bookings)
+        ],
     }, status=status.HTTP_200_OK)
 
 
@@ -75,13 +210,25 @@ def mapping_detail(request, pk):
     PUT: Update mapping
     DELETE: Remove patient-doctor mapping
     """
-    mapping = get_object_or_404(PatientDoctorMapping, pk=pk, assigned_by=request.user)
+    validators = None
+    if request.method == 'GET':
+        validators = detail_validators('mapping', pk, detail_state(
+            PatientDoctorMapping.objects.filter(pk=pk, assigned_by_id=request.user.id), MAPPING_DETAIL_TIMESTAMPS
+        ))
+        not_modified_response = not_modified(request, validators)
+        if not_modified_response is not None:
+            return not_modified_response
+
+    mapping = get_object_or_404(
+        PatientDoctorMappingSerializer.setup_eager_loading(PatientDoctorMapping.objects.all()),
+        pk=pk, assigned_by_id=request.user.id
+    )
 
     if request.method == 'GET':
         serializer = PatientDoctorMappingSerializer(mapping)
-        return Response({
+        return add_validators(Response({
             'mapping': serializer.data
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_200_OK), validators)
 
     elif request.method == 'PUT':
         serializer = PatientDoctorMappingSerializer(
@@ -107,4 +254,54 @@ def mapping_detail(request, pk):
         mapping.delete()
         return Response({
             'message': f'Mapping removed successfully: {mapping_info}'
-        }, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        }, status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes([JSONParser, NDJSONParser])
+def mapping_bulk_create(request):
+    """
+    POST: Create patient-doctor mappings from a JSON array or an NDJSON stream
+    """
+    created, errors = PatientDoctorMappingBulkImporter(request).run(request.data)
+    return Response({
+        'message': f'{len(created)} patient-doctor mappings created',
+        'created': [obj.id for obj in created],
+        'errors': errors
+    }, status=status.HTTP_201_CREATED if created or not errors else status.HTTP_400_BAD_REQUEST)
+
+
+MAPPING_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('patient_id', 'patient_id'),
+    ('patient_first_name', 'patient__first_name'),
+    ('patient_last_name', 'patient__last_name'),
+    ('doctor_id', 'doctor_id'),
+    ('doctor_first_name', 'doctor__first_name'),
+    ('doctor_last_name', 'doctor__last_name'),
+    ('doctor_specialization', 'doctor__specialization'),
+    ('status', 'status'),
+    ('priority', 'priority'),
+    ('assignment_date', 'assignment_date'),
+    ('next_appointment', 'next_appointment'),
+    ('notes', 'notes'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def mapping_export(request):
+    """
+    GET: Stream all mappings made by authenticated user as NDJSON or CSV (?output=csv)
+    """
+    # Rows are streamed after the middleware is done routing the request
+    mappings = PatientDoctorMapping.objects.using(shard_for_owner(request.user.id)).filter(
+        assigned_by_id=request.user.id
+    ).order_by('created_at', 'id')
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        mappings = mappings.filter(status=status_filter.upper())
+    return stream_export(request, mappings, MAPPING_EXPORT_COLUMNS, 'mappings')
\ No newline at end of file
@@ -0,0 +1,24 @@
+from analytics.stats import record_created
+from healthcare_project.bulk import BulkImporter
+from sharding.shards import across_shards
+from .serializers import PatientSerializer
+
+
+class PatientBulkImporter(BulkImporter):
+    """
+    Creates patients owned by the requesting user
+    """
+    serializer_class = PatientSerializer
+    unique_together = [('email',)]
+
+    def build_instance(self, validated_data):
+        validated_data['created_by_id'] = self.request.user.id
+        return super().build_instance(validated_data)
+
+    def stored_rows(self, queryset):
+        # Other users' patients may live on other shards
+        return across_shards(queryset)
+
+    def after_create(self, instances):
+        # bulk_create sends no post_save, so count the batch here
+        record_created(instances)
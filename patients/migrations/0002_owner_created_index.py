@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('patients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='patient',
+            name='patients_pa_created_15c993_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='patient',
+            name='patients_pa_email_bb026d_idx',
+        ),
+        migrations.AlterField(
+            model_name='patient',
+            name='created_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='patients', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='patients_pa_created_8010f0_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
+from django.db.models import Value
+from django.db.models.functions import Concat, Trim
 
 User = get_user_model()
 
@@ -54,15 +56,16 @@ class Patient(models.Model):
     emergency_contact_phone = models.CharField(validators=[phone_regex], max_length=17)
 
     # System fields
-    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='patients')
+    # Indexed as the leading column of the (created_by, created_at, id) index
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='patients', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['created_by']),
-            models.Index(fields=['email']),
+            # Owner's list, keyset pages and exports: created_by = X ORDER BY created_at, id
+            models.Index(fields=['created_by', 'created_at', 'id']),
             models.Index(fields=['created_at']),
         ]
 
@@ -73,6 +76,13 @@ class Patient(models.Model):
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
 
+    @staticmethod
+    def full_name_expression():
+        """
+        SQL equivalent of ``full_name``
+        """
+        return Trim(Concat('first_name', Value(' '), 'last_name'))
+
     @property
     def full_address(self):
         address = self.address_line_1
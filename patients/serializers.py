@@ -1,11 +1,18 @@
 from rest_framework import serializers
+from healthcare_project.bulk import BulkSerializerMixin
+from healthcare_project.eager_loading import EagerLoadingMixin
+from healthcare_project.flat import FlatSerializerMixin
+from healthcare_project.metrics import TimedSerializerMixin
+from sharding.shards import across_shards
 from .models import Patient
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(BulkSerializerMixin, EagerLoadingMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Patient model
     """
+    select_related_fields = ('created_by',)
+
     full_name = serializers.ReadOnlyField()
     full_address = serializers.ReadOnlyField()
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
@@ -25,14 +32,16 @@ class PatientSerializer(serializers.ModelSerializer):
         """
         Validate that email is unique for patients
         """
+        if self.is_bulk:
+            # Checked for the whole batch by PatientBulkImporter
+            return value
+        patients = Patient.objects.filter(email=value)
         if self.instance:
             # If updating, exclude current instance from uniqueness check
-            if Patient.objects.filter(email=value).exclude(id=self.instance.id).exists():
-                raise serializers.ValidationError("A patient with this email already exists.")
-        else:
-            # If creating new patient
-            if Patient.objects.filter(email=value).exists():
-                raise serializers.ValidationError("A patient with this email already exists.")
+            patients = patients.exclude(id=self.instance.id)
+        # Other users' patients may live on other shards
+        if any(shard.exists() for shard in across_shards(patients)):
+            raise serializers.ValidationError("A patient with this email already exists.")
         return value
 
     def create(self, validated_data):
@@ -40,14 +49,23 @@ class PatientSerializer(serializers.ModelSerializer):
         Create patient with the authenticated user as creator
         """
         request = self.context.get('request')
-        validated_data['created_by'] = request.user
+        validated_data['created_by_id'] = request.user.id
         return super().create(validated_data)
 
 
-class PatientListSerializer(serializers.ModelSerializer):
+class PatientListSerializer(FlatSerializerMixin, EagerLoadingMixin, TimedSerializerMixin, serializers.ModelSerializer):
     """
     Simplified serializer for patient list views
     """
+    select_related_fields = ('created_by',)
+    only_fields = (
+        'id', 'first_name', 'last_name', 'email', 'phone_number', 'date_of_birth',
+        'gender', 'blood_group', 'city', 'created_by__username', 'created_at'
+    )
+
+    flat_sources = {'created_by_username': 'created_by__username'}
+    flat_expressions = {'full_name': Patient.full_name_expression()}
+
     full_name = serializers.ReadOnlyField()
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
 
@@ -0,0 +1,141 @@
+import csv
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from healthcare_project.bulk import BulkImporter
+from healthcare_project.testing import assert_num_queries, create_patient, create_user
+from .models import Patient
+
+
+def patient_row(email):
+    return {
+        'first_name': 'Asha', 'last_name': 'Rao', 'email': email, 'phone_number': '+919876543210',
+        'date_of_birth': '1990-01-01', 'gender': 'F', 'blood_group': 'O+', 'address_line_1': '1 Main Road',
+        'city': 'Pune', 'state': 'MH', 'postal_code': '411001', 'emergency_contact_name': 'Kin',
+        'emergency_contact_phone': '+919876543211',
+    }
+
+
+class PatientBulkImportTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_row_inserted_concurrently_is_reported(self):
+        real_existing_keys = BulkImporter.existing_keys
+        calls = []
+
+        def racing_existing_keys(importer, fields, keys):
+            calls.append(fields)
+            if len(calls) == 1:
+                # Another request stores the same email right after the check
+                create_patient(self.user, email='taken@example.com')
+                return set()
+            return real_existing_keys(importer, fields, keys)
+
+        rows = [patient_row('new@example.com'), patient_row('taken@example.com')]
+        with mock.patch.object(BulkImporter, 'existing_keys', racing_existing_keys):
+            response = self.client.post('/api/patients/bulk/', rows, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(len(body['created']), 1)
+        self.assertEqual([error['row'] for error in body['errors']], [1])
+        self.assertEqual(Patient.objects.filter(email='taken@example.com').count(), 1)
+
+
+class PatientPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_every_patient_once(self):
+        expected = [create_patient(self.user).pk for _ in range(17)][::-1]
+        create_patient(create_user())
+
+        ids, url = [], '/api/patients/?page_size=5'
+        while url:
+            body = self.client.get(url).json()
+            self.assertEqual(body['count'], 17)
+            ids += [patient['id'] for patient in body['patients']]
+            url = body['next']
+        self.assertEqual(ids, expected)
+
+        back = self.client.get(self.client.get(body['previous']).json()['previous']).json()
+        self.assertEqual([patient['id'] for patient in back['patients']], expected[5:10])
+
+    def test_page_size_parameter(self):
+        for _ in range(3):
+            create_patient(self.user)
+        self.assertEqual(len(self.client.get('/api/patients/?page_size=1').json()['patients']), 1)
+        self.assertEqual(len(self.client.get('/api/patients/?page_size=500').json()['patients']), 3)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/patients/?cursor=bogus').status_code, 404)
+
+
+class PatientListQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_total_comes_with_the_etag_aggregate(self):
+        for _ in range(3):
+            create_patient(self.user)
+        # The ETag aggregate (which carries the total), then the page
+        with assert_num_queries(2):
+            self.assertEqual(len(self.client.get('/api/patients/').json()['patients']), 3)
+
+        for _ in range(30):
+            create_patient(self.user)
+        with assert_num_queries(2) as queries:
+            body = self.client.get('/api/patients/').json()
+        self.assertEqual((body['count'], len(body['patients'])), (33, 20))
+        self.assertEqual(sum('COUNT(' in query['sql'] for query in queries.captured_queries), 1)
+        with assert_num_queries(2):
+            self.assertEqual(len(self.client.get(body['next']).json()['patients']), 13)
+
+
+class PatientExportTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patients = [create_patient(self.user) for _ in range(3)]
+        create_patient(create_user())
+
+    def export(self, query=''):
+        # The rows are read while the body streams, in one query however many there are
+        with assert_num_queries(1):
+            response = self.client.get(f'/api/patients/export/{query}')
+            body = b''.join(response.streaming_content).decode()
+        return response, body
+
+    def test_ndjson_streams_the_users_patients_oldest_first(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="patients.ndjson"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [patient.pk for patient in self.patients])
+        self.assertEqual(rows[0]['date_of_birth'], '1990-01-01')
+
+    def test_csv_has_a_header_row(self):
+        response, body = self.export('?output=CSV')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'first_name', 'last_name'])
+        self.assertEqual(len(rows), 4)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/patients/export/?output=xml')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('output', response.json())
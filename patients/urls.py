@@ -3,5 +3,7 @@ from . import views
 
 urlpatterns = [
     path('', views.patient_list_create, name='patient-list-create'),
+    path('bulk/', views.patient_bulk_create, name='patient-bulk-create'),
+    path('export/', views.patient_export, name='patient-export'),
     path('<int:pk>/', views.patient_detail, name='patient-detail'),
 ]
\ No newline at end of file
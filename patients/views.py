@@ -1,10 +1,22 @@
 from rest_framework import status, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from healthcare_project.bulk import NDJSONParser
+from healthcare_project.conditional import (
+    add_validators, detail_state, detail_validators, list_state, list_validators, not_modified,
+)
+from healthcare_project.export import stream_export
+from healthcare_project.pagination import CreatedAtCursorPagination
+from sharding.shards import shard_for_owner
+from .bulk import PatientBulkImporter
 from .models import Patient
 from .serializers import PatientSerializer, PatientListSerializer
 
+# Rows whose updated_at the responses depend on (the creator's username is embedded)
+PATIENT_TIMESTAMPS = ('updated_at', 'created_by__updated_at')
+
 
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -14,12 +26,18 @@ def patient_list_create(request):
     POST: Create a new patient
     """
     if request.method == 'GET':
-        patients = Patient.objects.filter(created_by=request.user)
-        serializer = PatientListSerializer(patients, many=True)
-        return Response({
-            'count': patients.count(),
-            'patients': serializer.data
-        }, status=status.HTTP_200_OK)
+        patients = Patient.objects.filter(created_by_id=request.user.id)
+        state = list_state(patients, PATIENT_TIMESTAMPS)
+        validators = list_validators(request, state)
+        not_modified_response = not_modified(request, validators)
+        if not_modified_response is not None:
+            return not_modified_response
+
+        paginator = CreatedAtCursorPagination()
+        paginator.known_count = state[0]
+        page = paginator.paginate_queryset(PatientListSerializer.setup_list_queryset(patients), request)
+        response = paginator.get_paginated_response(PatientListSerializer.list_data(page), 'patients')
+        return add_validators(response, validators)
 
     elif request.method == 'POST':
         serializer = PatientSerializer(data=request.data, context={'request': request})
@@ -44,13 +62,25 @@ def patient_detail(request, pk):
     PUT: Update patient information
     DELETE: Delete patient
     """
-    patient = get_object_or_404(Patient, pk=pk, created_by=request.user)
+    validators = None
+    if request.method == 'GET':
+        validators = detail_validators('patient', pk, detail_state(
+            Patient.objects.filter(pk=pk, created_by_id=request.user.id), PATIENT_TIMESTAMPS
+        ))
+        not_modified_response = not_modified(request, validators)
+        if not_modified_response is not None:
+            return not_modified_response
+
+    patient = get_object_or_404(
+        PatientSerializer.setup_eager_loading(Patient.objects.all()),
+        pk=pk, created_by_id=request.user.id
+    )
 
     if request.method == 'GET':
         serializer = PatientSerializer(patient)
-        return Response({
+        return add_validators(Response({
             'patient': serializer.data
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_200_OK), validators)
 
     elif request.method == 'PUT':
         serializer = PatientSerializer(patient, data=request.data, context={'request': request})
@@ -71,4 +101,42 @@ def patient_detail(request, pk):
         patient.delete()
         return Response({
             'message': f'Patient {patient_name} deleted successfully'
-        }, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        }, status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@parser_classes([JSONParser, NDJSONParser])
+def patient_bulk_create(request):
+    """
+    POST: Create patients from a JSON array or an NDJSON stream
+    """
+    created, errors = PatientBulkImporter(request).run(request.data)
+    return Response({
+        'message': f'{len(created)} patients created',
+        'created': [obj.id for obj in created],
+        'errors': errors
+    }, status=status.HTTP_201_CREATED if created or not errors else status.HTTP_400_BAD_REQUEST)
+
+
+PATIENT_EXPORT_COLUMNS = [
+    (field, field) for field in (
+        'id', 'first_name', 'last_name', 'email', 'phone_number', 'date_of_birth',
+        'gender', 'blood_group', 'address_line_1', 'address_line_2', 'city', 'state',
+        'postal_code', 'country', 'medical_history', 'allergies',
+        'emergency_contact_name', 'emergency_contact_phone', 'created_at', 'updated_at'
+    )
+]
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def patient_export(request):
+    """
+    GET: Stream all patients created by authenticated user as NDJSON or CSV (?output=csv)
+    """
+    # Rows are streamed after the middleware is done routing the request
+    patients = Patient.objects.using(shard_for_owner(request.user.id)).filter(
+        created_by_id=request.user.id
+    ).order_by('created_at', 'id')
+    return stream_export(request, patients, PATIENT_EXPORT_COLUMNS, 'patients')
\ No newline at end of file
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import ShardAssignment
+
+
+@admin.register(ShardAssignment)
+class ShardAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('owner', 'database', 'updated_at')
+    list_filter = ('database',)
+    # Moving a user means moving their rows; use rebalance_user_shard
+    readonly_fields = ('owner', 'database', 'updated_at')
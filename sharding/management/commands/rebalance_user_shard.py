@@ -0,0 +1,123 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+
+from analytics.stats import rebuild
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+from sharding.models import ShardAssignment
+from sharding.replication import batches, copy_rows
+from sharding.shards import SHARDED_MODELS, forget_owner, get_shards, shard_for_owner
+
+User = get_user_model()
+
+# Patients first, mappings reference them
+MOVED_MODELS = (Patient, PatientDoctorMapping)
+
+
+class Command(BaseCommand):
+    help = "Move a user's patients and mappings to another shard while the API keeps serving them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='The user whose rows move')
+        parser.add_argument('--to', required=True, dest='target', help='Alias of the shard to move to')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--settle-seconds', type=float, default=settings.SHARD_MAP_CACHE_TIMEOUT,
+                            help='Wait for other processes to drop the cached shard map (default SHARD_MAP_CACHE_TIMEOUT)')
+
+    def handle(self, *args, **options):
+        target = options['target']
+        if target not in get_shards():
+            raise CommandError(f"Unknown shard {target!r}, expected one of {', '.join(get_shards())}")
+        user = User.objects.using(DEFAULT_DB_ALIAS).filter(email=options['email']).first()
+        if user is None:
+            raise CommandError('Unknown user email')
+        source = shard_for_owner(user.pk)
+        if source == target:
+            self.stdout.write(f'{user.email} already lives on {target}')
+            return
+
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+        # Rows changed on the source from here on are copied again after the switch
+        copy_started = timezone.now()
+        try:
+            with transaction.atomic(using=target):
+                copied = {model: self.copy(model, user, source, target, batch_size) for model in MOVED_MODELS}
+        except IntegrityError as exc:
+            raise CommandError(f'{target} rejected the rows, nothing was moved: {exc}')
+        for model, pks in copied.items():
+            self.stdout.write(f'Copied {len(pks)} {model._meta.verbose_name_plural} to {target}')
+
+        ShardAssignment.objects.using(DEFAULT_DB_ALIAS).update_or_create(owner=user, defaults={'database': target})
+        forget_owner(user.pk)
+        # Processes with the old map cached keep writing to the source until it expires
+        self.stdout.write(f"Switched {user.email} to {target}; settling for {options['settle_seconds']:.0f}s")
+        time.sleep(options['settle_seconds'])
+
+        with transaction.atomic(using=target):
+            for model in MOVED_MODELS:
+                updated, removed = self.catch_up(model, user, source, target, copied[model], copy_started, batch_size)
+                self.stdout.write(f'Caught up {updated} changed and {removed} deleted {model._meta.verbose_name_plural}')
+
+        # Mappings first, so deleting the patients has nothing to cascade to
+        for model in reversed(MOVED_MODELS):
+            for pks in self.chunks(self.owned_pks(model, user, source), batch_size):
+                self.owned(model, user, source).filter(pk__in=pks).delete()
+        # The deletions above were counted off the user's dashboard
+        rebuild([user.pk])
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {user.email} from {source} to {target} in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def owned(self, model, user, alias):
+        return model.objects.using(alias).filter(**{SHARDED_MODELS[model._meta.label_lower]: user.pk})
+
+    def owned_pks(self, model, user, alias):
+        return set(self.owned(model, user, alias).values_list('pk', flat=True))
+
+    def chunks(self, pks, size):
+        pks = sorted(pks)
+        for start in range(0, len(pks), size):
+            yield pks[start:start + size]
+
+    def copy(self, model, user, source, target, batch_size):
+        """
+        Copy the user's ``model`` rows from ``source`` to ``target``; return their ids
+        """
+        pks = set()
+        for batch in batches(self.owned(model, user, source), batch_size):
+            copy_rows(model, batch, target, batch_size)
+            batch_pks = [row.pk for row in batch]
+            found = self.owned(model, user, target).filter(pk__in=batch_pks).count()
+            if found != len(batch_pks):
+                raise CommandError(
+                    f'{target} has {found} of {len(batch_pks)} copied {model._meta.verbose_name_plural}'
+                )
+            pks.update(batch_pks)
+        return pks
+
+    def catch_up(self, model, user, source, target, copied, since, batch_size):
+        """
+        Apply the source writes made while other processes still routed the user there
+
+        Rows written on the target after the switch are newer and kept.
+        """
+        updated = 0
+        for batch in batches(self.owned(model, user, source).filter(updated_at__gte=since), batch_size):
+            current = dict(
+                self.owned(model, user, target).filter(pk__in=[row.pk for row in batch]).values_list('pk', 'updated_at')
+            )
+            newer = [row for row in batch if row.pk not in current or current[row.pk] < row.updated_at]
+            copy_rows(model, newer, target, batch_size)
+            updated += len(newer)
+
+        # Rows deleted from the source since they were copied
+        removed = 0
+        for pks in self.chunks(copied - self.owned_pks(model, user, source), batch_size):
+            removed += self.owned(model, user, target).filter(pk__in=pks).delete()[1].get(model._meta.label, 0)
+        return updated, removed
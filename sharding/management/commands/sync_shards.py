@@ -0,0 +1,81 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+from sharding.replication import batches, copy_rows
+from sharding.shards import get_shards
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Copy users and doctors to every shard and give each shard its own range of patient and mapping ids'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        shards = get_shards()
+        if len(shards) < 2:
+            raise CommandError('Only the default database is configured; list the shards in DB_SHARDS')
+
+        started = time.perf_counter()
+        for index, alias in enumerate(shards):
+            if alias == DEFAULT_DB_ALIAS:
+                continue
+            # Users first, doctors reference their creators
+            for model in (User, Doctor):
+                copied, removed = self.sync_model(model, alias, options['batch_size'])
+                self.stdout.write(f'{alias}: {copied} {model._meta.verbose_name_plural} copied, {removed} removed')
+            for model in (Patient, PatientDoctorMapping):
+                self.reserve_ids(alias, model, index * settings.SHARD_ID_SPAN)
+        self.stdout.write(self.style.SUCCESS(
+            f'Synced {len(shards) - 1} shards in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def sync_model(self, model, alias, batch_size):
+        """
+        Make ``alias``'s copy of ``model`` match the default database
+        """
+        copied = 0
+        for batch in batches(model.objects.using(DEFAULT_DB_ALIAS), batch_size):
+            copy_rows(model, batch, alias, batch_size)
+            copied += len(batch)
+
+        removed = 0
+        for batch in batches(model.objects.using(alias).only('pk'), batch_size):
+            pks = [row.pk for row in batch]
+            kept = set(model.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=pks).values_list('pk', flat=True))
+            stale = [pk for pk in pks if pk not in kept]
+            if stale:
+                removed += model.objects.using(alias).filter(pk__in=stale).delete()[1].get(model._meta.label, 0)
+        return copied, removed
+
+    def reserve_ids(self, alias, model, floor):
+        """
+        Start ``alias``'s ids for ``model`` above ``floor``, so rows keep their ids when moved between shards
+        """
+        connection = connections[alias]
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"GREATEST(%s, (SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)})))",
+                    [table, floor],
+                )
+            elif connection.vendor == 'sqlite':
+                # AUTOINCREMENT tables keep their counter in sqlite_sequence
+                cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+                if cursor.fetchone() is None:
+                    cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, floor])
+                else:
+                    cursor.execute('UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s', [floor, table])
+            else:
+                raise CommandError(f'Cannot set the id sequences of a {connection.vendor} database')
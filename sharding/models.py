@@ -0,0 +1,19 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class ShardAssignment(models.Model):
+    """
+    The database holding one user's patients and mappings
+
+    Kept on the default database only. Users without a row predate
+    sharding and live on the default database.
+    """
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='shard_assignment')
+    database = models.CharField(max_length=50)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.owner_id} -> {self.database}"
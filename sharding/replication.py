@@ -0,0 +1,54 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from .shards import get_shards
+
+
+def copy_rows(model, instances, alias, batch_size=1000):
+    """
+    Insert ``instances`` into ``alias`` under the same primary keys, overwriting existing rows
+
+    No signals are sent. The instances themselves are left untouched.
+    """
+    fields = model._meta.concrete_fields
+    # bulk_create marks the objects it saves as living on ``alias``
+    copies = [model(**{field.attname: getattr(instance, field.attname) for field in fields}) for instance in instances]
+    model.objects.using(alias).bulk_create(
+        copies, batch_size=batch_size, update_conflicts=True,
+        unique_fields=[model._meta.pk.name],
+        update_fields=[field.name for field in fields if not field.primary_key],
+    )
+
+
+def replicate(model, instances, batch_size=1000):
+    """
+    Copy ``instances``, as saved on the default database, to every other shard
+    """
+    if not instances:
+        return
+    for alias in get_shards():
+        if alias != DEFAULT_DB_ALIAS:
+            copy_rows(model, instances, alias, batch_size)
+
+
+def unreplicate(model, pks):
+    """
+    Delete the copies of rows deleted from the default database, cascading on each shard
+    """
+    for alias in get_shards():
+        if alias != DEFAULT_DB_ALIAS:
+            model.objects.using(alias).filter(pk__in=pks).delete()
+
+
+def batches(queryset, batch_size=1000):
+    """
+    Yield lists of ``queryset``'s rows in primary key order, one id window at a time
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        window = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(window[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        yield batch
@@ -0,0 +1,204 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from healthcare_project.db.replicas import get_replicas
+from .models import ShardAssignment
+
+User = get_user_model()
+
+MAP_KEY = 'shard-map:{owner_id}'
+
+# model label: the field naming the user whose shard holds the row
+SHARDED_MODELS = {
+    'patients.patient': 'created_by_id',
+    'mappings.patientdoctormapping': 'assigned_by_id',
+}
+# Copied to every shard, so sharded rows can reference them
+REPLICATED_MODELS = {User._meta.label_lower, 'doctors.doctor'}
+
+# Per request or ``owner()`` block; ``alias`` is filled in on first use
+_owner_state = ContextVar('shard_owner_state', default=None)
+
+
+def get_shards():
+    """
+    Return the aliases of the shard databases, the default database first
+    """
+    return getattr(settings, 'DATABASE_SHARDS', [DEFAULT_DB_ALIAS])
+
+
+def is_sharded():
+    return len(get_shards()) > 1
+
+
+def pick_shard(owner_id):
+    """
+    The shard a new user's rows are placed on
+    """
+    shards = get_shards()
+    return shards[owner_id % len(shards)]
+
+
+def assign_new_owners(owner_ids):
+    """
+    Place new users on their shards, leaving existing assignments alone
+    """
+    if not is_sharded():
+        return
+    ShardAssignment.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        [ShardAssignment(owner_id=owner_id, database=pick_shard(owner_id)) for owner_id in owner_ids],
+        ignore_conflicts=True,
+    )
+
+
+def shard_for_owner(owner_id):
+    """
+    Return the alias of the database holding ``owner_id``'s rows
+
+    The map is cached for SHARD_MAP_CACHE_TIMEOUT. Users without an
+    assignment predate sharding and are pinned to the default database.
+    """
+    if not is_sharded():
+        return DEFAULT_DB_ALIAS
+    key = MAP_KEY.format(owner_id=owner_id)
+    alias = cache.get(key)
+    if alias is None:
+        assignment, _ = ShardAssignment.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            owner_id=owner_id, defaults={'database': DEFAULT_DB_ALIAS},
+        )
+        alias = assignment.database
+        cache.set(key, alias, settings.SHARD_MAP_CACHE_TIMEOUT)
+    return alias
+
+
+def forget_owner(owner_id):
+    cache.delete(MAP_KEY.format(owner_id=owner_id))
+
+
+def across_shards(queryset, owner_ids=None):
+    """
+    Yield ``queryset`` bound to each shard holding rows of ``owner_ids`` (default every shard)
+
+    Without sharding the queryset is yielded as is, so the usual routing
+    (read replicas included) still applies.
+    """
+    if not is_sharded():
+        yield queryset
+        return
+    if owner_ids is None:
+        aliases = get_shards()
+    else:
+        aliases = sorted({shard_for_owner(owner_id) for owner_id in owner_ids})
+    for alias in aliases:
+        yield queryset.using(alias)
+
+
+class _OwnerState:
+    __slots__ = ('request', 'owner_id', 'alias')
+
+    def __init__(self, request=None, owner_id=None):
+        self.request = request
+        self.owner_id = owner_id
+        self.alias = None
+
+
+def start_request(request):
+    """
+    Route the request's sharded queries to its user's shard; pass the token to ``finish_request``
+
+    The user is read lazily, as DRF only authenticates it inside the view.
+    """
+    return _owner_state.set(_OwnerState(request=request))
+
+
+def finish_request(token):
+    _owner_state.reset(token)
+
+
+@contextmanager
+def owner(owner_id):
+    """
+    Route the sharded queries of the block to ``owner_id``'s shard
+    """
+    token = _owner_state.set(_OwnerState(owner_id=owner_id))
+    try:
+        yield
+    finally:
+        _owner_state.reset(token)
+
+
+def current_shard():
+    """
+    The shard of the current request's user or ``owner()`` block, or None
+    """
+    state = _owner_state.get()
+    if state is None:
+        return None
+    if state.alias is None:
+        owner_id = state.owner_id
+        if owner_id is None and state.request is not None:
+            user = getattr(state.request, 'user', None)
+            if user is not None and user.is_authenticated:
+                owner_id = user.id
+        if owner_id is None:
+            return None
+        state.alias = shard_for_owner(owner_id)
+    return state.alias
+
+
+def _hinted_shard(model, instance):
+    """
+    The shard an ``instance`` hint points at for a query on ``model``
+    """
+    if instance is None:
+        return None
+    label = instance._meta.label_lower
+    if label in SHARDED_MODELS:
+        owner_id = getattr(instance, SHARDED_MODELS[label])
+    elif label == User._meta.label_lower and model._meta.label_lower in SHARDED_MODELS:
+        # e.g. user.patients.all()
+        owner_id = instance.pk
+    else:
+        return None
+    return shard_for_owner(owner_id) if owner_id is not None else None
+
+
+class ShardRouter:
+    """
+    Send patient and mapping queries to the shard of the user owning them
+
+    The owner comes from the instance involved, else from the current
+    request or ``owner()`` block. Queries without an owner and every other
+    model fall through to the next router, as do queries for users kept on
+    the default database, so those still read from the replicas. Users and
+    doctors are copied to every shard; everything else is only used on the
+    default database. Every shard gets the full schema, so deletes
+    cascading from a user or doctor copy find their tables.
+    """
+
+    def _db(self, model, hints):
+        if model._meta.label_lower not in SHARDED_MODELS or not is_sharded():
+            return None
+        alias = _hinted_shard(model, hints.get('instance')) or current_shard()
+        if alias is None or alias == DEFAULT_DB_ALIAS:
+            return None
+        return alias
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The copy on the other database has the same primary key
+        aliases = {*get_shards(), *get_replicas()}
+        labels = {obj1._meta.label_lower, obj2._meta.label_lower}
+        if labels & REPLICATED_MODELS and obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
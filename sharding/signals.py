@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from doctors.models import Doctor
+from .replication import replicate, unreplicate
+from .shards import assign_new_owners, is_sharded
+
+User = get_user_model()
+
+# Saves touching only these fields are not worth copying to every shard
+LOCAL_USER_FIELDS = {'last_login'}
+
+
+@receiver(post_save, sender=User)
+def replicate_user(sender, instance, created, using, raw=False, update_fields=None, **kwargs):
+    if raw or using != DEFAULT_DB_ALIAS or not is_sharded():
+        return
+    if update_fields is not None and set(update_fields) <= LOCAL_USER_FIELDS:
+        return
+    replicate(User, [instance])
+    if created:
+        assign_new_owners([instance.pk])
+
+
+@receiver(post_save, sender=Doctor)
+def replicate_doctor(sender, instance, using, raw=False, **kwargs):
+    if not raw and using == DEFAULT_DB_ALIAS and is_sharded():
+        replicate(Doctor, [instance])
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Doctor)
+def unreplicate_deleted(sender, instance, using, **kwargs):
+    if using == DEFAULT_DB_ALIAS and is_sharded():
+        unreplicate(sender, [instance.pk])
@@ -0,0 +1,122 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, router
+from rest_framework.test import APIClient
+
+from analytics.stats import live_dashboard, materialized_dashboard
+from doctors.models import Doctor
+from healthcare_project.testing import ExtraDatabasesTestCase, create_doctor, create_patient, create_user
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+from patients.tests import patient_row
+from .models import ShardAssignment
+from .shards import owner, shard_for_owner
+
+User = get_user_model()
+
+
+class ShardingTests(ExtraDatabasesTestCase):
+    extra_databases = ('shard_1',)
+
+    def setUp(self):
+        self.override(DATABASE_SHARDS=['default', 'shard_1'])
+        cache.clear()
+        call_command('sync_shards', stdout=StringIO())
+
+    def user_on(self, alias):
+        # New users are placed by id: even ids on default, odd ones on shard_1
+        while True:
+            user = create_user()
+            if shard_for_owner(user.pk) == alias:
+                return user
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def create_patient_on(self, alias, **fields):
+        user = self.user_on(alias)
+        # Outside a request, owner() routes the ORM's sharded writes
+        with owner(user.pk):
+            return create_patient(user, **fields)
+
+    def test_patients_are_placed_on_their_owners_shard(self):
+        for alias in ('default', 'shard_1'):
+            user = self.user_on(alias)
+            self.assertEqual(ShardAssignment.objects.get(owner=user).database, alias)
+            response = self.client_for(user).post('/api/patients/', patient_row(f'{alias}@example.com'), format='json')
+            self.assertEqual(response.status_code, 201)
+
+            patient_id = response.json()['patient']['id']
+            self.assertEqual(list(Patient.objects.using(alias).values_list('id', flat=True)), [patient_id])
+            self.assertEqual(self.client_for(user).get('/api/patients/').json()['count'], 1)
+            with owner(user.pk):
+                self.assertEqual(router.db_for_write(Patient), alias)
+
+    def test_shard_ids_start_above_their_reserved_range(self):
+        patient = self.create_patient_on('shard_1')
+        self.assertEqual(patient._state.db, 'shard_1')
+        self.assertGreater(patient.pk, settings.SHARD_ID_SPAN)
+        self.assertLess(self.create_patient_on('default').pk, settings.SHARD_ID_SPAN)
+
+    def test_users_and_doctors_are_copied_to_every_shard(self):
+        user = create_user()
+        doctor = create_doctor(user, hospital_name='General')
+        self.assertTrue(User.objects.using('shard_1').filter(pk=user.pk).exists())
+        self.assertEqual(Doctor.objects.using('shard_1').get(pk=doctor.pk).hospital_name, 'General')
+
+        doctor.hospital_name = 'St. Mary'
+        doctor.save()
+        self.assertEqual(Doctor.objects.using('shard_1').get(pk=doctor.pk).hospital_name, 'St. Mary')
+        doctor.delete()
+        self.assertFalse(Doctor.objects.using('shard_1').filter(pk=doctor.pk).exists())
+
+    def test_sync_shards_repairs_missing_copies(self):
+        user = create_user()
+        User.objects.using('shard_1').filter(pk=user.pk).delete()
+        call_command('sync_shards', stdout=StringIO())
+        self.assertTrue(User.objects.using('shard_1').filter(pk=user.pk).exists())
+
+    def test_rebalance_moves_every_row(self):
+        user = self.user_on('default')
+        doctor = create_doctor(user)
+        patients = [create_patient(user) for _ in range(3)]
+        mapping = PatientDoctorMapping.objects.create(patient=patients[0], doctor=doctor, assigned_by=user)
+
+        call_command(
+            'rebalance_user_shard', '--email', user.email, '--to', 'shard_1', '--settle-seconds', '0', stdout=StringIO(),
+        )
+
+        self.assertEqual(shard_for_owner(user.pk), 'shard_1')
+        self.assertFalse(Patient.objects.using('default').exists())
+        self.assertFalse(PatientDoctorMapping.objects.using('default').exists())
+        self.assertEqual(
+            set(Patient.objects.using('shard_1').values_list('id', flat=True)), {patient.pk for patient in patients},
+        )
+        self.assertEqual(list(PatientDoctorMapping.objects.using('shard_1').values_list('id', flat=True)), [mapping.pk])
+        client = self.client_for(user)
+        self.assertEqual(client.get('/api/patients/').json()['count'], 3)
+        self.assertEqual(client.get(f'/api/mappings/{mapping.pk}/').status_code, 200)
+        self.assertEqual(materialized_dashboard(user.pk), live_dashboard(user.pk))
+        self.assertEqual(materialized_dashboard(user.pk)['patients']['total'], 3)
+
+    def test_patient_email_is_checked_on_every_shard(self):
+        self.create_patient_on('default', email='shared@example.com')
+        other = self.client_for(self.user_on('shard_1'))
+
+        response = other.post('/api/patients/', patient_row('shared@example.com'), format='json')
+        self.assertEqual(response.status_code, 400)
+        response = other.post('/api/patients/bulk/', [patient_row('shared@example.com')], format='json')
+        self.assertEqual(response.json()['errors'][0]['row'], 0)
+
+    def test_unique_email_index_only_covers_its_own_shard(self):
+        # What two creates racing past the check on different shards would leave behind
+        self.create_patient_on('default', email='shared@example.com')
+        self.create_patient_on('shard_1', email='shared@example.com')
+        with self.assertRaises(IntegrityError):
+            self.create_patient_on('shard_1', email='shared@example.com')